@@ -136,6 +136,33 @@ export default class GamingBillingAPI {
     return response;
   }
 
+  async accountsBalanceAt(holder_id, unit_symbol, at, holder_type) {
+    let path =
+      "/api/currencies/accounts/balance_at/?" +
+      Qs.stringify(
+        { holder_id: holder_id, unit_symbol: unit_symbol, at: at, holder_type: holder_type },
+        { arrayFormat: "comma" }
+      );
+
+    let response = await this.client.get(path, {
+      headers: await this._getHeaders(path),
+    });
+
+    return response;
+  }
+
+  async accountsStatement(holder_id, unit_symbol, filters = {}) {
+    let path =
+      "/api/currencies/accounts/statement/?" +
+      Qs.stringify({ holder_id: holder_id, unit_symbol: unit_symbol, ...filters }, { arrayFormat: "comma" });
+
+    let response = await this.client.get(path, {
+      headers: await this._getHeaders(path),
+    });
+
+    return response;
+  }
+
   async accountsCreate(holder_id, unit_symbol, holder_type) {
     let path = "/api/currencies/accounts/create/";
 
@@ -168,7 +195,7 @@ export default class GamingBillingAPI {
     return response;
   }
 
-  async adjustmentsCreate(holder_id, unit_symbol, amount, description, auto_reject_timeout) {
+  async adjustmentsCreate(holder_id, unit_symbol, amount, description, auto_reject_timeout, idempotency_key, instant = false, uuid) {
     let path = "/api/currencies/adjustments/create/";
 
     let data = JSON.stringify({
@@ -177,6 +204,9 @@ export default class GamingBillingAPI {
       amount: amount,
       description: description,
       auto_reject_timeout: auto_reject_timeout,
+      idempotency_key: idempotency_key,
+      instant: instant,
+      uuid: uuid,
     });
 
     let response = await this.client.post(path, data, {
@@ -220,7 +250,7 @@ export default class GamingBillingAPI {
     return response;
   }
 
-  async transfersCreate(from_holder_id, to_holder_id, transfer_rule, amount, description, auto_reject_timeout) {
+  async transfersCreate(from_holder_id, to_holder_id, transfer_rule, amount, description, auto_reject_timeout, idempotency_key, instant = false, uuid) {
     let path = "/api/currencies/transfers/create/";
 
     let data = JSON.stringify({
@@ -230,6 +260,9 @@ export default class GamingBillingAPI {
       amount: amount,
       description: description,
       auto_reject_timeout: auto_reject_timeout,
+      idempotency_key: idempotency_key,
+      instant: instant,
+      uuid: uuid,
     });
 
     let response = await this.client.post(path, data, {
@@ -273,7 +306,7 @@ export default class GamingBillingAPI {
     return response;
   }
 
-  async exchangesCreate(holder_id, exchange_rule, from_unit, to_unit, from_amount, description, auto_reject_timeout) {
+  async exchangesCreate(holder_id, exchange_rule, from_unit, to_unit, from_amount, description, auto_reject_timeout, idempotency_key, instant = false, uuid) {
     let path = "/api/currencies/exchanges/create/";
 
     let data = JSON.stringify({
@@ -284,6 +317,9 @@ export default class GamingBillingAPI {
       from_amount: from_amount,
       description: description,
       auto_reject_timeout: auto_reject_timeout,
+      idempotency_key: idempotency_key,
+      instant: instant,
+      uuid: uuid,
     });
 
     let response = await this.client.post(path, data, {
@@ -1,14 +1,203 @@
+import asyncio
 import hashlib
 import hmac
 import json
-from datetime import datetime, timezone
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal
 from typing import Any
+from uuid import UUID
 
 import aiohttp
+import urllib3
+from urllib3.exceptions import NewConnectionError
 from yarl import URL
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value: Any) -> str:
+    # Decimal передается строкой без округления через float, DecimalField сервиса принимает строки
+    if isinstance(value, Decimal):
+        return str(value)
+
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+
+    if isinstance(value, UUID):
+        return str(value)
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _amount(value: Decimal | float) -> Decimal | str:
+    # Сумма float передается строкой, как и Decimal: orjson и json по-разному записывают малые и большие числа
+    # (0.00001 и 1e-05), строка одинакова для обоих и разбирается DecimalField сервиса без округления
+    if isinstance(value, float):
+        return str(Decimal(repr(value)))
+
+    return value
+
+
+def _dumps(data: Any) -> bytes:
+    """Сериализует тело запроса в байты один раз, эти же байты подписываются и отправляются"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+
+    return json.dumps(data, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(data: bytes) -> Any:
+    if not data.strip():
+        return None
+
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+
+class GamingBillingError(Exception):
+    """Сервис ответил статусом из RetryPolicy.retry_statuses после всех попыток"""
+
+    def __init__(self, message: str, status: int | None = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class CircuitOpenError(GamingBillingError):
+    """Предохранитель открыт, запрос не отправлялся"""
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """
+    Повторы запросов с экспоненциальной задержкой и случайным разбросом (full jitter), чтобы клиенты разных серверов
+    не повторяли запросы одновременно
+
+    Повторяются только безопасные запросы - GET и создание с idempotency_key - при ответах retry_statuses, таймаутах
+    и обрывах соединения. Запрос, для которого не удалось установить соединение, повторяется для любого метода.
+    attempts - всего попыток, включая первую, 1 - без повторов
+    """
+
+    attempts: int = 3
+    backoff_base: float = 0.1
+    backoff_max: float = 5
+    retry_statuses: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+
+    def get_delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """Задержка перед повтором после попытки attempt (с 0), не меньше Retry-After ответа, не больше backoff_max"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+        if retry_after is not None and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+
+        return min(delay, self.backoff_max)
+
+
+class CircuitBreaker:
+    """
+    Предохранитель: после failure_threshold неудачных попыток подряд (ответы RetryPolicy.retry_statuses, таймауты
+    и ошибки соединения) запросы reset_timeout секунд завершаются CircuitOpenError без обращения к сервису. Затем
+    пропускается один пробный запрос: успех закрывает предохранитель, неудача снова открывает
+
+    Метрики: opened - сколько раз предохранитель открывался, rejected - сколько запросов отклонено без отправки.
+    Безопасен для использования из нескольких потоков
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return self.OPEN
+
+        return self.HALF_OPEN
+
+    def before_request(self) -> None:
+        with self._lock:
+            state = self.state
+
+            if state == self.OPEN or (state == self.HALF_OPEN and self._probing):
+                self.rejected += 1
+                raise CircuitOpenError("Circuit breaker is open, billing service is unavailable")
+
+            if state == self.HALF_OPEN:
+                self._probing = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+            # Неудачи запросов, отправленных до открытия, не продлевают открытое состояние
+            if self.state == self.HALF_OPEN or (self._opened_at is None and self.failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self.opened += 1
+
+            self._probing = False
+
+    def record_cancel(self) -> None:
+        """Запрос отменен до получения результата, следующий запрос может стать пробным"""
+        with self._lock:
+            self._probing = False
+
+
+@dataclass(slots=True)
+class ClientStats:
+    """
+    Счетчики клиента
+
+    requests - отправленные GET запросы, coalesced - GET запросы, получившие ответ уже отправленного такого же
+    запроса, batches - отправленные пакетные запросы создания корректировок, batched - вызовы adjustments_create,
+    отправленные в них, unbatched - вызовы из пакетов, повторно отправленные отдельно после ошибки, retries -
+    повторные попытки запросов. Синхронный клиент не объединяет запросы и считает только requests и retries
+    """
+
+    requests: int = 0
+    coalesced: int = 0
+    batches: int = 0
+    batched: int = 0
+    unbatched: int = 0
+    retries: int = 0
+
+
+class _BaseGamingBillingAPI:
+    """
+    Общая часть асинхронного и синхронного клиентов: подпись запросов, обработка ответов и повторов и методы API
+
+    Методы API собирают адрес и тело запроса и передают их в _call, который реализует каждый клиент: асинхронный
+    возвращает корутину, синхронный - результат запроса
+    """
 
-class GamingBillingAPI:
     def __init__(
         self,
         endpoint: str,
@@ -17,6 +206,8 @@ class GamingBillingAPI:
         service_header: str = "X-SERVICE",
         signature_header: str = "X-SIGNATURE",
         timestamp_header: str = "X-SIGNATURE-TIMESTAMP",
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
     ) -> None:
         self.endpoint = URL(endpoint) / "api" / "currencies"
         self.service_name = service_name
@@ -24,16 +215,26 @@ class GamingBillingAPI:
         self.signature_header = signature_header
         self.timestamp_header = timestamp_header
         self.secret_key = secret_key.encode("utf-8")
-        self.session: aiohttp.ClientSession | None = None
 
-    def _compute_signature(self, data: str) -> str:
-        return hmac.digest(key=self.secret_key, msg=data.encode("utf-8"), digest=hashlib.sha256).hex()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.stats = ClientStats()
+        self._stats_lock = threading.Lock()
+
+    def _call(self, method: str, url: URL, data: bytes | None = None, idempotent: bool | None = None) -> Any:
+        """
+        :param idempotent: запрос можно повторить после таймаута или ответа 5xx, по умолчанию - только GET
+        """
+        raise NotImplementedError
+
+    def _compute_signature(self, data: bytes) -> str:
+        return hmac.digest(key=self.secret_key, msg=data, digest=hashlib.sha256).hex()
 
-    async def _get_headers(self, path: str, data: str | None = None) -> dict[str, str]:
+    def _get_headers(self, path: str, data: bytes | None = None) -> dict[str, str]:
         timestamp = datetime.now(timezone.utc).isoformat()
 
-        signature_data = f"{timestamp}.{path}.{data or ''}"
-        signature = self._compute_signature(signature_data)
+        # Подписываются те же байты тела, что будут отправлены
+        signature = self._compute_signature(f"{timestamp}.{path}.".encode("utf-8") + (data or b""))
 
         return {
             self.service_header: self.service_name,
@@ -42,48 +243,51 @@ class GamingBillingAPI:
             "Content-Type": "application/json",
         }
 
-    async def _request(
-        self,
-        session: aiohttp.ClientSession,
-        method: str,
-        url: URL,
-        headers: dict[str, str],
-        data: str | None = None,
-    ) -> dict:
+    def _parse_response(self, status: int, body: bytes) -> Any:
+        """Разбирает ответ, для статусов retry_policy.retry_statuses поднимает GamingBillingError"""
+        if status in self.retry_policy.retry_statuses:
+            raise GamingBillingError(f"Billing service responded with status {status}", status)
+
+        self.circuit_breaker.record_success()
+        return _loads(body)
 
-        async with session.request(method, url, headers=headers, data=data) as response:
-            return await response.json()
+    def _get_retry_delay(self, error: Exception, *, retriable: bool, attempt: int, retry_after: str | None) -> float:
+        """Учитывает неудачную попытку attempt, возвращает задержку перед повтором или поднимает error"""
+        self.circuit_breaker.record_failure()
 
-    async def holders_list(
+        if not retriable or attempt + 1 >= self.retry_policy.attempts:
+            raise error
+
+        with self._stats_lock:
+            self.stats.retries += 1
+
+        return self.retry_policy.get_delay(attempt, retry_after)
+
+    def holders_list(
         self,
-        session: aiohttp.ClientSession,
         filters: dict | None = None,
-    ) -> dict:
+    ) -> Any:
 
         filters = filters or {}
         url = (self.endpoint / "holders/").with_query(filters)
-        headers = await self._get_headers(url.raw_path_qs)
 
-        return await self._request(session, "GET", url, headers)
+        return self._call("GET", url)
 
-    async def holders_detail(
+    def holders_detail(
         self,
-        session: aiohttp.ClientSession,
         holder_id: str,
-    ) -> dict:
+    ) -> Any:
 
         url = (self.endpoint / "holders" / "detail/").with_query({"holder_id": holder_id})
-        headers = await self._get_headers(url.raw_path_qs)
 
-        return await self._request(session, "GET", url, headers)
+        return self._call("GET", url)
 
-    async def holders_create(
+    def holders_create(
         self,
-        session: aiohttp.ClientSession,
         holder_id: str,
         holder_type: str | None = None,
         info: dict | None = None,
-    ) -> dict:
+    ) -> Any:
 
         info = info or {}
         url = self.endpoint / "holders" / "create/"
@@ -95,18 +299,16 @@ class GamingBillingAPI:
         if info is not None:
             payload["info"] = info
 
-        json_payload = json.dumps(payload)
+        json_payload = _dumps(payload)
 
-        headers = await self._get_headers(url.raw_path_qs, json_payload)
-        return await self._request(session, "POST", url, headers, json_payload)
+        return self._call("POST", url, json_payload)
 
-    async def holders_update(
+    def holders_update(
         self,
-        session: aiohttp.ClientSession,
         holder_id: str,
         enabled: bool | None = None,
         info: dict | None = None,
-    ) -> dict:
+    ) -> Any:
 
         if enabled is None and info is None:
             raise ValueError("At least one parameter must be provided")
@@ -119,253 +321,650 @@ class GamingBillingAPI:
         if info is not None:
             payload_data["info"] = info
 
-        payload = json.dumps(payload_data)
-        headers = await self._get_headers(url.raw_path_qs, payload)
-        return await self._request(session, "POST", url, headers, payload)
+        payload = _dumps(payload_data)
 
-    async def accounts_list(
+        return self._call("POST", url, payload)
+
+    def accounts_list(
         self,
-        session: aiohttp.ClientSession,
         filters: dict | None = None,
-    ) -> dict:
+    ) -> Any:
 
         filters = filters or {}
         url = (self.endpoint / "accounts/").with_query(filters)
-        headers = await self._get_headers(url.raw_path_qs)
 
-        return await self._request(session, "GET", url, headers)
+        return self._call("GET", url)
 
-    async def accounts_detail(
+    def accounts_detail(
         self,
-        session: aiohttp.ClientSession,
         holder_id: str,
         unit_symbol: str,
         holder_type: str | None = None,
-    ) -> dict:
+    ) -> Any:
 
         url = (self.endpoint / "accounts" / "detail/").with_query({"holder_id": holder_id, "unit_symbol": unit_symbol})
 
         if holder_type is not None:
             url = url.update_query({"holder_type": holder_type})
 
-        headers = await self._get_headers(url.raw_path_qs)
+        return self._call("GET", url)
+
+    def accounts_balance_at(
+        self,
+        holder_id: str,
+        unit_symbol: str,
+        at: datetime,
+        holder_type: str | None = None,
+    ) -> Any:
+
+        url = (self.endpoint / "accounts" / "balance_at/").with_query(
+            {"holder_id": holder_id, "unit_symbol": unit_symbol, "at": at.isoformat()}
+        )
 
-        return await self._request(session, "GET", url, headers)
+        if holder_type is not None:
+            url = url.update_query({"holder_type": holder_type})
 
-    async def accounts_create(
+        return self._call("GET", url)
+
+    def accounts_statement(
+        self,
+        holder_id: str,
+        unit_symbol: str,
+        filters: dict | None = None,
+    ) -> Any:
+
+        filters = filters or {}
+        url = (self.endpoint / "accounts" / "statement/").with_query(
+            {"holder_id": holder_id, "unit_symbol": unit_symbol, **filters}
+        )
+
+        return self._call("GET", url)
+
+    def accounts_create(
         self,
-        session: aiohttp.ClientSession,
         holder_id: str,
         unit_symbol: str,
         holder_type: str,
-    ) -> dict:
+    ) -> Any:
 
         url = self.endpoint / "accounts" / "create/"
-        payload = json.dumps({"holder_id": holder_id, "unit_symbol": unit_symbol, "holder_type": holder_type})
-        headers = await self._get_headers(url.raw_path_qs, payload)
+        payload = _dumps({"holder_id": holder_id, "unit_symbol": unit_symbol, "holder_type": holder_type})
 
-        return await self._request(session, "POST", url, headers, payload)
+        return self._call("POST", url, payload)
 
-    async def units_list(
+    def units_list(
         self,
-        session: aiohttp.ClientSession,
         filters: dict | None = None,
-    ) -> dict:
+    ) -> Any:
 
         filters = filters or {}
         url = (self.endpoint / "units/").with_query(filters)
-        headers = await self._get_headers(url.raw_path_qs)
 
-        return await self._request(session, "GET", url, headers)
+        return self._call("GET", url)
 
-    async def adjustments_list(
+    def adjustments_list(
         self,
-        session: aiohttp.ClientSession,
         filters: dict | None = None,
-    ) -> dict:
+    ) -> Any:
 
         filters = filters or {}
         url = (self.endpoint / "adjustments/").with_query(filters)
-        headers = await self._get_headers(url.raw_path_qs)
 
-        return await self._request(session, "GET", url, headers)
+        return self._call("GET", url)
 
-    async def adjustments_create(
+    def adjustments_create(
         self,
-        session: aiohttp.ClientSession,
         holder_id: str,
         unit_symbol: str,
-        amount: float,
+        amount: Decimal | float,
         description: str,
         auto_reject_timeout: int,
-    ) -> dict:
+        idempotency_key: str | None = None,
+        instant: bool = False,
+        uuid: str | None = None,
+    ) -> Any:
 
         url = self.endpoint / "adjustments" / "create/"
-        payload = json.dumps(
+        payload = _dumps(
             {
                 "holder_id": holder_id,
                 "unit_symbol": unit_symbol,
-                "amount": amount,
+                "amount": _amount(amount),
                 "description": description,
                 "auto_reject_timeout": auto_reject_timeout,
+                **({"idempotency_key": idempotency_key} if idempotency_key is not None else {}),
+                **({"instant": True} if instant else {}),
+                **({"uuid": uuid} if uuid is not None else {}),
             }
         )
-        headers = await self._get_headers(url.raw_path_qs, payload)
 
-        return await self._request(session, "POST", url, headers, payload)
+        return self._call("POST", url, payload, idempotent=idempotency_key is not None)
 
-    async def adjustments_confirm(
+    def adjustments_confirm(
         self,
-        session: aiohttp.ClientSession,
         uuid: str,
         status_description: str,
-    ) -> dict:
+    ) -> Any:
 
         url = self.endpoint / "adjustments" / "confirm/"
-        payload = json.dumps({"uuid": uuid, "status_description": status_description})
-        headers = await self._get_headers(url.raw_path_qs, payload)
+        payload = _dumps({"uuid": uuid, "status_description": status_description})
 
-        return await self._request(session, "POST", url, headers, payload)
+        return self._call("POST", url, payload)
 
-    async def adjustments_reject(
+    def adjustments_reject(
         self,
-        session: aiohttp.ClientSession,
         uuid: str,
         status_description: str,
-    ) -> dict:
+    ) -> Any:
 
         url = self.endpoint / "adjustments" / "reject/"
-        payload = json.dumps({"uuid": uuid, "status_description": status_description})
-        headers = await self._get_headers(url.raw_path_qs, payload)
+        payload = _dumps({"uuid": uuid, "status_description": status_description})
 
-        return await self._request(session, "POST", url, headers, payload)
+        return self._call("POST", url, payload)
 
-    async def transfers_list(
+    def transfers_list(
         self,
-        session: aiohttp.ClientSession,
         filters: dict | None = None,
-    ) -> dict:
+    ) -> Any:
 
         filters = filters or {}
         url = (self.endpoint / "transfers/").with_query(filters)
-        headers = await self._get_headers(url.raw_path_qs)
 
-        return await self._request(session, "GET", url, headers)
+        return self._call("GET", url)
 
-    async def transfers_create(
+    def transfers_create(
         self,
-        session: aiohttp.ClientSession,
         from_holder_id: str,
         to_holder_id: str,
         transfer_rule: str,
-        amount: float,
+        amount: Decimal | float,
         description: str,
         auto_reject_timeout: int,
-    ) -> dict:
+        idempotency_key: str | None = None,
+        instant: bool = False,
+        uuid: str | None = None,
+    ) -> Any:
 
         url = self.endpoint / "transfers" / "create/"
-        payload = json.dumps(
+        payload = _dumps(
             {
                 "from_holder_id": from_holder_id,
                 "to_holder_id": to_holder_id,
                 "transfer_rule": transfer_rule,
-                "amount": amount,
+                "amount": _amount(amount),
                 "description": description,
                 "auto_reject_timeout": auto_reject_timeout,
+                **({"idempotency_key": idempotency_key} if idempotency_key is not None else {}),
+                **({"instant": True} if instant else {}),
+                **({"uuid": uuid} if uuid is not None else {}),
             }
         )
-        headers = await self._get_headers(url.raw_path_qs, payload)
 
-        return await self._request(session, "POST", url, headers, payload)
+        return self._call("POST", url, payload, idempotent=idempotency_key is not None)
 
-    async def transfers_confirm(
+    def transfers_confirm(
         self,
-        session: aiohttp.ClientSession,
         uuid: str,
         status_description: str,
-    ) -> dict:
+    ) -> Any:
 
         url = self.endpoint / "transfers" / "confirm/"
-        payload = json.dumps({"uuid": uuid, "status_description": status_description})
-        headers = await self._get_headers(url.raw_path_qs, payload)
+        payload = _dumps({"uuid": uuid, "status_description": status_description})
 
-        return await self._request(session, "POST", url, headers, payload)
+        return self._call("POST", url, payload)
 
-    async def transfers_reject(
+    def transfers_reject(
         self,
-        session: aiohttp.ClientSession,
         uuid: str,
         status_description: str,
-    ) -> dict:
+    ) -> Any:
 
         url = self.endpoint / "transfers" / "reject/"
-        payload = json.dumps({"uuid": uuid, "status_description": status_description})
-        headers = await self._get_headers(url.raw_path_qs, payload)
+        payload = _dumps({"uuid": uuid, "status_description": status_description})
 
-        return await self._request(session, "POST", url, headers, payload)
+        return self._call("POST", url, payload)
 
-    async def exchanges_list(
+    def exchanges_list(
         self,
-        session: aiohttp.ClientSession,
         filters: dict | None = None,
-    ) -> dict:
+    ) -> Any:
 
         filters = filters or {}
         url = (self.endpoint / "exchanges/").with_query(filters)
-        headers = await self._get_headers(url.raw_path_qs)
 
-        return await self._request(session, "GET", url, headers)
+        return self._call("GET", url)
 
-    async def exchanges_create(
+    def exchanges_create(
         self,
-        session: aiohttp.ClientSession,
         holder_id: str,
         exchange_rule: str,
         from_unit: str,
         to_unit: str,
-        from_amount: float,
+        from_amount: Decimal | float,
         description: str,
         auto_reject_timeout: int,
-    ) -> dict:
+        idempotency_key: str | None = None,
+        instant: bool = False,
+        uuid: str | None = None,
+    ) -> Any:
 
         url = self.endpoint / "exchanges" / "create/"
-        payload = json.dumps(
+        payload = _dumps(
             {
                 "holder_id": holder_id,
                 "exchange_rule": exchange_rule,
                 "from_unit": from_unit,
                 "to_unit": to_unit,
-                "from_amount": from_amount,
+                "from_amount": _amount(from_amount),
                 "description": description,
                 "auto_reject_timeout": auto_reject_timeout,
+                **({"idempotency_key": idempotency_key} if idempotency_key is not None else {}),
+                **({"instant": True} if instant else {}),
+                **({"uuid": uuid} if uuid is not None else {}),
             }
         )
-        headers = await self._get_headers(url.raw_path_qs, payload)
 
-        return await self._request(session, "POST", url, headers, payload)
+        return self._call("POST", url, payload, idempotent=idempotency_key is not None)
 
-    async def exchanges_confirm(
+    def exchanges_confirm(
         self,
-        session: aiohttp.ClientSession,
         uuid: str,
         status_description: str,
-    ) -> dict:
+    ) -> Any:
 
         url = self.endpoint / "exchanges" / "confirm/"
-        payload = json.dumps({"uuid": uuid, "status_description": status_description})
-        headers = await self._get_headers(url.raw_path_qs, payload)
+        payload = _dumps({"uuid": uuid, "status_description": status_description})
 
-        return await self._request(session, "POST", url, headers, payload)
+        return self._call("POST", url, payload)
 
-    async def exchanges_reject(
+    def exchanges_reject(
         self,
-        session: aiohttp.ClientSession,
         uuid: str,
         status_description: str,
-    ) -> dict:
+    ) -> Any:
 
         url = self.endpoint / "exchanges" / "reject/"
-        payload = json.dumps({"uuid": uuid, "status_description": status_description})
-        headers = await self._get_headers(url.raw_path_qs, payload)
+        payload = _dumps({"uuid": uuid, "status_description": status_description})
+
+        return self._call("POST", url, payload)
+
+
+class GamingBillingAPI(_BaseGamingBillingAPI):
+    """
+    Асинхронный клиент API gaming billing
+
+    Клиент владеет сессией aiohttp с пулом соединений: соединения к сервису переиспользуются между запросами
+    (keep-alive), а одновременных запросов не больше max_concurrency.
+
+    Одинаковые GET запросы, отправленные пока предыдущий такой же еще выполняется, получают его ответ - один и тот же
+    dict, его не стоит изменять. С batch_window > 0 вызовы adjustments_create без idempotency_key, instant и uuid,
+    сделанные в пределах batch_window секунд, отправляются одним запросом adjustments/batch/create/. Счетчики
+    объединения - в stats.
+
+    Безопасные запросы повторяются по retry_policy, при недоступности сервиса запросы завершаются ошибкой без отправки
+    (circuit_breaker). Ответы 4xx возвращаются как есть, ответы retry_policy.retry_statuses после всех попыток -
+    GamingBillingError. Используется как асинхронный контекстный менеджер или через open/close:
+
+        async with GamingBillingAPI(endpoint, service_name, secret_key) as api:
+            await api.accounts_detail(holder_id, unit_symbol)
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        service_name: str,
+        secret_key: str,
+        service_header: str = "X-SERVICE",
+        signature_header: str = "X-SIGNATURE",
+        timestamp_header: str = "X-SIGNATURE-TIMESTAMP",
+        max_concurrency: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 30,
+        timeout: float = 30,
+        connect_timeout: float = 5,
+        coalesce_reads: bool = True,
+        batch_window: float = 0,
+        batch_max_items: int = 100,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+    ) -> None:
+        """
+        :param max_concurrency: максимум одновременных запросов, остальные ждут своей очереди до отправки,
+            столько же соединений держит пул
+        :param limit_per_host: максимум соединений к одному хосту, 0 - без отдельного ограничения
+        :param keepalive_timeout: сколько секунд неиспользуемое соединение остается в пуле
+        :param timeout: общий таймаут запроса в секундах после получения места в очереди
+        :param connect_timeout: таймаут установки нового соединения в секундах
+        :param coalesce_reads: объединять одинаковые одновременные GET запросы
+        :param batch_window: сколько секунд собирать вызовы adjustments_create в пакет, 0 - без пакетов
+        :param batch_max_items: размер пакета, при котором он отправляется не дожидаясь окончания batch_window,
+            не больше CURRENCY_BATCH_MAX_ITEMS сервиса
+        :param retry_policy: повторы запросов, по умолчанию RetryPolicy()
+        :param circuit_breaker: предохранитель, по умолчанию CircuitBreaker(), можно разделить между клиентами
+            одного сервиса
+        """
+        super().__init__(
+            endpoint,
+            service_name,
+            secret_key,
+            service_header,
+            signature_header,
+            timestamp_header,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+        )
+
+        self.max_concurrency = max_concurrency
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+
+        self.coalesce_reads = coalesce_reads
+        self.batch_window = batch_window
+        self.batch_max_items = batch_max_items
+
+        self.session: aiohttp.ClientSession | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._batch: list[tuple[dict, asyncio.Future]] = []
+        self._batch_timer: asyncio.TimerHandle | None = None
+        self._batch_tasks: set[asyncio.Task] = set()
+
+    async def __aenter__(self) -> "GamingBillingAPI":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        """Создает сессию с пулом соединений, должен вызываться внутри работающего event loop"""
+        if self.session is not None:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, raise_for_status=False)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def close(self) -> None:
+        """Отправляет собранный пакет, дожидается пакетных запросов и закрывает сессию и все соединения пула"""
+        if self.session is None:
+            return
+
+        self._flush_batch()
+        await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+
+        session, self.session, self._semaphore = self.session, None, None
+        await session.close()
+
+    def _call(self, method: str, url: URL, data: bytes | None = None, idempotent: bool | None = None) -> Any:
+        if method == "GET":
+            return self._get(url)
+
+        return self._request(method, url, data, idempotent)
+
+    async def _request(
+        self,
+        method: str,
+        url: URL,
+        data: bytes | None = None,
+        idempotent: bool | None = None,
+    ) -> Any:
+        if self.session is None or self._semaphore is None:
+            raise RuntimeError("Client is not opened, use 'async with GamingBillingAPI(...)' or 'await api.open()'")
+
+        if idempotent is None:
+            idempotent = method == "GET"
+
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_request()
+            retry_after = None
+
+            try:
+                async with self._semaphore:
+                    # Каждая попытка подписывается заново, подпись включает метку времени
+                    headers = self._get_headers(url.raw_path_qs, data)
+
+                    async with self.session.request(method, url, headers=headers, data=data) as response:
+                        retry_after = response.headers.get("Retry-After")
+                        body = await response.read()
+
+                return self._parse_response(response.status, body)
+            except aiohttp.ClientConnectorError as e:
+                # Соединение не установлено, запрос не дошел до сервиса
+                delay = self._get_retry_delay(e, retriable=True, attempt=attempt, retry_after=retry_after)
+            except (aiohttp.ClientError, asyncio.TimeoutError, GamingBillingError) as e:
+                delay = self._get_retry_delay(e, retriable=idempotent, attempt=attempt, retry_after=retry_after)
+            except asyncio.CancelledError:
+                self.circuit_breaker.record_cancel()
+                raise
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _get(self, url: URL) -> dict:
+        if not self.coalesce_reads:
+            self.stats.requests += 1
+            return await self._request("GET", url)
+
+        key = str(url)
+        in_flight = self._in_flight.get(key)
+
+        if in_flight is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(in_flight)
+
+        self.stats.requests += 1
+        task = asyncio.ensure_future(self._request("GET", url))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # Отмена одного из ожидающих не отменяет запрос для остальных
+        return await asyncio.shield(task)
+
+    async def _create_adjustment_batched(self, item: dict) -> dict:
+        if self.session is None:
+            raise RuntimeError("Client is not opened, use 'async with GamingBillingAPI(...)' or 'await api.open()'")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._batch.append((item, future))
+
+        if len(self._batch) >= self.batch_max_items:
+            self._flush_batch()
+        elif self._batch_timer is None:
+            self._batch_timer = loop.call_later(self.batch_window, self._flush_batch)
+
+        return await future
+
+    def _flush_batch(self) -> None:
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+
+        if not self._batch:
+            return
+
+        batch, self._batch = self._batch, []
+
+        task = asyncio.ensure_future(self._send_batch(batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _send_batch(self, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        self.stats.batches += 1
+        self.stats.batched += len(batch)
+
+        url = self.endpoint / "adjustments" / "batch" / "create/"
+        payload = _dumps({"items": [item for item, _ in batch]})
+
+        try:
+            response = await self._request("POST", url, payload)
+        except (CircuitOpenError, aiohttp.ClientConnectorError):
+            # Пакет не дошел до сервиса, вызовы отправляются по отдельности
+            response = None
+        except Exception as e:
+            # Пакет мог быть создан, повтор создал бы корректировки дважды - как и у одиночного вызова, исход неизвестен
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # Ответ без results - ошибка всего пакета (4xx), ни одна корректировка не создана
+        results = response.get("results") if isinstance(response, dict) else None
+        if not isinstance(results, list) or len(results) != len(batch):
+            results = [None] * len(batch)
+
+        await asyncio.gather(
+            *(self._resolve_batched(item, future, result) for (item, future), result in zip(batch, results))
+        )
+
+    async def _resolve_batched(self, item: dict, future: asyncio.Future, result: Any) -> None:
+        """
+        Передает вызову результат в формате adjustments/create/. Неудавшийся элемент пакета не создан, поэтому он
+        отправляется отдельно - вызов получает ответ и ошибку одиночного запроса
+        """
+        if future.done():
+            return
+
+        if isinstance(result, dict) and result.get("success") is True:
+            future.set_result({key: value for key, value in result.items() if key != "success"})
+            return
+
+        self.stats.unbatched += 1
+
+        try:
+            single = await _BaseGamingBillingAPI.adjustments_create(self, **item)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+
+        if not future.done():
+            future.set_result(single)
+
+    def adjustments_create(
+        self,
+        holder_id: str,
+        unit_symbol: str,
+        amount: Decimal | float,
+        description: str,
+        auto_reject_timeout: int,
+        idempotency_key: str | None = None,
+        instant: bool = False,
+        uuid: str | None = None,
+    ) -> Any:
+        """
+        С batch_window > 0 вызов без idempotency_key, instant и uuid отправляется в пакете, результат тот же, что у
+        одиночного запроса. Вызовы, не прошедшие в пакете, отправляются отдельно, после таймаута или ответа 5xx
+        на пакет каждый вызов завершается этой ошибкой
+        """
+        if self.batch_window > 0 and idempotency_key is None and not instant and uuid is None:
+            return self._create_adjustment_batched(
+                {
+                    "holder_id": holder_id,
+                    "unit_symbol": unit_symbol,
+                    "amount": _amount(amount),
+                    "description": description,
+                    "auto_reject_timeout": auto_reject_timeout,
+                }
+            )
+
+        return super().adjustments_create(
+            holder_id, unit_symbol, amount, description, auto_reject_timeout, idempotency_key, instant, uuid
+        )
+
+
+class GamingBillingSyncAPI(_BaseGamingBillingAPI):
+    """
+    Синхронный клиент API gaming billing с теми же методами, что и GamingBillingAPI
+
+    Клиент владеет пулом соединений urllib3 и безопасен для использования из нескольких потоков: один экземпляр на
+    процесс раздается всем потокам пула. Соединения переиспользуются (keep-alive), одновременно используется
+    не больше max_connections, остальные потоки ждут свободного соединения. Повторы и предохранитель работают
+    так же, как в асинхронном клиенте, одинаковые запросы не объединяются и пакеты не собираются
+
+        with GamingBillingSyncAPI(endpoint, service_name, secret_key) as api:
+            api.accounts_detail(holder_id, unit_symbol)
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        service_name: str,
+        secret_key: str,
+        service_header: str = "X-SERVICE",
+        signature_header: str = "X-SIGNATURE",
+        timestamp_header: str = "X-SIGNATURE-TIMESTAMP",
+        max_connections: int = 100,
+        timeout: float = 30,
+        connect_timeout: float = 5,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+    ) -> None:
+        """
+        :param max_connections: размер пула соединений и максимум одновременных запросов
+        :param timeout: таймаут чтения ответа в секундах
+        :param connect_timeout: таймаут установки нового соединения в секундах
+        """
+        super().__init__(
+            endpoint,
+            service_name,
+            secret_key,
+            service_header,
+            signature_header,
+            timestamp_header,
+            retry_policy=retry_policy,
+            circuit_breaker=circuit_breaker,
+        )
+
+        self.pool = urllib3.PoolManager(
+            maxsize=max_connections,
+            block=True,
+            timeout=urllib3.Timeout(connect=connect_timeout, read=timeout),
+            retries=False,
+        )
+
+    def __enter__(self) -> "GamingBillingSyncAPI":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Закрывает все соединения пула"""
+        self.pool.clear()
+
+    def _call(self, method: str, url: URL, data: bytes | None = None, idempotent: bool | None = None) -> Any:
+        if idempotent is None:
+            idempotent = method == "GET"
+
+        if method == "GET":
+            with self._stats_lock:
+                self.stats.requests += 1
+
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_request()
+            retry_after = None
+
+            try:
+                headers = self._get_headers(url.raw_path_qs, data)
+                response = self.pool.request(method, str(url), body=data, headers=headers)
+                retry_after = response.headers.get("Retry-After")
+
+                return self._parse_response(response.status, response.data)
+            except NewConnectionError as e:
+                # Соединение не установлено, запрос не дошел до сервиса
+                delay = self._get_retry_delay(e, retriable=True, attempt=attempt, retry_after=retry_after)
+            except (urllib3.exceptions.HTTPError, GamingBillingError) as e:
+                delay = self._get_retry_delay(e, retriable=idempotent, attempt=attempt, retry_after=retry_after)
 
-        return await self._request(session, "POST", url, headers, payload)
+            time.sleep(delay)
+            attempt += 1
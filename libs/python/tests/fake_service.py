@@ -0,0 +1,96 @@
+import json
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+
+@dataclass
+class ReceivedRequest:
+    method: str
+    path_qs: str
+    headers: dict[str, str]
+    body: bytes
+    peer: Any = None
+
+    @property
+    def json(self) -> Any:
+        return json.loads(self.body) if self.body else None
+
+
+class FakeBillingService:
+    """
+    Сервис биллинга на aiohttp.web для тестов клиента: запоминает полученные запросы и отвечает обработчиком
+    из routes по пути запроса без /api/currencies. Обработчик получает тело запроса и возвращает статус и тело ответа
+    """
+
+    PREFIX = "/api/currencies/"
+
+    def __init__(self) -> None:
+        self.requests: list[ReceivedRequest] = []
+        self.routes: dict[str, Callable[[Any], Awaitable[tuple[int, Any]]]] = {}
+
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self._handle)
+        self.server = TestServer(app)
+
+    async def start(self) -> None:
+        await self.server.start_server()
+
+    async def close(self) -> None:
+        await self.server.close()
+
+    @property
+    def endpoint(self) -> str:
+        return str(self.server.make_url("/"))
+
+    def received(self, route: str) -> list[ReceivedRequest]:
+        return [request for request in self.requests if request.path_qs.startswith(self.PREFIX + route)]
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        received = ReceivedRequest(
+            request.method,
+            request.path_qs,
+            dict(request.headers),
+            await request.read(),
+            request.transport.get_extra_info("peername") if request.transport is not None else None,
+        )
+        self.requests.append(received)
+
+        status, data = await self.routes[request.path.removeprefix(self.PREFIX)](received.json)
+
+        return web.json_response(data, status=status)
+
+
+@dataclass
+class FakeResponse:
+    status: int
+    data: bytes = b"{}"
+    headers: dict[str, str] | None = None
+
+    def __post_init__(self) -> None:
+        self.headers = self.headers or {}
+
+
+class FakePool:
+    """
+    Замена urllib3.PoolManager синхронного клиента: отдает ответы и поднимает исключения из replies по очереди
+    и запоминает отправленные запросы
+    """
+
+    def __init__(self, *replies: FakeResponse | Exception) -> None:
+        self.replies = list(replies)
+        self.requests: list[ReceivedRequest] = []
+
+    def request(self, method: str, url: str, body: bytes | None = None, headers: dict | None = None) -> FakeResponse:
+        self.requests.append(ReceivedRequest(method, url, dict(headers or {}), body or b""))
+
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+
+        return reply
+
+    def clear(self) -> None:
+        pass
@@ -0,0 +1,105 @@
+import asyncio
+import unittest
+
+from gaming_billing import CircuitBreaker, CircuitOpenError, GamingBillingAPI, GamingBillingError
+
+from .fake_service import FakeBillingService
+
+
+def adjustment(item: dict) -> dict:
+    return {"uuid": f"uuid-{item['holder_id']}", "status": "PENDING", "amount": item["amount"]}
+
+
+class BatchingTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.service = FakeBillingService()
+        await self.service.start()
+        self.addAsyncCleanup(self.service.close)
+
+        self.api = GamingBillingAPI(self.service.endpoint, "service", "secret", batch_window=0.01)
+        await self.api.open()
+        self.addAsyncCleanup(self.api.close)
+
+    async def create(self, *holder_ids: str) -> list:
+        return await asyncio.gather(
+            *(self.api.adjustments_create(holder_id, "gold", "10.0000", "", 60) for holder_id in holder_ids),
+            return_exceptions=True,
+        )
+
+    async def single_created(self, item: dict) -> tuple[int, dict]:
+        return 201, adjustment(item)
+
+    async def test_results_have_single_shape(self):
+        async def batch(data: dict) -> tuple[int, dict]:
+            return 200, {"results": [{"success": True, **adjustment(item)} for item in data["items"]]}
+
+        self.service.routes["adjustments/batch/create/"] = batch
+
+        results = await self.create("first", "second")
+
+        self.assertEqual(
+            results, [adjustment({"holder_id": name, "amount": "10.0000"}) for name in ("first", "second")]
+        )
+        self.assertEqual(len(self.service.received("adjustments/batch/create/")), 1)
+        self.assertEqual(self.service.received("adjustments/create/"), [])
+        self.assertEqual((self.api.stats.batches, self.api.stats.batched, self.api.stats.unbatched), (1, 2, 0))
+
+    async def test_failed_item_sent_alone(self):
+        error = {"message": "Validation error", "extra": {"fields": {"non_field_errors": ["Insufficient funds"]}}}
+
+        async def batch(data: dict) -> tuple[int, dict]:
+            first, _ = data["items"]
+            return 200, {"results": [{"success": True, **adjustment(first)}, {"success": False, "errors": ["x"]}]}
+
+        async def single(data: dict) -> tuple[int, dict]:
+            return 400, error
+
+        self.service.routes["adjustments/batch/create/"] = batch
+        self.service.routes["adjustments/create/"] = single
+
+        results = await self.create("first", "second")
+
+        self.assertEqual(results, [adjustment({"holder_id": "first", "amount": "10.0000"}), error])
+        self.assertEqual(
+            [request.json["holder_id"] for request in self.service.received("adjustments/create/")], ["second"]
+        )
+        self.assertEqual(self.api.stats.unbatched, 1)
+
+    async def test_rejected_batch_sent_by_items(self):
+        async def batch(data: dict) -> tuple[int, dict]:
+            return 403, {"message": "Batch is not allowed", "extra": {}}
+
+        self.service.routes["adjustments/batch/create/"] = batch
+        self.service.routes["adjustments/create/"] = self.single_created
+
+        results = await self.create("first", "second")
+
+        self.assertEqual(
+            results, [adjustment({"holder_id": name, "amount": "10.0000"}) for name in ("first", "second")]
+        )
+        self.assertEqual(len(self.service.received("adjustments/create/")), 2)
+        self.assertEqual(self.api.stats.unbatched, 2)
+
+    async def test_server_error_not_resent(self):
+        async def batch(data: dict) -> tuple[int, dict]:
+            return 500, {}
+
+        self.service.routes["adjustments/batch/create/"] = batch
+        self.service.routes["adjustments/create/"] = self.single_created
+
+        results = await self.create("first", "second")
+
+        # Пакет мог быть создан, повтор по отдельности создал бы корректировки дважды
+        self.assertTrue(all(isinstance(result, GamingBillingError) for result in results))
+        self.assertEqual(len(self.service.received("adjustments/batch/create/")), 1)
+        self.assertEqual(self.service.received("adjustments/create/"), [])
+
+    async def test_unsent_batch_sent_by_items(self):
+        self.api.circuit_breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        self.api.circuit_breaker.record_failure()
+
+        results = await self.create("first", "second")
+
+        self.assertTrue(all(isinstance(result, CircuitOpenError) for result in results))
+        self.assertEqual(self.api.stats.unbatched, 2)
+        self.assertEqual(self.service.requests, [])
@@ -0,0 +1,71 @@
+import asyncio
+import unittest
+
+from gaming_billing import GamingBillingAPI
+
+from .fake_service import FakeBillingService
+
+
+class CoalescingTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.service = FakeBillingService()
+        await self.service.start()
+        self.addAsyncCleanup(self.service.close)
+
+        self.release = asyncio.Event()
+
+        async def detail(data) -> tuple[int, dict]:
+            await self.release.wait()
+            return 200, {"holder_id": "holder"}
+
+        self.service.routes["holders/detail/"] = detail
+
+    async def get_concurrently(self, api: GamingBillingAPI, *holder_ids: str, sent: int) -> list:
+        """Отвечает на запросы, когда все holder_ids запрошены и сервис получил sent запросов"""
+        tasks = [asyncio.create_task(api.holders_detail(holder_id)) for holder_id in holder_ids]
+
+        while len(self.service.requests) < sent:
+            await asyncio.sleep(0.001)
+
+        self.release.set()
+        return await asyncio.gather(*tasks)
+
+    async def test_identical_reads_sent_once(self):
+        async with GamingBillingAPI(self.service.endpoint, "service", "secret") as api:
+            results = await self.get_concurrently(api, *["holder"] * 10, sent=1)
+
+        self.assertEqual(results, [{"holder_id": "holder"}] * 10)
+        self.assertEqual(len(self.service.requests), 1)
+        self.assertEqual((api.stats.requests, api.stats.coalesced), (1, 9))
+
+    async def test_different_reads_not_coalesced(self):
+        async with GamingBillingAPI(self.service.endpoint, "service", "secret") as api:
+            await self.get_concurrently(api, "first", "second", "first", sent=2)
+
+        self.assertEqual(
+            sorted(request.path_qs for request in self.service.requests),
+            ["/api/currencies/holders/detail/?holder_id=first", "/api/currencies/holders/detail/?holder_id=second"],
+        )
+
+    async def test_coalescing_disabled(self):
+        async with GamingBillingAPI(self.service.endpoint, "service", "secret", coalesce_reads=False) as api:
+            await self.get_concurrently(api, *["holder"] * 3, sent=3)
+
+        self.assertEqual(len(self.service.requests), 3)
+        self.assertEqual(api.stats.coalesced, 0)
+
+    async def test_canceled_waiter_does_not_cancel_request(self):
+        async with GamingBillingAPI(self.service.endpoint, "service", "secret") as api:
+            first = asyncio.create_task(api.holders_detail("holder"))
+            second = asyncio.create_task(api.holders_detail("holder"))
+
+            while not self.service.requests:
+                await asyncio.sleep(0.001)
+
+            first.cancel()
+            self.release.set()
+
+            self.assertEqual(await second, {"holder_id": "holder"})
+
+        self.assertTrue(first.cancelled())
+        self.assertEqual(len(self.service.requests), 1)
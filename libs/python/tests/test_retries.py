@@ -0,0 +1,280 @@
+import unittest
+from unittest import mock
+
+from gaming_billing import (
+    CircuitBreaker,
+    CircuitOpenError,
+    GamingBillingAPI,
+    GamingBillingError,
+    GamingBillingSyncAPI,
+    RetryPolicy,
+)
+from urllib3.exceptions import NewConnectionError, ReadTimeoutError
+
+from .fake_service import FakeBillingService, FakePool, FakeResponse
+
+
+def upper_bound(low: float, high: float) -> float:
+    return high
+
+
+class RetryPolicyTests(unittest.TestCase):
+    def test_backoff_grows_up_to_max(self):
+        policy = RetryPolicy(backoff_base=0.1, backoff_max=1)
+
+        with mock.patch("gaming_billing.random.uniform", side_effect=upper_bound):
+            delays = [policy.get_delay(attempt) for attempt in range(6)]
+
+        self.assertEqual(delays, [0.1, 0.2, 0.4, 0.8, 1, 1])
+
+    def test_backoff_is_jittered_from_zero(self):
+        policy = RetryPolicy(backoff_base=0.1, backoff_max=1)
+
+        with mock.patch("gaming_billing.random.uniform", return_value=0) as uniform:
+            self.assertEqual(policy.get_delay(2), 0)
+
+        uniform.assert_called_once_with(0, 0.4)
+
+    def test_retry_after(self):
+        policy = RetryPolicy(backoff_base=0.1, backoff_max=5)
+
+        with mock.patch("gaming_billing.random.uniform", side_effect=upper_bound):
+            self.assertEqual(policy.get_delay(0, "2"), 2)
+            self.assertEqual(policy.get_delay(0, "60"), 5)
+            self.assertEqual(policy.get_delay(0, "0"), 0.1)
+            self.assertEqual(policy.get_delay(0, "Wed, 21 Oct 2015 07:28:00 GMT"), 0.1)
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+
+        patcher = mock.patch("gaming_billing.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10)
+
+    def open_breaker(self):
+        for _ in range(3):
+            self.breaker.before_request()
+            self.breaker.record_failure()
+
+    def test_opens_after_threshold(self):
+        for _ in range(2):
+            self.breaker.before_request()
+            self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        self.breaker.before_request()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.opened, 1)
+
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()
+
+        self.assertEqual(self.breaker.rejected, 1)
+
+    def test_success_resets_failures(self):
+        for _ in range(2):
+            self.breaker.record_failure()
+
+        self.breaker.record_success()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_lets_one_probe(self):
+        self.open_breaker()
+        self.now += 10
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+
+        self.breaker.before_request()
+
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()
+
+        self.assertEqual(self.breaker.rejected, 1)
+
+    def test_failed_probe_reopens(self):
+        self.open_breaker()
+        self.now += 10
+
+        self.breaker.before_request()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(self.breaker.opened, 2)
+
+        self.now += 9
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()
+
+    def test_successful_probe_closes(self):
+        self.open_breaker()
+        self.now += 10
+
+        self.breaker.before_request()
+        self.breaker.record_success()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        for _ in range(2):
+            self.breaker.before_request()
+            self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_canceled_probe_frees_half_open(self):
+        self.open_breaker()
+        self.now += 10
+
+        self.breaker.before_request()
+        self.breaker.record_cancel()
+        self.breaker.before_request()
+
+        self.assertEqual(self.breaker.rejected, 0)
+
+    def test_late_failures_do_not_extend_open(self):
+        self.open_breaker()
+        self.now += 5
+
+        # Ответ на запрос, отправленный до открытия
+        self.breaker.record_failure()
+        self.now += 5
+
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertEqual(self.breaker.opened, 1)
+
+
+class SyncRetryTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("gaming_billing.time.sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.api = GamingBillingSyncAPI(
+            "http://billing.test",
+            "service",
+            "secret",
+            retry_policy=RetryPolicy(attempts=3, backoff_base=0.1, backoff_max=5),
+            circuit_breaker=CircuitBreaker(failure_threshold=10),
+        )
+
+    def use_pool(self, *replies: FakeResponse | Exception) -> FakePool:
+        self.api.pool = FakePool(*replies)
+        return self.api.pool
+
+    def create_adjustment(self, idempotency_key: str | None = None):
+        return self.api.adjustments_create("holder", "gold", 10, "", 60, idempotency_key=idempotency_key)
+
+    def test_get_retried(self):
+        pool = self.use_pool(FakeResponse(503), FakeResponse(502), FakeResponse(200, b'{"holder_id": "holder"}'))
+
+        self.assertEqual(self.api.holders_detail("holder"), {"holder_id": "holder"})
+        self.assertEqual(len(pool.requests), 3)
+        self.assertEqual(self.sleep.call_count, 2)
+        self.assertEqual(self.api.stats.retries, 2)
+
+    def test_get_gives_up_after_attempts(self):
+        pool = self.use_pool(*(FakeResponse(503) for _ in range(3)))
+
+        with self.assertRaises(GamingBillingError) as error:
+            self.api.holders_detail("holder")
+
+        self.assertEqual(error.exception.status, 503)
+        self.assertEqual(len(pool.requests), 3)
+
+    def test_retry_after_respected(self):
+        self.use_pool(FakeResponse(429, headers={"Retry-After": "3"}), FakeResponse(200))
+
+        self.api.holders_detail("holder")
+
+        self.sleep.assert_called_once_with(3)
+
+    def test_post_without_idempotency_key_not_retried(self):
+        for reply in (FakeResponse(503), ReadTimeoutError(None, "/", "timed out")):
+            with self.subTest(reply=reply):
+                pool = self.use_pool(reply, FakeResponse(201))
+
+                with self.assertRaises((GamingBillingError, ReadTimeoutError)):
+                    self.create_adjustment()
+
+                self.assertEqual(len(pool.requests), 1)
+
+        self.sleep.assert_not_called()
+
+    def test_post_with_idempotency_key_retried(self):
+        pool = self.use_pool(ReadTimeoutError(None, "/", "timed out"), FakeResponse(201, b'{"uuid": "uuid"}'))
+
+        self.assertEqual(self.create_adjustment("key"), {"uuid": "uuid"})
+        self.assertEqual([request.json["idempotency_key"] for request in pool.requests], ["key", "key"])
+
+    def test_each_attempt_signed_again(self):
+        pool = self.use_pool(FakeResponse(503), FakeResponse(200))
+
+        with mock.patch("gaming_billing.datetime") as datetime:
+            datetime.now.return_value.isoformat.side_effect = ["2026-01-01T00:00:00+00:00", "2026-01-01T00:00:01+00:00"]
+            self.api.holders_detail("holder")
+
+        first, second = pool.requests
+        self.assertNotEqual(first.headers["X-SIGNATURE"], second.headers["X-SIGNATURE"])
+
+    def test_unsent_post_retried(self):
+        pool = self.use_pool(NewConnectionError(None, "refused"), FakeResponse(201, b'{"uuid": "uuid"}'))
+
+        self.assertEqual(self.create_adjustment(), {"uuid": "uuid"})
+        self.assertEqual(len(pool.requests), 2)
+
+    def test_open_circuit_not_sent(self):
+        self.api.circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        pool = self.use_pool(FakeResponse(503), FakeResponse(503))
+
+        # Повтор после второй неудачи уже не отправляется
+        with self.assertRaises(CircuitOpenError):
+            self.api.holders_detail("holder")
+
+        with self.assertRaises(CircuitOpenError):
+            self.api.holders_detail("holder")
+
+        self.assertEqual(len(pool.requests), 2)
+        self.assertEqual(self.api.circuit_breaker.rejected, 2)
+
+
+class AsyncRetryTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = FakeBillingService()
+        await self.service.start()
+        self.addAsyncCleanup(self.service.close)
+
+        self.api = GamingBillingAPI(
+            self.service.endpoint, "service", "secret", retry_policy=RetryPolicy(attempts=3, backoff_base=0)
+        )
+        await self.api.open()
+        self.addAsyncCleanup(self.api.close)
+
+        self.statuses = [503, 200]
+
+        async def reply(data):
+            return self.statuses.pop(0), {}
+
+        self.service.routes["holders/detail/"] = reply
+        self.service.routes["adjustments/create/"] = reply
+
+    async def test_get_retried(self):
+        self.assertEqual(await self.api.holders_detail("holder"), {})
+        self.assertEqual(len(self.service.requests), 2)
+
+    async def test_post_without_idempotency_key_not_retried(self):
+        with self.assertRaises(GamingBillingError):
+            await self.api.adjustments_create("holder", "gold", 10, "", 60)
+
+        self.assertEqual(len(self.service.requests), 1)
+
+    async def test_post_with_idempotency_key_retried(self):
+        self.assertEqual(await self.api.adjustments_create("holder", "gold", 10, "", 60, idempotency_key="key"), {})
+        self.assertEqual(len(self.service.requests), 2)
@@ -0,0 +1,118 @@
+import json
+import unittest
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest import mock
+from uuid import UUID
+
+import gaming_billing
+from gaming_billing import GamingBillingSyncAPI, _dumps, _loads
+
+from .fake_service import FakePool, FakeResponse
+
+PAYLOAD = {
+    "holder_id": "игрок-1",
+    "amount": Decimal("100.0001"),
+    "rate": 0.1,
+    "limits": [0.5, -0.0, 10.0],
+    "timeout": 60,
+    "instant": True,
+    "uuid": UUID("8b4f4a5e-3c0e-4a36-9d5c-1a4f1f1f1f1f"),
+    "created_at": datetime(2026, 10, 17, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    "confirmed_at": datetime(2026, 10, 17, 12, 30, 15),
+    "day": date(2026, 10, 17),
+    "info": {"nested": [None, False, 'значение "в кавычках"']},
+}
+
+
+@unittest.skipIf(gaming_billing.orjson is None, "orjson is not installed")
+class BackendsTests(unittest.TestCase):
+    def test_same_bytes(self):
+        with mock.patch("gaming_billing.orjson", None):
+            expected = _dumps(PAYLOAD)
+
+        self.assertEqual(_dumps(PAYLOAD), expected)
+
+    def test_same_parsed(self):
+        body = _dumps(PAYLOAD)
+
+        with mock.patch("gaming_billing.orjson", None):
+            expected = _loads(body)
+
+        self.assertEqual(_loads(body), expected)
+
+
+class DumpsTests(unittest.TestCase):
+    def test_exact_values(self):
+        data = json.loads(_dumps(PAYLOAD))
+
+        self.assertEqual(data["amount"], "100.0001")
+        self.assertEqual(data["limits"], [0.5, -0.0, 10.0])
+        self.assertEqual(data["created_at"], "2026-10-17T12:30:15.123456+00:00")
+        self.assertEqual(data["uuid"], "8b4f4a5e-3c0e-4a36-9d5c-1a4f1f1f1f1f")
+        self.assertEqual(data["holder_id"], "игрок-1")
+
+    def test_unknown_type(self):
+        with self.assertRaises(TypeError):
+            _dumps({"value": object()})
+
+
+class AmountsTests(unittest.TestCase):
+    def setUp(self):
+        self.api = GamingBillingSyncAPI("http://billing.test", "service", "secret")
+        self.api.pool = FakePool(*(FakeResponse(201) for _ in range(4)))
+
+    def sent(self) -> dict:
+        return json.loads(self.api.pool.requests[-1].body)
+
+    def test_float_amounts_sent_as_strings(self):
+        self.api.adjustments_create("holder", "gold", 1e-05, "", 60)
+        self.assertEqual(self.sent()["amount"], "0.00001")
+
+        self.api.transfers_create("from", "to", "rule", 0.1, "", 60)
+        self.assertEqual(self.sent()["amount"], "0.1")
+
+        self.api.exchanges_create("rule", "holder", "gold", "silver", 2.5, "", 60)
+        self.assertEqual(self.sent()["from_amount"], "2.5")
+
+    @unittest.skipIf(gaming_billing.orjson is None, "orjson is not installed")
+    def test_float_amount_same_bytes(self):
+        self.api.adjustments_create("holder", "gold", 1e-05, "", 60)
+
+        with mock.patch("gaming_billing.orjson", None):
+            self.api.adjustments_create("holder", "gold", 1e-05, "", 60)
+
+        first, second = self.api.pool.requests
+        self.assertEqual(first.body, second.body)
+
+    def test_info_floats_kept(self):
+        self.api.holders_create("holder", "player", info={"level": 1.5, "rating": 1e20})
+
+        self.assertEqual(self.sent()["info"], {"level": 1.5, "rating": 1e20})
+
+
+class SignedBodyTests(unittest.TestCase):
+    def test_signed_bytes_sent(self):
+        api = GamingBillingSyncAPI("http://billing.test", "service", "secret")
+        api.pool = FakePool(FakeResponse(201))
+
+        with mock.patch.object(api, "_compute_signature", wraps=api._compute_signature) as compute_signature:
+            api.adjustments_create("игрок-1", "gold", Decimal("100.0001"), "описание", 60)
+
+        (request,) = api.pool.requests
+        (signed,), _ = compute_signature.call_args
+        timestamp = request.headers["X-SIGNATURE-TIMESTAMP"]
+
+        self.assertEqual(
+            request.body,
+            _dumps(
+                {
+                    "holder_id": "игрок-1",
+                    "unit_symbol": "gold",
+                    "amount": Decimal("100.0001"),
+                    "description": "описание",
+                    "auto_reject_timeout": 60,
+                }
+            ),
+        )
+        self.assertEqual(signed, f"{timestamp}./api/currencies/adjustments/create/.".encode() + request.body)
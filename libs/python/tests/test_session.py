@@ -0,0 +1,53 @@
+import asyncio
+import unittest
+
+from gaming_billing import GamingBillingAPI
+
+from .fake_service import FakeBillingService
+
+
+class SessionTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.service = FakeBillingService()
+        await self.service.start()
+        self.addAsyncCleanup(self.service.close)
+
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        async def detail(data) -> tuple[int, dict]:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            return 200, {}
+
+        self.service.routes["holders/detail/"] = detail
+
+    async def test_not_opened(self):
+        api = GamingBillingAPI(self.service.endpoint, "service", "secret")
+
+        with self.assertRaises(RuntimeError):
+            await api.holders_detail("holder")
+
+    async def test_context_manager_owns_session(self):
+        async with GamingBillingAPI(self.service.endpoint, "service", "secret") as api:
+            session = api.session
+            self.assertEqual(await api.holders_detail("holder"), {})
+
+        self.assertIsNone(api.session)
+        self.assertTrue(session.closed)
+
+    async def test_concurrency_limited(self):
+        async with GamingBillingAPI(self.service.endpoint, "service", "secret", max_concurrency=3) as api:
+            await asyncio.gather(*(api.holders_detail(f"holder-{number}") for number in range(10)))
+
+        self.assertEqual(len(self.service.requests), 10)
+        self.assertEqual(self.max_in_flight, 3)
+
+    async def test_connections_reused(self):
+        async with GamingBillingAPI(self.service.endpoint, "service", "secret") as api:
+            for number in range(5):
+                await api.holders_detail(f"holder-{number}")
+
+        self.assertEqual(len({request.peer for request in self.service.requests}), 1)
@@ -0,0 +1,24 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db.migrations.operations import AddIndex
+
+
+class AddIndexConcurrentlyIfPostgres(AddIndexConcurrently):
+    """
+    CREATE INDEX CONCURRENTLY на Postgres - индекс строится без блокировки записи в таблицу, на остальных базах
+    (sqlite локального запуска) обычный AddIndex
+
+    Миграция с этой операцией должна быть atomic = False. Если построение прервано, Postgres оставляет индекс
+    в состоянии INVALID - его нужно удалить и повторить миграцию
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+        return super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != "postgresql":
+            return AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+        return super().database_backwards(app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,99 @@
+from unittest import mock
+
+import psycopg.errors
+from common.utils import get_sqlstate, retry_metrics, retry_on_serialization_error
+from django.db import OperationalError
+from django.test import SimpleTestCase, override_settings
+
+
+def database_error(psycopg_error_class) -> OperationalError:
+    # Так Django оборачивает ошибки драйвера
+    error = OperationalError("database error")
+    error.__cause__ = psycopg_error_class("database error")
+    return error
+
+
+@override_settings(
+    DATABASE_RETRY_MAX_ATTEMPTS=4,
+    DATABASE_RETRY_BASE_DELAY=0.01,
+    DATABASE_RETRY_MAX_DELAY=0.02,
+    DATABASE_RETRY_TIME_BUDGET=10,
+)
+@mock.patch("common.utils.time.sleep")
+class RetryOnSerializationErrorTests(SimpleTestCase):
+    def setUp(self):
+        retry_metrics.reset()
+
+    def failing(self, *errors):
+        func = mock.Mock(side_effect=[*errors, "result"])
+        func.__qualname__ = "failing"
+        return func
+
+    def test_get_sqlstate(self, sleep):
+        self.assertEqual(get_sqlstate(database_error(psycopg.errors.SerializationFailure)), "40001")
+        self.assertEqual(get_sqlstate(database_error(psycopg.errors.DeadlockDetected)), "40P01")
+        self.assertIsNone(get_sqlstate(OperationalError("database is locked")))
+
+    def test_retries_serialization_and_deadlock(self, sleep):
+        func = self.failing(
+            database_error(psycopg.errors.SerializationFailure), database_error(psycopg.errors.DeadlockDetected)
+        )
+
+        self.assertEqual(retry_on_serialization_error()(func)(), "result")
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+
+        metrics = retry_metrics.snapshot()
+        self.assertEqual(metrics["retries"], 2)
+        self.assertEqual(metrics["retries:40001"], 1)
+        self.assertEqual(metrics["retries:40P01"], 1)
+        self.assertEqual(metrics["retries:failing"], 2)
+        self.assertEqual(metrics["recovered"], 1)
+
+    def test_backoff_delays(self, sleep):
+        func = self.failing(*[database_error(psycopg.errors.SerializationFailure)] * 3)
+
+        retry_on_serialization_error()(func)()
+
+        delays = [call.args[0] for call in sleep.call_args_list]
+        self.assertTrue(0 <= delays[0] <= 0.01)
+        self.assertTrue(all(0 <= delay <= 0.02 for delay in delays[1:]))
+
+    def test_max_attempts(self, sleep):
+        func = self.failing(*[database_error(psycopg.errors.SerializationFailure)] * 2)
+
+        with self.assertRaises(OperationalError):
+            retry_on_serialization_error(max_retries=2)(func)()
+
+        self.assertEqual(func.call_count, 2)
+        self.assertEqual(retry_metrics.snapshot()["exhausted"], 1)
+
+    def test_time_budget(self, sleep):
+        func = self.failing(database_error(psycopg.errors.SerializationFailure))
+
+        with self.assertRaises(OperationalError):
+            retry_on_serialization_error(time_budget=0)(func)()
+
+        self.assertEqual(func.call_count, 1)
+        sleep.assert_not_called()
+
+    def test_other_errors_not_retried(self, sleep):
+        func = self.failing(database_error(psycopg.errors.QueryCanceled), OperationalError("database is locked"))
+
+        for _ in range(2):
+            with self.assertRaises(OperationalError):
+                retry_on_serialization_error()(func)()
+
+        self.assertEqual(func.call_count, 2)
+        self.assertNotIn("retries", retry_metrics.snapshot())
+
+    def test_not_retried_inside_atomic(self, sleep):
+        func = self.failing(database_error(psycopg.errors.SerializationFailure))
+
+        with mock.patch("common.utils.connection") as connection:
+            connection.in_atomic_block = True
+
+            with self.assertRaises(OperationalError):
+                retry_on_serialization_error()(func)()
+
+        self.assertEqual(func.call_count, 1)
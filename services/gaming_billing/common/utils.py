@@ -1,40 +1,120 @@
 import logging
+import random
+import threading
+import time
+from collections import Counter
 from decimal import Decimal
 from functools import wraps
 
 from currencies.models import CurrencyService
 from django.conf import settings
-from django.db import OperationalError
+from django.db import OperationalError, connection
 
 logger = logging.getLogger(__name__)
 
+# serialization_failure и deadlock_detected, транзакция откатывается базой целиком и может быть повторена
+SERIALIZATION_SQLSTATES = frozenset({"40001", "40P01"})
 
-def retry_on_serialization_error(max_retries=3):
+
+class RetryMetrics:
+    """
+    Счетчики повторов транзакций в процессе
+
+    retries - повторы, recovered - вызовы, выполненные после повторов, exhausted - вызовы, у которых кончились
+    попытки или время, delay_seconds - суммарная пауза перед повторами, retries:<SQLSTATE> и retries:<функция> -
+    повторы по коду ошибки и по функции
     """
-    Декоратор для повторения вызова функции в случае ошибок сериализации.
 
-    :param max_retries: Максимальное количество попыток.
+    def __init__(self) -> None:
+        self._counters: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+retry_metrics = RetryMetrics()
+
+
+def get_sqlstate(error: BaseException) -> str | None:
+    """SQLSTATE ошибки psycopg, Django оборачивает её в свою ошибку и сохраняет исходную в __cause__"""
+    for exc in (error, error.__cause__):
+        sqlstate = getattr(getattr(exc, "diag", None), "sqlstate", None) or getattr(exc, "sqlstate", None)
+
+        if sqlstate:
+            return sqlstate
+
+    return None
+
+
+def retry_on_serialization_error(max_retries: int | None = None, *, time_budget: float | None = None):
+    """
+    Декоратор для повторения вызова функции после ошибки сериализации или взаимной блокировки (SQLSTATE 40001, 40P01)
+
+    Перед повтором ждёт случайную паузу от 0 до DATABASE_RETRY_BASE_DELAY * 2^(номер повтора - 1), чтобы
+    конкурирующие вызовы не столкнулись снова. Внутри внешней transaction.atomic ошибка пробрасывается сразу -
+    транзакция БД уже прервана, повторить её может только вызов, который её открыл
+
+    :param max_retries: Максимальное количество попыток, по умолчанию settings.DATABASE_RETRY_MAX_ATTEMPTS
+    :param time_budget: Через сколько секунд с первой попытки повторы прекращаются,
+        по умолчанию settings.DATABASE_RETRY_TIME_BUDGET
     """
 
     def decorator(func):
+        name = func.__qualname__
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            retries = 0
-            while retries < max_retries:
+            attempts = max_retries or settings.DATABASE_RETRY_MAX_ATTEMPTS
+            budget = settings.DATABASE_RETRY_TIME_BUDGET if time_budget is None else time_budget
+            started = time.monotonic()
+
+            attempt = 1
+            while True:
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
                 except OperationalError as e:
-                    # Проверяем, является ли ошибка ошибкой сериализации
-                    if "serialization" in str(e).lower() or "could not serialize" in str(e).lower():
-                        retries += 1
-                        logger.warning(f"Ошибка сериализации (попытка {retries} из {max_retries}): {e}")
-                        if retries >= max_retries:
-                            logger.error("Достигнуто максимальное количество попыток сериализации.")
-                            raise
-                    else:
-                        # Если это не ошибка сериализации, пробрасываем исключение дальше
+                    sqlstate = get_sqlstate(e)
+
+                    if sqlstate not in SERIALIZATION_SQLSTATES or connection.in_atomic_block:
                         raise
 
+                    delay = random.uniform(
+                        0,
+                        min(settings.DATABASE_RETRY_MAX_DELAY, settings.DATABASE_RETRY_BASE_DELAY * 2 ** (attempt - 1)),
+                    )
+
+                    if attempt >= attempts or time.monotonic() - started + delay > budget:
+                        retry_metrics.add("exhausted")
+                        logger.error(f"Ошибка {sqlstate} в {name}, повторы закончились после {attempt} попыток: {e}")
+                        raise
+
+                    retry_metrics.add("retries")
+                    retry_metrics.add(f"retries:{sqlstate}")
+                    retry_metrics.add(f"retries:{name}")
+                    retry_metrics.add("delay_seconds", delay)
+
+                    logger.warning(
+                        f"Ошибка {sqlstate} в {name} (попытка {attempt} из {attempts}), повтор через {delay:.3f} с: {e}"
+                    )
+
+                    time.sleep(delay)
+                    attempt += 1
+                else:
+                    if attempt > 1:
+                        retry_metrics.add("recovered")
+
+                    return result
+
         return wrapper
 
     return decorator
@@ -0,0 +1,15 @@
+import pytest
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """
+    Откат транзакции теста не вызывает сигналы моделей, поэтому кэши процесса сбрасываются
+    перед каждым тестом, до setUpTestData
+    """
+    from currencies.services import AccountsService, ReferencesService
+    from currencies_api.auth.cache import service_auth_cache
+
+    ReferencesService.reset()
+    AccountsService.balance_shards.reset()
+    service_auth_cache.reset()
@@ -187,8 +187,8 @@ class ExchangeTransactionAdmin(ReadOnlyAdmin):
 
 @admin.register(CheckingAccount)
 class CheckingAccountAdmin(admin.ModelAdmin):
-    fields = ["id", "holder", "currency_unit", "amount", "created_at", "updated_at"]
-    list_display = ["id", "holder", "currency_unit_measurement", "amount", "created_at", "updated_at"]
+    fields = ["id", "holder", "currency_unit", "amount", "held_amount", "balance_shards", "created_at", "updated_at"]
+    list_display = ["id", "holder", "currency_unit_measurement", "amount", "held_amount", "created_at", "updated_at"]
     list_display_links = list_display
     list_filter = ["currency_unit", "created_at", "updated_at"]
     readonly_fields = ["id", "created_at", "updated_at"]
@@ -5,3 +5,6 @@ class CurrenciesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "currencies"
     verbose_name = "Игровые валюты"
+
+    def ready(self) -> None:
+        from . import signals  # noqa
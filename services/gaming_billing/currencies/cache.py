@@ -0,0 +1,209 @@
+import threading
+import time
+from datetime import timedelta
+from typing import Generic, TypeVar
+
+from currencies.models import CheckingAccount
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Model
+
+T = TypeVar("T")
+M = TypeVar("M", bound=Model)
+
+
+class VersionedCache(Generic[T]):
+    """
+    Кэш редко меняющихся данных в памяти процесса
+
+    Записи живут ttl и сбрасываются через invalidate, обычно из сигналов моделей. Сигналы срабатывают
+    только в процессе, где было изменение, поэтому для остальных процессов версия кэша хранится в кэше
+    Django с алиасом CACHE_VERSION_ALIAS, если он задан - при смене версии процесс сбрасывает свои записи.
+    Версия читается не чаще раза в CACHE_VERSION_CHECK_INTERVAL, столько же изменение не видно другим процессам
+    """
+
+    version_key: str
+
+    def __init__(self) -> None:
+        self._entries: dict[str, tuple[float, T]] = {}
+        self._version = None
+        self._version_checked_at: float | None = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        # Кэш общий для процесса, в том числе для копий полей сериализаторов
+        return self
+
+    @property
+    def ttl(self) -> timedelta:
+        raise NotImplementedError
+
+    def invalidate(self) -> None:
+        """Сбрасывает записи этого процесса и поднимает общую версию для остальных"""
+        self.reset()
+
+        version_cache = self._get_version_cache()
+        if version_cache is None:
+            return
+
+        try:
+            version_cache.incr(self.version_key)
+        except ValueError:
+            version_cache.add(self.version_key, 1, timeout=None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def reset(self) -> None:
+        """Сбрасывает записи этого процесса, следующее обращение перечитает общую версию"""
+        self.clear()
+        self._version_checked_at = None
+
+    def _get_or_load(self, key: str, loader) -> T:
+        if self.ttl.total_seconds() <= 0:
+            return loader()
+
+        self._apply_version(self._get_version())
+
+        entry = self._get_entry(key)
+        if entry is not None:
+            return entry[0]
+
+        generation = self._generation
+        value = loader()
+        self._store(key, value, generation)
+
+        return value
+
+    async def _aget_or_load(self, key: str, aloader) -> T:
+        """То же что _get_or_load, но для async кода, aloader - корутинная функция"""
+        if self.ttl.total_seconds() <= 0:
+            return await aloader()
+
+        self._apply_version(await self._aget_version())
+
+        entry = self._get_entry(key)
+        if entry is not None:
+            return entry[0]
+
+        generation = self._generation
+        value = await aloader()
+        self._store(key, value, generation)
+
+        return value
+
+    def _get_entry(self, key: str) -> tuple[T] | None:
+        entry = self._entries.get(key)
+
+        if entry is not None and entry[0] > time.monotonic():
+            return (entry[1],)
+
+        return None
+
+    def _store(self, key: str, value: T, generation: int) -> None:
+        with self._lock:
+            # Если пока шёл запрос кэш сбросили - загруженное значение могло устареть
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl.total_seconds(), value)
+
+    def _get_version(self):
+        version_cache = self._get_version_cache()
+        if version_cache is None:
+            return None
+
+        if self._is_version_fresh():
+            return self._version
+
+        version = version_cache.get(self.version_key, 0)
+        self._version_checked_at = time.monotonic()
+
+        return version
+
+    async def _aget_version(self):
+        version_cache = self._get_version_cache()
+        if version_cache is None:
+            return None
+
+        if self._is_version_fresh():
+            return self._version
+
+        version = await version_cache.aget(self.version_key, 0)
+        self._version_checked_at = time.monotonic()
+
+        return version
+
+    def _is_version_fresh(self) -> bool:
+        return (
+            self._version_checked_at is not None
+            and time.monotonic() - self._version_checked_at < settings.CACHE_VERSION_CHECK_INTERVAL.total_seconds()
+        )
+
+    def _apply_version(self, version) -> None:
+        if version is not None and version != self._version:
+            self.clear()
+            self._version = version
+
+    def _get_version_cache(self):
+        if settings.CACHE_VERSION_ALIAS is None:
+            return None
+
+        return caches[settings.CACHE_VERSION_ALIAS]
+
+
+class ReferenceCache(VersionedCache[dict[str, M]]):
+    """
+    Кэш справочной таблицы целиком, строки ищутся по уникальному slug_field
+
+    Таблица загружается одним запросом при первом обращении, отсутствующий slug запросов не делает
+    """
+
+    def __init__(self, *, model: type[M], slug_field: str, select_related: tuple[str, ...] = ()) -> None:
+        super().__init__()
+
+        self.model = model
+        self.slug_field = slug_field
+        self.select_related = select_related
+        self.version_key = f"currencies:reference:{model._meta.label_lower}:version"
+
+    @property
+    def ttl(self) -> timedelta:
+        return settings.REFERENCE_CACHE_TTL
+
+    def get(self, slug: str) -> M | None:
+        return self._get_or_load("all", self._load).get(slug)
+
+    async def aget(self, slug: str) -> M | None:
+        return (await self._aget_or_load("all", self._aload)).get(slug)
+
+    def _load(self) -> dict[str, M]:
+        queryset = self.model.objects.select_related(*self.select_related)
+
+        return {getattr(instance, self.slug_field): instance for instance in queryset}
+
+    async def _aload(self) -> dict[str, M]:
+        queryset = self.model.objects.select_related(*self.select_related)
+
+        return {getattr(instance, self.slug_field): instance async for instance in queryset}
+
+
+class BalanceShardsCache(VersionedCache[dict[int, int]]):
+    """
+    Количество шардов зачислений у счетов, где они включены - {id счета: количество шардов}
+
+    Таких счетов единицы, поэтому они загружаются одним запросом, сбрасывается из AccountsService.set_balance_shards
+    """
+
+    version_key = "currencies:balance_shards:version"
+
+    @property
+    def ttl(self) -> timedelta:
+        return settings.REFERENCE_CACHE_TTL
+
+    def get(self) -> dict[int, int]:
+        return self._get_or_load("all", self._load)
+
+    def _load(self) -> dict[int, int]:
+        return dict(CheckingAccount.objects.filter(balance_shards__gt=1).values_list("pk", "balance_shards"))
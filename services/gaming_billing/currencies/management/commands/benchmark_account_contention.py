@@ -0,0 +1,154 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any
+from uuid import uuid4
+
+from common.utils import retry_metrics, retry_on_serialization_error
+from currencies.models import CheckingAccount, TransferRule, TransferTransaction
+from currencies.services import AccountsService, TransfersService
+from currencies.test_factories import (
+    CurrencyServicesTestFactory,
+    CurrencyUnitsTestFactory,
+    HoldersTestFactory,
+)
+from django.core.exceptions import ValidationError
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.test.utils import override_settings
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет конкурентные списания с одного счета: несколько потоков одновременно создают переводы"
+        " с общего счета. Режим update - текущее списание условным UPDATE, read-modify-write - прежнее"
+        " чтение счета перед списанием. Запускайте на отдельной базе Postgres, команда создаёт тестовые данные."
+        " Списание условным UPDATE обходится без повторов только под READ COMMITTED, в режиме update"
+        " с --isolation read_committed команда завершается ошибкой, если повторы были"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=50, help="Количество одновременных потоков")
+        parser.add_argument("--operations", type=int, default=20, help="Переводов на каждый поток")
+        parser.add_argument("--mode", choices=("update", "read-modify-write"), default="update")
+        parser.add_argument(
+            "--isolation",
+            choices=tuple(settings.DATABASE_ISOLATION_LEVELS),
+            default=settings.DATABASE_ISOLATION,
+            help="Уровень изоляции потоков, по умолчанию DATABASE.ISOLATION из конфига",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        # Новые соединения потоков открываются с уровнем изоляции --isolation
+        connection.settings_dict["OPTIONS"]["isolation_level"] = settings.DATABASE_ISOLATION_LEVELS[
+            options["isolation"]
+        ]
+
+        with override_settings(DATABASE_ISOLATION=options["isolation"]):
+            self.run_benchmark(**options)
+
+    def run_benchmark(self, **options: Any):
+        writers = options["writers"]
+        operations = options["operations"]
+
+        # Повторный запуск на той же базе не должен столкнуться с данными прошлого
+        run = uuid4().hex[:8]
+
+        with transaction.atomic():
+            service = CurrencyServicesTestFactory(name=f"contention-{run}")
+            unit = CurrencyUnitsTestFactory(symbol=f"contention-{run}")
+            transfer_rule = TransferRule.objects.create(
+                enabled=True,
+                name=f"contention-{run}",
+                unit=unit,
+                fee_percent=Decimal(0),
+                min_from_amount=Decimal(1),
+            )
+
+            source = AccountsService.get_or_create(
+                holder=HoldersTestFactory(holder_id=f"contention-{run}-source"), currency_unit=unit
+            )[0]
+            targets = [
+                AccountsService.get_or_create(
+                    holder=HoldersTestFactory(holder_id=f"contention-{run}-{number}"), currency_unit=unit
+                )[0]
+                for number in range(writers)
+            ]
+
+            initial_amount = Decimal(writers * operations)
+            CheckingAccount.objects.filter(pk=source.pk).update(amount=initial_amount)
+
+        create = self.create_transfer if options["mode"] == "update" else self.create_transfer_read_modify_write
+
+        def write(number: int) -> int:
+            failed = 0
+
+            try:
+                for _ in range(operations):
+                    try:
+                        create(
+                            service=service,
+                            transfer_rule=transfer_rule,
+                            from_checking_account=source,
+                            to_checking_account=targets[number],
+                        )
+                    except (ValidationError, DatabaseError):
+                        failed += 1
+            finally:
+                connection.close()
+
+            return failed
+
+        retries_before = retry_metrics.snapshot().get("retries", 0)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=writers) as executor:
+            failed = sum(executor.map(write, range(writers)))
+        elapsed = time.perf_counter() - started
+
+        retries = retry_metrics.snapshot().get("retries", 0) - retries_before
+
+        source.refresh_from_db()
+        total = writers * operations
+
+        self.stdout.write(
+            f"Mode: {options['mode']}, isolation: {options['isolation']}, writers: {writers}, transfers: {total}"
+        )
+        self.stdout.write(f"Throughput: {(total - failed) / elapsed:.1f} transfers/s, elapsed {elapsed:.2f} s")
+        self.stdout.write(f"Serialization retries: {retries:g}, failed transfers: {failed}")
+
+        if source.amount + source.held_amount == initial_amount:
+            self.stdout.write(self.style.SUCCESS("Balance is consistent"))
+        else:
+            raise CommandError(f"Balance mismatch: {source.amount} + {source.held_amount} != {initial_amount}")
+
+        if options["mode"] == "update" and options["isolation"] == "read_committed" and retries:
+            raise CommandError(f"Debits were retried {retries:g} times under READ COMMITTED")
+
+    def create_transfer(self, **kwargs):
+        return TransfersService.create(**kwargs, from_amount=1, description="contention benchmark")
+
+    @retry_on_serialization_error()
+    def create_transfer_read_modify_write(self, *, from_checking_account: CheckingAccount, **kwargs):
+        # Списание до условного UPDATE - чтение счета, проверка суммы в Python и запись
+        with transaction.atomic():
+            account = CheckingAccount.objects.get(pk=from_checking_account.pk)
+
+            if account.amount < 1:
+                raise ValidationError("Insufficient funds in the checking account")
+
+            account.amount = F("amount") - 1
+            account.held_amount = F("held_amount") + 1
+            account.save(update_fields=["amount", "held_amount", "updated_at"])
+
+            return TransferTransaction.objects.create(
+                **kwargs,
+                from_checking_account=from_checking_account,
+                from_amount=1,
+                to_amount=1,
+                description="contention benchmark",
+                auto_reject_after=timezone.now(),
+            )
@@ -0,0 +1,122 @@
+import random
+from datetime import timedelta
+from typing import Any
+
+from currencies.models import (
+    AdjustmentTransaction,
+    CurrencyService,
+    ExchangeTransaction,
+    TransferTransaction,
+)
+from currencies.services import AccountsService
+from currencies.test_factories import (
+    CurrencyServicesTestFactory,
+    CurrencyUnitsTestFactory,
+    HoldersTestFactory,
+)
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from tqdm import tqdm
+
+
+class Command(BaseCommand):
+    help = (
+        "Выводит планы запросов отклонения устаревших и схлопывания старых транзакций."
+        " Для сравнения планов до и после индексов выполните команду после"
+        " 'migrate currencies 0004' и после 'migrate currencies'"
+    )
+
+    statuses = ("PENDING", "CONFIRMED", "REJECTED")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Сколько транзакций каждого типа создать перед выводом планов"
+        )
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument(
+            "--analyze", action="store_true", help="Выполнить запросы (EXPLAIN ANALYZE, только Postgres)"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        if options["seed"]:
+            self.seed(count=options["seed"], batch_size=options["batch_size"])
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for model in (AdjustmentTransaction, TransferTransaction, ExchangeTransaction):
+                    cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+        explain_options = {}
+        if options["analyze"] and connection.vendor == "postgresql":
+            explain_options = {"analyze": True, "buffers": True}
+
+        now = timezone.now()
+        cutoff_date = now - timedelta(days=30)
+        service = CurrencyService.objects.order_by("-pk").first()
+
+        for model in (AdjustmentTransaction, TransferTransaction, ExchangeTransaction):
+            queries = {
+                "reject_all_outdated": model.objects.filter(status="PENDING", auto_reject_after__lt=now),
+                "collapse_old_transactions, пачка": (
+                    model.objects.filter(~Q(status="PENDING"), created_at__lt=cutoff_date, service=service)
+                    .order_by("created_at", "uuid")
+                    .values_list("created_at", "uuid")[: settings.CURRENCY_COLLAPSE_CHUNK_SIZE]
+                ),
+            }
+
+            for name, queryset in queries.items():
+                self.stdout.write(self.style.MIGRATE_HEADING(f"{model.__name__}: {name}"))
+                self.stdout.write(queryset.explain(**explain_options))
+                self.stdout.write("")
+
+    def seed(self, *, count: int, batch_size: int):
+        now = timezone.now()
+
+        with transaction.atomic():
+            service = CurrencyServicesTestFactory()
+            unit = CurrencyUnitsTestFactory()
+
+            accounts = [
+                AccountsService.get_or_create(holder=HoldersTestFactory(), currency_unit=unit)[0] for _ in range(1000)
+            ]
+
+        def random_fields():
+            # Почти все транзакции закрыты, как и в рабочей базе
+            status = random.choices(self.statuses, weights=(1, 90, 9))[0]
+            created_at = now - timedelta(seconds=random.randint(0, 365 * 24 * 3600))
+
+            return dict(
+                service=service,
+                status=status,
+                created_at=created_at,
+                auto_reject_after=created_at + timedelta(minutes=3),
+                closed_at=None if status == "PENDING" else created_at + timedelta(minutes=1),
+            )
+
+        for model in (AdjustmentTransaction, TransferTransaction, ExchangeTransaction):
+            for offset in tqdm(range(0, count, batch_size), model.__name__):
+                objects = []
+
+                for _ in range(min(batch_size, count - offset)):
+                    if model is AdjustmentTransaction:
+                        fields = dict(checking_account=random.choice(accounts), amount=random.randint(-100, 100) or 1)
+                    else:
+                        from_account, to_account = random.sample(accounts, 2)
+                        fields = dict(
+                            from_checking_account=from_account,
+                            to_checking_account=to_account,
+                            from_amount=100,
+                            to_amount=90,
+                        )
+
+                    objects.append(model(**random_fields(), **fields))
+
+                model.objects.bulk_create(objects)
+
+                # auto_now_add перезаписывает created_at при вставке, восстанавливаем его из auto_reject_after
+                model.objects.filter(pk__in=[instance.pk for instance in objects]).update(
+                    created_at=F("auto_reject_after") - timedelta(minutes=3)
+                )
@@ -0,0 +1,32 @@
+from typing import Any
+
+from currencies.models import CheckingAccount
+from currencies.services import AccountsService
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Включает шарды зачислений у счета с очень частыми зачислениями (казна, призовой фонд) или выключает их"
+        " при --shards 0. Шарды периодически сворачивает задача currencies.tasks.fold_account_shards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--holder-id", required=True)
+        parser.add_argument("--unit", required=True, help="Символ валюты счета")
+        parser.add_argument("--shards", type=int, required=True, help="Количество шардов, 0 - выключить")
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        if options["shards"] < 0:
+            raise CommandError("--shards must be >= 0")
+
+        try:
+            checking_account = CheckingAccount.objects.get(
+                holder__holder_id=options["holder_id"], currency_unit__symbol=options["unit"]
+            )
+        except CheckingAccount.DoesNotExist:
+            raise CommandError("Checking account not found")
+
+        AccountsService.set_balance_shards(checking_account=checking_account, shards=options["shards"])
+
+        self.stdout.write(self.style.SUCCESS(f"Checking account {checking_account.pk}: {options['shards']} shards"))
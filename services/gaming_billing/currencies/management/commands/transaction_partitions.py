@@ -0,0 +1,75 @@
+from datetime import datetime
+from typing import Any
+
+from currencies.services import PartitionsService
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Партиционирует таблицы транзакций по месяцам (--partition, только Postgres), создает партиции на --ahead"
+        " месяцев вперед и отсоединяет партиции месяцев до --detach-before. --unpartition возвращает обычные таблицы"
+    )
+
+    def add_arguments(self, parser):
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument(
+            "--partition",
+            action="store_true",
+            help="Пересоздать таблицы транзакций партиционированными, уже партиционированные пропускаются",
+        )
+        mode.add_argument(
+            "--unpartition",
+            action="store_true",
+            help="Пересоздать таблицы транзакций обычными, отсоединенные партиции не копируются",
+        )
+        parser.add_argument("--ahead", type=int, default=PartitionsService.AHEAD_MONTHS, help="Месяцев вперед")
+        parser.add_argument("--detach-before", help="Месяц YYYY-MM, партиции до него отсоединяются")
+        parser.add_argument("--drop", action="store_true", help="Удалить отсоединенные партиции")
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        if options["ahead"] < 0:
+            raise CommandError("--ahead must be >= 0")
+
+        if options["partition"] or options["unpartition"]:
+            if connection.vendor != "postgresql":
+                raise CommandError("Partitions need Postgres")
+
+            # Каждая таблица пересоздается в своей транзакции, на время копирования строк запись в неё блокируется
+            for model in PartitionsService.MODELS:
+                if PartitionsService.is_partitioned(model) == bool(options["partition"]):
+                    continue
+
+                with connection.schema_editor() as schema_editor:
+                    if options["partition"]:
+                        PartitionsService.partition(model, schema_editor=schema_editor, ahead_months=options["ahead"])
+                    else:
+                        PartitionsService.unpartition(model, schema_editor=schema_editor)
+
+                self.stdout.write(
+                    f"{'Partitioned' if options['partition'] else 'Unpartitioned'} {model._meta.db_table}"
+                )
+
+            if options["unpartition"]:
+                self.stdout.write(self.style.SUCCESS("Done"))
+                return
+
+        if not PartitionsService.tables_partitioned():
+            raise CommandError("Transaction tables are not partitioned, run with --partition")
+
+        with transaction.atomic():
+            for name in PartitionsService.create_upcoming(ahead_months=options["ahead"]):
+                self.stdout.write(f"Created {name}")
+
+            if options["detach_before"]:
+                try:
+                    before = datetime.strptime(options["detach_before"], "%Y-%m").date()
+                except ValueError:
+                    raise CommandError("--detach-before must be YYYY-MM")
+
+                for model in PartitionsService.MODELS:
+                    for name in PartitionsService.detach_partitions(model, before=before, drop=options["drop"]):
+                        self.stdout.write(f"{'Dropped' if options['drop'] else 'Detached'} {name}")
+
+        self.stdout.write(self.style.SUCCESS("Done"))
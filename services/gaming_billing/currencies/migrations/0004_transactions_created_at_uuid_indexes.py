@@ -0,0 +1,28 @@
+# Generated by Django 5.2.14 on 2026-10-17 01:50
+
+from common.operations import AddIndexConcurrentlyIfPostgres
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Индексы больших таблиц транзакций строятся CONCURRENTLY, без блокировки записи
+    atomic = False
+
+    dependencies = [
+        ('currencies', '0003_alter_checkingaccount_currency_unit_and_more'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='adjustmenttransaction',
+            index=models.Index(fields=['created_at', 'uuid'], name='adjustment_created_at_uuid_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='exchangetransaction',
+            index=models.Index(fields=['created_at', 'uuid'], name='exchange_created_at_uuid_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='transfertransaction',
+            index=models.Index(fields=['created_at', 'uuid'], name='transfer_created_at_uuid_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.14 on 2026-10-17 01:51
+
+from common.operations import AddIndexConcurrentlyIfPostgres
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Индексы больших таблиц транзакций строятся CONCURRENTLY, без блокировки записи
+    atomic = False
+
+    dependencies = [
+        ('currencies', '0004_transactions_created_at_uuid_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='adjustmenttransaction',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['auto_reject_after'], name='adjustment_pending_reject_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='adjustmenttransaction',
+            index=models.Index(fields=['service', 'status', 'created_at'], name='adjustment_service_status_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='exchangetransaction',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['auto_reject_after'], name='exchange_pending_reject_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='exchangetransaction',
+            index=models.Index(fields=['service', 'status', 'created_at'], name='exchange_service_status_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='transfertransaction',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['auto_reject_after'], name='transfer_pending_reject_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='transfertransaction',
+            index=models.Index(fields=['service', 'status', 'created_at'], name='transfer_service_status_idx'),
+        ),
+    ]
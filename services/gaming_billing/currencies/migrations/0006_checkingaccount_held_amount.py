@@ -0,0 +1,42 @@
+# Generated by Django 5.2.14 on 2026-10-17 02:11
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def fill_held_amount(apps, schema_editor):
+    """Списания незакрытых транзакций уже вычтены из amount, переносим их сумму в held_amount"""
+    CheckingAccount = apps.get_model("currencies", "CheckingAccount")
+
+    held = defaultdict(Decimal)
+
+    adjustments = apps.get_model("currencies", "AdjustmentTransaction").objects.filter(status="PENDING", amount__lt=0)
+    for row in adjustments.values("checking_account").annotate(total=Sum("amount")):
+        held[row["checking_account"]] -= row["total"]
+
+    for model_name in ("TransferTransaction", "ExchangeTransaction"):
+        transactions = apps.get_model("currencies", model_name).objects.filter(status="PENDING")
+        for row in transactions.values("from_checking_account").annotate(total=Sum("from_amount")):
+            held[row["from_checking_account"]] += row["total"]
+
+    for pk, held_amount in held.items():
+        CheckingAccount.objects.filter(pk=pk).update(held_amount=held_amount)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('currencies', '0005_transactions_hot_paths_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkingaccount',
+            name='held_amount',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=13, verbose_name='Заблокировано незакрытыми транзакциями'),
+        ),
+        migrations.RunPython(fill_held_amount, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.14 on 2026-10-17 02:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('currencies', '0006_checkingaccount_held_amount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='checkingaccount',
+            name='balance_shards',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Для счетов с очень частыми зачислениями, зачисления распределяются по этому количеству строк CheckingAccountShard и периодически сворачиваются в счёт, 0 - без шардов', verbose_name='Шарды зачислений'),
+        ),
+        migrations.CreateModel(
+            name='CheckingAccountShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveSmallIntegerField(verbose_name='Номер шарда')),
+                ('amount', models.DecimalField(decimal_places=4, default=0, max_digits=13, verbose_name='Несвернутые зачисления')),
+                ('checking_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='currencies.checkingaccount', verbose_name='Счёт')),
+            ],
+            options={
+                'verbose_name': 'Шард зачислений счёта',
+                'verbose_name_plural': 'Шарды зачислений счетов',
+                'constraints': [models.UniqueConstraint(fields=('checking_account', 'number'), name='unique_checking_account_shard')],
+            },
+        ),
+    ]
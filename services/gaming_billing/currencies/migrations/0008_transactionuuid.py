@@ -0,0 +1,26 @@
+# Generated by Django 5.2.14 on 2026-10-17 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('currencies', '0007_checkingaccount_balance_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionUUID',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_type', models.CharField(max_length=32, verbose_name='Тип транзакции')),
+                ('uuid', models.UUIDField(verbose_name='Уникальный ID (uuid)')),
+            ],
+            options={
+                'verbose_name': 'uuid транзакции',
+                'verbose_name_plural': 'uuid транзакций',
+                'constraints': [models.UniqueConstraint(fields=('transaction_type', 'uuid'), name='unique_transaction_uuid')],
+            },
+        ),
+    ]
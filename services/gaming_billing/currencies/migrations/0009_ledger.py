@@ -0,0 +1,71 @@
+# Generated by Django 5.2.14 on 2026-10-17 02:37
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def create_opening_entries(apps, schema_editor):
+    """Открывающая запись журнала с текущей суммой каждого счета, дальше сумма записей всегда равна сумме счета"""
+    CheckingAccount = apps.get_model("currencies", "CheckingAccount")
+    LedgerEntry = apps.get_model("currencies", "LedgerEntry")
+
+    accounts = CheckingAccount.objects.annotate(shards_amount=Sum("shards__amount")).order_by("pk")
+
+    entries = []
+    for account in accounts.iterator(chunk_size=2000):
+        balance = account.amount + account.held_amount + (account.shards_amount or Decimal(0))
+
+        if balance != 0:
+            entries.append(
+                LedgerEntry(
+                    checking_account_id=account.pk,
+                    delta=balance,
+                    balance_after=None if account.balance_shards > 1 else balance,
+                )
+            )
+
+    LedgerEntry.objects.bulk_create(entries, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('currencies', '0008_transactionuuid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.DecimalField(decimal_places=4, max_digits=13, verbose_name='Сумма вместе с заблокированной')),
+                ('last_entry_id', models.BigIntegerField(verbose_name='ID последней учтенной записи журнала')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('checking_account', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='currencies.checkingaccount', verbose_name='Счёт')),
+            ],
+            options={
+                'verbose_name': 'Снимок суммы счёта',
+                'verbose_name_plural': 'Снимки сумм счетов',
+                'indexes': [models.Index(fields=['checking_account', 'created_at'], name='snapshot_account_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.DecimalField(decimal_places=4, max_digits=13, verbose_name='Изменение')),
+                ('balance_after', models.DecimalField(decimal_places=4, help_text='Пусто для счетов с шардами зачислений, их сумма без блокировки счета неизвестна', max_digits=13, null=True, verbose_name='Сумма после изменения')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('checking_account', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='currencies.checkingaccount', verbose_name='Счёт')),
+            ],
+            options={
+                'verbose_name': 'Запись журнала счёта',
+                'verbose_name_plural': 'Журнал счетов',
+                'indexes': [models.Index(fields=['checking_account', 'id'], name='ledger_account_id_idx'), models.Index(fields=['checking_account', 'created_at'], name='ledger_account_created_idx')],
+            },
+        ),
+        migrations.RunPython(create_opening_entries, migrations.RunPython.noop),
+    ]
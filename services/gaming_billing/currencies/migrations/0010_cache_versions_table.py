@@ -0,0 +1,23 @@
+from django.core.management.commands.createcachetable import Command as CreateCacheTableCommand
+from django.db import migrations
+
+# Таблица общих версий кэшей процессов (CACHES["versions"]), без нее первое изменение сервиса или правила падает
+# в сигнале сброса кэша. Таблица, уже созданная командой createcachetable, пропускается
+CACHE_VERSIONS_TABLE = 'cache_versions'
+
+
+def create_cache_versions_table(apps, schema_editor):
+    command = CreateCacheTableCommand()
+    command.verbosity = 0
+    command.create_table(schema_editor.connection.alias, CACHE_VERSIONS_TABLE, dry_run=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('currencies', '0009_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_versions_table, migrations.RunPython.noop),
+    ]
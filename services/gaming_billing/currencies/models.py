@@ -5,6 +5,9 @@ from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .permissions import PermissionsPolicy
 
 
 class CurrencyService(models.Model):
@@ -18,6 +21,14 @@ class CurrencyService(models.Model):
     def __str__(self):
         return self.name
 
+    @cached_property
+    def permissions_policy(self) -> PermissionsPolicy:
+        """Скомпилированные разрешения, живут вместе с объектом, в том числе в кэше доступов сервисов"""
+        return PermissionsPolicy.compile(self.permissions)
+
+    def clean(self):
+        PermissionsPolicy.validate(self.permissions)
+
     class Meta:
         verbose_name = "Сервис"
         verbose_name_plural = "Сервисы"
@@ -176,7 +187,19 @@ class CheckingAccount(models.Model):
     currency_unit = models.ForeignKey(
         verbose_name="Игровая валюта", to=CurrencyUnit, on_delete=models.PROTECT, related_name="checking_accounts"
     )
+    # amount - доступные средства, списания незакрытых транзакций уже вычтены из неё и лежат в held_amount
     amount = models.DecimalField(verbose_name="Сумма средств", max_digits=13, decimal_places=4)
+    held_amount = models.DecimalField(
+        verbose_name="Заблокировано незакрытыми транзакциями", max_digits=13, decimal_places=4, default=0
+    )
+    balance_shards = models.PositiveSmallIntegerField(
+        verbose_name="Шарды зачислений",
+        default=0,
+        help_text=(
+            "Для счетов с очень частыми зачислениями, зачисления распределяются по этому количеству строк"
+            " CheckingAccountShard и периодически сворачиваются в счёт, 0 - без шардов"
+        ),
+    )
 
     created_at = models.DateTimeField(verbose_name="Дата создания", auto_now_add=True)
     updated_at = models.DateTimeField(verbose_name="Дата обновления", auto_now=True)
@@ -184,6 +207,11 @@ class CheckingAccount(models.Model):
     def __str__(self):
         return f"Счёт {self.id} держателя #{self.holder_id}, валюта #{self.currency_unit_id}, сумма {self.amount}"
 
+    @property
+    def balance(self):
+        """Доступные средства вместе с ещё не свернутыми зачислениями в шарды (shards_amount из AccountsService)"""
+        return self.amount + getattr(self, "shards_amount", 0)
+
     class Meta:
         verbose_name = "Счет держателя"
         verbose_name_plural = "Счета держателей"
@@ -193,6 +221,84 @@ class CheckingAccount(models.Model):
         ]
 
 
+class CheckingAccountShard(models.Model):
+    checking_account = models.ForeignKey(
+        verbose_name="Счёт", to=CheckingAccount, on_delete=models.CASCADE, related_name="shards"
+    )
+    number = models.PositiveSmallIntegerField(verbose_name="Номер шарда")
+    amount = models.DecimalField(verbose_name="Несвернутые зачисления", max_digits=13, decimal_places=4, default=0)
+
+    def __str__(self):
+        return f"Шард {self.number} счёта {self.checking_account_id}, сумма {self.amount}"
+
+    class Meta:
+        verbose_name = "Шард зачислений счёта"
+        verbose_name_plural = "Шарды зачислений счетов"
+
+        constraints = [
+            models.UniqueConstraint(fields=["checking_account", "number"], name="unique_checking_account_shard"),
+        ]
+
+
+class LedgerEntry(models.Model):
+    """Изменение суммы счета вместе с заблокированной (amount + held_amount), записи только добавляются"""
+
+    checking_account = models.ForeignKey(
+        verbose_name="Счёт",
+        to=CheckingAccount,
+        on_delete=models.CASCADE,
+        related_name="ledger_entries",
+        db_index=False,
+    )
+    delta = models.DecimalField(verbose_name="Изменение", max_digits=13, decimal_places=4)
+    balance_after = models.DecimalField(
+        verbose_name="Сумма после изменения",
+        max_digits=13,
+        decimal_places=4,
+        null=True,
+        help_text="Пусто для счетов с шардами зачислений, их сумма без блокировки счета неизвестна",
+    )
+    created_at = models.DateTimeField(verbose_name="Дата создания", auto_now_add=True)
+
+    def __str__(self):
+        return f"Запись {self.delta} счёта {self.checking_account_id}"  # type: ignore _id adds by django
+
+    class Meta:
+        verbose_name = "Запись журнала счёта"
+        verbose_name_plural = "Журнал счетов"
+
+        indexes = [
+            # Для суммы записей после снимка
+            models.Index(fields=["checking_account", "id"], name="ledger_account_id_idx"),
+            # Для выписки за период
+            models.Index(fields=["checking_account", "created_at"], name="ledger_account_created_idx"),
+        ]
+
+
+class BalanceSnapshot(models.Model):
+    checking_account = models.ForeignKey(
+        verbose_name="Счёт",
+        to=CheckingAccount,
+        on_delete=models.CASCADE,
+        related_name="balance_snapshots",
+        db_index=False,
+    )
+    balance = models.DecimalField(verbose_name="Сумма вместе с заблокированной", max_digits=13, decimal_places=4)
+    last_entry_id = models.BigIntegerField(verbose_name="ID последней учтенной записи журнала")
+    created_at = models.DateTimeField(verbose_name="Дата создания", auto_now_add=True)
+
+    def __str__(self):
+        return f"Снимок {self.balance} счёта {self.checking_account_id}"  # type: ignore _id adds by django
+
+    class Meta:
+        verbose_name = "Снимок суммы счёта"
+        verbose_name_plural = "Снимки сумм счетов"
+
+        indexes = [
+            models.Index(fields=["checking_account", "created_at"], name="snapshot_account_created_idx"),
+        ]
+
+
 class BaseTransaction(models.Model):
     STATUSES = (("PENDING", "Pending"), ("CONFIRMED", "Confirmed"), ("REJECTED", "Rejected"))
 
@@ -208,22 +314,34 @@ class BaseTransaction(models.Model):
     closed_at = models.DateTimeField(verbose_name="Дата завершения", null=True, blank=True)
 
     def _confirm(self, description: str):
+        self._close("CONFIRMED", description)
+
+    def _reject(self, description: str):
+        self._close("REJECTED", description)
+
+    def _close(self, status: str, description: str):
+        """
+        Закрывает транзакцию одним UPDATE с условием status = PENDING, при параллельном закрытии той же транзакции
+        обновится только одна строка, поэтому повторное закрытие видно по количеству обновленных строк, а не
+        по ошибке сериализации
+        """
         if self.status != "PENDING":
             raise ValidationError("The transaction has already been closed")
 
-        self.status = "CONFIRMED"
-        self.status_description = description
-        self.closed_at = timezone.now()
-        self.save(update_fields=["status", "status_description", "closed_at"])
+        closed_at = timezone.now()
 
-    def _reject(self, description: str):
-        if self.status != "PENDING":
+        updated = (
+            type(self)
+            .objects.filter(pk=self.pk, status="PENDING")
+            .update(status=status, status_description=description, closed_at=closed_at)
+        )
+
+        if not updated:
             raise ValidationError("The transaction has already been closed")
 
-        self.status = "REJECTED"
+        self.status = status
         self.status_description = description
-        self.closed_at = timezone.now()
-        self.save(update_fields=["status", "status_description", "closed_at"])
+        self.closed_at = closed_at
 
     class Meta:
         abstract = True
@@ -245,6 +363,17 @@ class AdjustmentTransaction(BaseTransaction):
         verbose_name = "Транзакция получения/вычета"
         verbose_name_plural = "Транзакции получения/вычета"
 
+        indexes = [
+            # Для пагинации по ключу в API
+            models.Index(fields=["created_at", "uuid"], name="adjustment_created_at_uuid_idx"),
+            # Для отклонения устаревших транзакций
+            models.Index(
+                fields=["auto_reject_after"], condition=models.Q(status="PENDING"), name="adjustment_pending_reject_idx"
+            ),
+            # Для схлопывания старых транзакций
+            models.Index(fields=["service", "status", "created_at"], name="adjustment_service_status_idx"),
+        ]
+
 
 class TransferTransaction(BaseTransaction):
     transfer_rule = models.ForeignKey(
@@ -275,6 +404,17 @@ class TransferTransaction(BaseTransaction):
         verbose_name = "Транзакция перевода"
         verbose_name_plural = "Транзакции перевода"
 
+        indexes = [
+            # Для пагинации по ключу в API
+            models.Index(fields=["created_at", "uuid"], name="transfer_created_at_uuid_idx"),
+            # Для отклонения устаревших транзакций
+            models.Index(
+                fields=["auto_reject_after"], condition=models.Q(status="PENDING"), name="transfer_pending_reject_idx"
+            ),
+            # Для схлопывания старых транзакций
+            models.Index(fields=["service", "status", "created_at"], name="transfer_service_status_idx"),
+        ]
+
 
 class ExchangeTransaction(BaseTransaction):
     exchange_rule = models.ForeignKey(
@@ -308,3 +448,35 @@ class ExchangeTransaction(BaseTransaction):
     class Meta(BaseTransaction.Meta):
         verbose_name = "Транзакция обмена"
         verbose_name_plural = "Транзакции обмена"
+
+        indexes = [
+            # Для пагинации по ключу в API
+            models.Index(fields=["created_at", "uuid"], name="exchange_created_at_uuid_idx"),
+            # Для отклонения устаревших транзакций
+            models.Index(
+                fields=["auto_reject_after"], condition=models.Q(status="PENDING"), name="exchange_pending_reject_idx"
+            ),
+            # Для схлопывания старых транзакций
+            models.Index(fields=["service", "status", "created_at"], name="exchange_service_status_idx"),
+        ]
+
+
+class TransactionUUID(models.Model):
+    """
+    uuid всех транзакций, в том числе созданных сервисом. Первичный ключ партиционированной таблицы транзакций
+    (uuid, created_at) не мешает повтору uuid с другой датой создания, уникальность держит ограничение этой таблицы
+    """
+
+    transaction_type = models.CharField(verbose_name="Тип транзакции", max_length=32)
+    uuid = models.UUIDField(verbose_name="Уникальный ID (uuid)")
+
+    def __str__(self):
+        return f"{self.transaction_type} {self.uuid}"
+
+    class Meta:
+        verbose_name = "uuid транзакции"
+        verbose_name_plural = "uuid транзакций"
+
+        constraints = [
+            models.UniqueConstraint(fields=["transaction_type", "uuid"], name="unique_transaction_uuid"),
+        ]
@@ -1,7 +1,79 @@
 import decimal
+from dataclasses import dataclass
 from decimal import Decimal
+from types import MappingProxyType
+from typing import Any, Mapping
 
-from django.core.exceptions import PermissionDenied
+from django.core.exceptions import PermissionDenied, ValidationError
+
+
+class MalformedPermission(PermissionDenied):
+    """Значение разрешения имеет неверный тип или формат"""
+
+
+@dataclass(frozen=True, slots=True)
+class SectionPolicy:
+    """
+    Разрешения одной секции, разобранные заранее
+
+    *_error - текст PermissionDenied, который вызывает соответствующая проверка независимо от переданных в неё
+    значений (секция выключена, разрешение отсутствует или имеет неверный формат), None - проверка проходит
+    """
+
+    access_error: str | None
+    create_error: str | None
+    instant_error: str | None
+    update_error: str | None
+    amount_error: str | None
+    min_amount: Decimal
+    max_amount: Decimal
+    auto_reject_error: str | None
+    min_auto_reject: Any
+    max_auto_reject: Any
+    confirm_error: str | None
+    confirm_services: frozenset[str]
+    reject_error: str | None
+    reject_services: frozenset[str]
+
+
+@dataclass(frozen=True, slots=True)
+class PermissionsPolicy:
+    """
+    Разрешения сервиса, скомпилированные один раз из CurrencyService.permissions
+
+    errors - сообщения о разрешениях с неверным форматом, найденные при компиляции
+    """
+
+    root: bool
+    sections: Mapping[str, SectionPolicy]
+    errors: tuple[str, ...]
+
+    @classmethod
+    def compile(cls, permissions: Any) -> "PermissionsPolicy":
+        sections = {}
+        errors = []
+
+        for permissions_service in PERMISSIONS_SERVICES:
+            section_policy, section_errors = permissions_service.compile(permissions)
+
+            sections[permissions_service.section_key] = section_policy
+            errors.extend(section_errors)
+
+        return cls(
+            root=BasePermission._is_root(permissions=permissions),
+            sections=MappingProxyType(sections),
+            errors=tuple(dict.fromkeys(errors)),
+        )
+
+    @classmethod
+    def validate(cls, permissions: Any) -> None:
+        """
+        :raises ValidationError: Если у разрешений есть значения неверного формата
+        """
+        policy = cls.compile(permissions)
+
+        if policy.errors:
+            raise ValidationError(list(policy.errors))
 
 
 class BasePermission:
@@ -17,7 +89,8 @@ class BasePermission:
             "create": {
                 "enabled": True,  # Если False - enforce_create вызывает PermissionDenied
                 "min_amount": 100,  # Если переданный amount меньше минимального - вызывается PermissionDenied
-                "max_amount": 200  # Если переданный amount больше максимального - вызывается PermissionDenied
+                "max_amount": 200,  # Если переданный amount больше максимального - вызывается PermissionDenied
+                "instant": True  # Необязательный, если не True - enforce_instant вызывает PermissionDenied
             },
             "confirm": {
                 "enabled": True,  # Если False - enforce_confirm вызывает PermissionDenied
@@ -43,6 +116,8 @@ class BasePermission:
     enabled_key: str = "enabled"
 
     create_key: str = "create"
+    instant_key: str = "instant"
+    update_key: str = "update"
     confirm_key: str = "confirm"
     reject_key: str = "reject"
 
@@ -53,119 +128,247 @@ class BasePermission:
     max_auto_reject: str = "max_auto_reject"
 
     @classmethod
-    def _is_root(cls, *, permissions: dict):
-        try:
-            return permissions[cls.root_key] is True
-        except KeyError:
-            return False
+    def compile(cls, permissions: Any) -> tuple[SectionPolicy, list[str]]:
+        """
+        Разбирает секцию разрешений один раз, чтобы enforce_* не обходили dict при каждом вызове
+
+        Возвращает политику секции и сообщения о разрешениях с неверным форматом
+        """
+        errors = []
+
+        def capture(compile_check, *args):
+            try:
+                return compile_check(permissions, *args), None
+            except MalformedPermission as e:
+                errors.append(e.args[0])
+                return None, e.args[0]
+            except PermissionDenied as e:
+                return None, e.args[0]
+
+        _, access_error = capture(cls._compile_access)
+        _, create_error = capture(cls._compile_create)
+        _, instant_error = capture(cls._compile_instant)
+        _, update_error = capture(cls._compile_update)
+        amounts, amount_error = capture(cls._compile_amount)
+        auto_rejects, auto_reject_error = capture(cls._compile_auto_reject)
+        confirm_services, confirm_error = capture(cls._compile_services, cls.confirm_key, "Confirm")
+        reject_services, reject_error = capture(cls._compile_services, cls.reject_key, "Reject")
+
+        # Каждая проверка сначала проверяет доступ к секции
+        policy = SectionPolicy(
+            access_error=access_error,
+            create_error=access_error or create_error,
+            instant_error=access_error or create_error or instant_error,
+            update_error=access_error or update_error,
+            amount_error=access_error or amount_error,
+            min_amount=amounts[0] if amounts else Decimal(0),
+            max_amount=amounts[1] if amounts else Decimal(0),
+            auto_reject_error=access_error or auto_reject_error,
+            min_auto_reject=auto_rejects[0] if auto_rejects else 0,
+            max_auto_reject=auto_rejects[1] if auto_rejects else 0,
+            confirm_error=access_error or confirm_error,
+            confirm_services=confirm_services or frozenset(),
+            reject_error=access_error or reject_error,
+            reject_services=reject_services or frozenset(),
+        )
+
+        return policy, errors
+
+    @classmethod
+    def _get_section(cls, permissions: Any, *keys: str) -> dict:
+        if not isinstance(permissions, dict):
+            raise MalformedPermission(f"{cls.verbose_name}: Permissions must be an object")
+
+        section = permissions
+
+        for key in keys:
+            try:
+                section = section[key]
+            except KeyError as e:
+                raise PermissionDenied(f"{cls.verbose_name}: Missing required permission {e}")
+
+            if not isinstance(section, dict):
+                raise MalformedPermission(f"{cls.verbose_name}: Error in {key} permission")
+
+        return section
 
     @classmethod
-    def _check_access(cls, *, permissions: dict):
+    def _get_enabled(cls, section: dict) -> bool:
         try:
-            if permissions[cls.section_key][cls.enabled_key] is not True:
-                raise PermissionDenied(f"{cls.verbose_name}: Access is disabled")
+            return section[cls.enabled_key] is True
         except KeyError as e:
             raise PermissionDenied(f"{cls.verbose_name}: Missing required permission {e}")
 
     @classmethod
-    def enforce_access(cls, *, permissions: dict):
-        if cls._is_root(permissions=permissions):
-            return
+    def _compile_access(cls, permissions: Any) -> None:
+        if not cls._get_enabled(cls._get_section(permissions, cls.section_key)):
+            raise PermissionDenied(f"{cls.verbose_name}: Access is disabled")
 
-        cls._check_access(permissions=permissions)
+    @classmethod
+    def _compile_create(cls, permissions: Any) -> None:
+        if not cls._get_enabled(cls._get_section(permissions, cls.section_key, cls.create_key)):
+            raise PermissionDenied(f"{cls.verbose_name}: Creating is disabled")
 
     @classmethod
-    def enforce_amount(cls, *, permissions: dict, amount: Decimal | int):
-        if cls._is_root(permissions=permissions):
-            return
+    def _compile_instant(cls, permissions: Any) -> None:
+        create_section = cls._get_section(permissions, cls.section_key, cls.create_key)
+        instant = create_section.get(cls.instant_key, False)
 
-        cls._check_access(permissions=permissions)
+        if not isinstance(instant, bool):
+            raise MalformedPermission(f"{cls.verbose_name}: Error in {cls.instant_key} permission")
 
-        try:
-            create_section = permissions[cls.section_key][cls.create_key]
+        if not instant:
+            raise PermissionDenied(f"{cls.verbose_name}: Instant transactions are disabled")
 
+    @classmethod
+    def _compile_update(cls, permissions: Any) -> None:
+        if not cls._get_enabled(cls._get_section(permissions, cls.section_key, cls.update_key)):
+            raise PermissionDenied(f"{cls.verbose_name}: Update is disabled")
+
+    @classmethod
+    def _compile_amount(cls, permissions: Any) -> tuple[Decimal, Decimal]:
+        create_section = cls._get_section(permissions, cls.section_key, cls.create_key)
+
+        try:
             max_amount = Decimal(create_section[cls.max_amount_key])
             min_amount = Decimal(create_section[cls.min_amount_key])
-
-            if not (min_amount <= amount <= max_amount):
-                raise PermissionDenied(f"{cls.verbose_name}: Amount is out of range")
         except KeyError as e:
             raise PermissionDenied(f"{cls.verbose_name}: Missing required permission {e}")
-        except (TypeError, decimal.InvalidOperation):
-            raise PermissionDenied(f"{cls.verbose_name}: Error in min_amount or in max_amount permission")
+        except (TypeError, ValueError, decimal.InvalidOperation):
+            raise MalformedPermission(f"{cls.verbose_name}: Error in min_amount or in max_amount permission")
 
-    @classmethod
-    def enforce_create(cls, *, permissions: dict):
-        if cls._is_root(permissions=permissions):
-            return
+        return min_amount, max_amount
 
-        cls._check_access(permissions=permissions)
+    @classmethod
+    def _compile_auto_reject(cls, permissions: Any) -> tuple[int | float, int | float]:
+        create_section = cls._get_section(permissions, cls.section_key, cls.create_key)
 
         try:
-            create_section = permissions[cls.section_key][cls.create_key]
-
-            if create_section[cls.enabled_key] is not True:
-                raise PermissionDenied(f"{cls.verbose_name}: Creating is disabled")
+            max_auto_reject = create_section[cls.max_auto_reject]
+            min_auto_reject = create_section[cls.min_auto_reject]
         except KeyError as e:
             raise PermissionDenied(f"{cls.verbose_name}: Missing required permission {e}")
 
+        # Значения сравниваются с целым числом секунд
+        for value in (min_auto_reject, max_auto_reject):
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                raise MalformedPermission(
+                    f"{cls.verbose_name}: Error in min_auto_reject or in max_auto_reject permission"
+                )
+
+        return min_auto_reject, max_auto_reject
+
     @classmethod
-    def enforce_confirm(cls, *, permissions: dict, service_name: str):
-        if cls._is_root(permissions=permissions):
-            return
+    def _compile_services(cls, permissions: Any, action_key: str, action_name: str) -> frozenset[str]:
+        action_section = cls._get_section(permissions, cls.section_key, action_key)
 
-        cls._check_access(permissions=permissions)
+        if not cls._get_enabled(action_section):
+            raise PermissionDenied(f"{cls.verbose_name}: {action_name} is disabled")
 
         try:
-            confirm_section = permissions[cls.section_key][cls.confirm_key]
+            services = action_section[cls.list_services_key]
+        except KeyError as e:
+            raise PermissionDenied(f"{cls.verbose_name}: Missing required permission {e}")
 
-            if confirm_section[cls.enabled_key] is not True:
-                raise PermissionDenied(f"{cls.verbose_name}: Confirm is disabled")
+        if not isinstance(services, list) or not all(isinstance(service, str) for service in services):
+            raise MalformedPermission(f"{cls.verbose_name}: Error in {action_key} services permission")
 
-            if service_name not in confirm_section[cls.list_services_key]:
-                raise PermissionDenied(f"{cls.verbose_name}: No access to confirm the transaction from another service")
+        return frozenset(services)
 
-        except KeyError as e:
-            raise PermissionDenied(f"{cls.verbose_name}: Missing required permission {e}")
+    @classmethod
+    def _is_root(cls, *, permissions: Any) -> bool:
+        try:
+            return permissions[cls.root_key] is True
+        except (KeyError, TypeError):
+            return False
 
     @classmethod
-    def enforce_reject(cls, *, permissions: dict, service_name: str):
+    def _get_policy(cls, *, permissions: "dict | PermissionsPolicy") -> SectionPolicy | None:
+        """Возвращает политику секции или None, если у сервиса есть все разрешения"""
+        if isinstance(permissions, PermissionsPolicy):
+            if permissions.root:
+                return None
+
+            return permissions.sections[cls.section_key]
+
         if cls._is_root(permissions=permissions):
+            return None
+
+        return cls.compile(permissions)[0]
+
+    @classmethod
+    def enforce_access(cls, *, permissions: "dict | PermissionsPolicy"):
+        policy = cls._get_policy(permissions=permissions)
+
+        if policy is not None and policy.access_error is not None:
+            raise PermissionDenied(policy.access_error)
+
+    @classmethod
+    def enforce_amount(cls, *, permissions: "dict | PermissionsPolicy", amount: Decimal | int):
+        policy = cls._get_policy(permissions=permissions)
+
+        if policy is None:
             return
 
-        cls._check_access(permissions=permissions)
+        if policy.amount_error is not None:
+            raise PermissionDenied(policy.amount_error)
 
-        try:
-            reject_section = permissions[cls.section_key][cls.reject_key]
+        if not (policy.min_amount <= amount <= policy.max_amount):
+            raise PermissionDenied(f"{cls.verbose_name}: Amount is out of range")
 
-            if reject_section[cls.enabled_key] is not True:
-                raise PermissionDenied(f"{cls.verbose_name}: Reject is disabled")
+    @classmethod
+    def enforce_create(cls, *, permissions: "dict | PermissionsPolicy"):
+        policy = cls._get_policy(permissions=permissions)
 
-            if service_name not in reject_section[cls.list_services_key]:
-                raise PermissionDenied(f"{cls.verbose_name}: No access to reject the transaction from another service")
+        if policy is not None and policy.create_error is not None:
+            raise PermissionDenied(policy.create_error)
 
-        except KeyError as e:
-            raise PermissionDenied(f"{cls.verbose_name}: Missing required permission {e}")
+    @classmethod
+    def enforce_instant(cls, *, permissions: "dict | PermissionsPolicy"):
+        """Создание сразу подтвержденной транзакции, в дополнение к enforce_create"""
+        policy = cls._get_policy(permissions=permissions)
+
+        if policy is not None and policy.instant_error is not None:
+            raise PermissionDenied(policy.instant_error)
 
     @classmethod
-    def enforce_auto_reject_timeout(cls, *, permissions: dict, auto_reject: int):
-        if cls._is_root(permissions=permissions):
+    def enforce_confirm(cls, *, permissions: "dict | PermissionsPolicy", service_name: str):
+        policy = cls._get_policy(permissions=permissions)
+
+        if policy is None:
             return
 
-        cls._check_access(permissions=permissions)
+        if policy.confirm_error is not None:
+            raise PermissionDenied(policy.confirm_error)
 
-        try:
-            create_section = permissions[cls.section_key][cls.create_key]
+        if service_name not in policy.confirm_services:
+            raise PermissionDenied(f"{cls.verbose_name}: No access to confirm the transaction from another service")
 
-            max_auto_reject = create_section[cls.max_auto_reject]
-            min_auto_reject = create_section[cls.min_auto_reject]
+    @classmethod
+    def enforce_reject(cls, *, permissions: "dict | PermissionsPolicy", service_name: str):
+        policy = cls._get_policy(permissions=permissions)
 
-            if not (min_auto_reject < auto_reject < max_auto_reject):
-                raise PermissionDenied(f"{cls.verbose_name}: Auto reject timeout is out of range")
-        except KeyError as e:
-            raise PermissionDenied(f"{cls.verbose_name}: Missing required permission {e}")
-        except TypeError:
-            raise PermissionDenied(f"{cls.verbose_name}: Error in min_auto_reject or in max_auto_reject permission")
+        if policy is None:
+            return
+
+        if policy.reject_error is not None:
+            raise PermissionDenied(policy.reject_error)
+
+        if service_name not in policy.reject_services:
+            raise PermissionDenied(f"{cls.verbose_name}: No access to reject the transaction from another service")
+
+    @classmethod
+    def enforce_auto_reject_timeout(cls, *, permissions: "dict | PermissionsPolicy", auto_reject: int):
+        policy = cls._get_policy(permissions=permissions)
+
+        if policy is None:
+            return
+
+        if policy.auto_reject_error is not None:
+            raise PermissionDenied(policy.auto_reject_error)
+
+        if not (policy.min_auto_reject < auto_reject < policy.max_auto_reject):
+            raise PermissionDenied(f"{cls.verbose_name}: Auto reject timeout is out of range")
 
 
 class AdjustmentsPermissionsService(BasePermission):
@@ -197,20 +400,19 @@ class HoldersPermissionsService(BasePermission):
     verbose_name = "holders"
     section_key = "holders"
 
-    update_key = "update"
-
     @classmethod
-    def enforce_update(cls, *, permissions: dict):
-        if cls._is_root(permissions=permissions):
-            return
-
-        cls._check_access(permissions=permissions)
+    def enforce_update(cls, *, permissions: "dict | PermissionsPolicy"):
+        policy = cls._get_policy(permissions=permissions)
 
-        try:
-            update_section = permissions[cls.section_key][cls.update_key]
+        if policy is not None and policy.update_error is not None:
+            raise PermissionDenied(policy.update_error)
 
-            if update_section[cls.enabled_key] is not True:
-                raise PermissionDenied(f"{cls.verbose_name}: Update is disabled")
 
-        except KeyError as e:
-            raise PermissionDenied(f"{cls.verbose_name}: Missing required permission {e}")
+PERMISSIONS_SERVICES: tuple[type[BasePermission], ...] = (
+    AdjustmentsPermissionsService,
+    ExchangesPermissionsService,
+    TransfersPermissionsService,
+    AccountsPermissionsService,
+    CurrencyUnitsPermissionsService,
+    HoldersPermissionsService,
+)
@@ -3,5 +3,8 @@ from .adjustments import AdjustmentsService  # noqa F401
 from .currency_services import CurrencyServicesService  # noqa F401
 from .exchanges import ExchangesService  # noqa F401
 from .holders import HoldersService, HoldersTypeService  # noqa F401
+from .ledger import LedgerService  # noqa F401
+from .partitions import PartitionsService  # noqa F401
+from .references import ReferencesService  # noqa F401
 from .transactions import TransactionsService  # noqa F401
 from .transfers import TransfersService  # noqa F401
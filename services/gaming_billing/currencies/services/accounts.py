@@ -1,8 +1,57 @@
+import random
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Collection, Iterable
+
 import django_filters
-from currencies.models import CheckingAccount, CurrencyUnit, Holder
+from common.utils import retry_on_serialization_error
+from currencies.cache import BalanceShardsCache
+from currencies.models import (
+    CheckingAccount,
+    CheckingAccountShard,
+    CurrencyUnit,
+    Holder,
+    LedgerEntry,
+)
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import (
+    Case,
+    DateTimeField,
+    DecimalField,
+    F,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 
 class AccountsService:
+    """
+    У счетов с очень частыми зачислениями (казна сервера, призовые фонды) можно включить шарды зачислений -
+    set_balance_shards. Зачисления на такой счёт распределяются по строкам CheckingAccountShard и не ждут
+    друг друга на одной строке счета, чтение счета складывает шарды (CheckingAccount.balance), списание
+    сначала сворачивает шарды в счёт и проверяет сумму целиком, задача fold_account_shards периодически
+    сворачивает шарды всех счетов
+
+    При изоляции read_committed (settings.DATABASE_ISOLATION) каждое изменение счетов сначала блокирует их строки
+    в порядке возрастания id - lock, при serializable конфликты находит сама база
+
+    Каждое изменение суммы счета вместе с заблокированной записывается в журнал LedgerEntry в той же транзакции БД,
+    блокировка средств незакрытой транзакцией и её возврат сумму не меняют и в журнал не попадают
+    """
+
+    ValidationError = ValidationError
+
+    balance_shards = BalanceShardsCache()
+
     @classmethod
     def get_or_create(cls, *, holder: Holder, currency_unit: CurrencyUnit) -> tuple[CheckingAccount, bool]:
         return CheckingAccount.objects.select_related("currency_unit").get_or_create(
@@ -12,17 +61,275 @@ class AccountsService:
     @classmethod
     def get(cls, *, holder: Holder, currency_unit: CurrencyUnit) -> CheckingAccount | None:
         try:
-            return CheckingAccount.objects.select_related("currency_unit").get(
+            return cls._with_shards_amount(CheckingAccount.objects.select_related("currency_unit")).get(
+                holder=holder, currency_unit=currency_unit
+            )
+        except CheckingAccount.DoesNotExist:
+            return None
+
+    @classmethod
+    async def aget(cls, *, holder: Holder, currency_unit: CurrencyUnit) -> CheckingAccount | None:
+        try:
+            return await cls._with_shards_amount(CheckingAccount.objects.select_related("currency_unit")).aget(
                 holder=holder, currency_unit=currency_unit
             )
         except CheckingAccount.DoesNotExist:
             return None
 
+    @classmethod
+    def get_many(
+        cls, *, holder_ids: Iterable[str], unit_symbols: Iterable[str], holder_type_name: str | None = None
+    ) -> dict[tuple[str, str], CheckingAccount]:
+        """
+        Загружает счета для всех сочетаний держателей и валют одним запросом
+
+        Возвращает dict вида {(holder_id, unit_symbol): CheckingAccount}, отсутствующих сочетаний в нём нет
+
+        :param holder_type_name: Если передан - учитываются только держатели этого типа
+        """
+        accounts = cls._with_shards_amount(CheckingAccount.objects.select_related("holder", "currency_unit")).filter(
+            holder__holder_id__in=set(holder_ids), currency_unit__symbol__in=set(unit_symbols)
+        )
+
+        if holder_type_name is not None:
+            accounts = accounts.filter(holder__holder_type__name=holder_type_name)
+
+        return {(account.holder.holder_id, account.currency_unit.symbol): account for account in accounts}
+
+    @classmethod
+    def change_amount(
+        cls,
+        *,
+        checking_account: CheckingAccount,
+        delta: Decimal | int = 0,
+        held_delta: Decimal | int = 0,
+        check_funds: bool = False,
+    ) -> None:
+        """
+        Изменяет сумму и заблокированную сумму счета одним UPDATE, без предварительного чтения счета
+
+        :param check_funds: Сумма не может уйти в минус, проверяется в условии UPDATE
+        :raises ValidationError: Если средств недостаточно, счёт при этом не меняется
+        """
+        cls.change_amounts(
+            deltas={checking_account.pk: delta},
+            held_deltas={checking_account.pk: held_delta},
+            checked_ids=(checking_account.pk,) if check_funds else (),
+        )
+
+    @classmethod
+    def change_amounts(
+        cls,
+        *,
+        deltas: dict[int, Decimal],
+        held_deltas: dict[int, Decimal] | None = None,
+        checked_ids: Collection[int] = (),
+    ) -> None:
+        """
+        Изменяет суммы нескольких счетов одним UPDATE, зачисления на счета с шардами уходят в шарды
+
+        :param deltas: {id счета: изменение суммы}
+        :param held_deltas: {id счета: изменение заблокированной незакрытыми транзакциями суммы}
+        :param checked_ids: id счетов, сумма которых не может уйти в минус после изменения
+        """
+        deltas = {pk: delta for pk, delta in deltas.items() if delta != 0}
+        held_deltas = {pk: delta for pk, delta in (held_deltas or {}).items() if delta != 0}
+
+        ledger_deltas = {pk: deltas.get(pk, 0) + held_deltas.get(pk, 0) for pk in deltas.keys() | held_deltas.keys()}
+
+        balance_shards = cls.balance_shards.get()
+
+        if balance_shards:
+            # Списание со счета с шардами проверяется по сумме вместе с шардами
+            folded_ids = [pk for pk in checked_ids if deltas.get(pk, 0) < 0 and pk in balance_shards]
+            if folded_ids:
+                cls.fold_shards(checking_account_ids=folded_ids)
+
+            for pk, delta in list(deltas.items()):
+                if delta > 0 and pk in balance_shards and pk not in held_deltas:
+                    if cls._add_to_shard(checking_account_id=pk, amount=delta, shards=balance_shards[pk]):
+                        del deltas[pk]
+
+        cls._update_accounts(deltas=deltas, held_deltas=held_deltas, checked_ids=checked_ids)
+        cls._add_ledger_entries(deltas={pk: delta for pk, delta in ledger_deltas.items() if delta != 0})
+
+    @classmethod
+    @retry_on_serialization_error()
+    def set_balance_shards(cls, *, checking_account: CheckingAccount, shards: int) -> None:
+        """
+        Включает шарды зачислений у счета, 0 или 1 - выключает, зачисления из убранных шардов сворачиваются в счёт
+        """
+        with transaction.atomic():
+            if shards > 1:
+                CheckingAccountShard.objects.bulk_create(
+                    [
+                        CheckingAccountShard(checking_account=checking_account, number=number)
+                        for number in range(shards)
+                    ],
+                    ignore_conflicts=True,
+                )
+
+            # Свернутые шарды заблокированы до конца транзакции, зачисление в удаленный шард уйдёт в счёт
+            cls.fold_shards(checking_account_ids=[checking_account.pk])
+            CheckingAccountShard.objects.filter(
+                checking_account=checking_account, number__gte=shards if shards > 1 else 0
+            ).delete()
+
+            CheckingAccount.objects.filter(pk=checking_account.pk).update(balance_shards=shards)
+
+        checking_account.balance_shards = shards
+        cls.balance_shards.invalidate()
+
+    @classmethod
+    def fold_shards(cls, *, checking_account_ids: Collection[int] | None = None) -> int:
+        """
+        Переносит зачисления из шардов в строки счетов, шарды блокируются до конца транзакции
+
+        :param checking_account_ids: Счета, шарды которых сворачиваются, None - все счета
+        Возвращает количество счетов, на которые перенесены зачисления
+        """
+        with transaction.atomic():
+            shards = CheckingAccountShard.objects.select_for_update().order_by("pk")
+
+            if checking_account_ids is not None:
+                shards = shards.filter(checking_account_id__in=checking_account_ids)
+
+            totals: dict[int, Decimal] = defaultdict(Decimal)
+            folded_pks = []
+            for pk, checking_account_id, amount in shards.values_list("pk", "checking_account_id", "amount"):
+                if amount != 0:
+                    totals[checking_account_id] += amount
+                    folded_pks.append(pk)
+
+            CheckingAccountShard.objects.filter(pk__in=folded_pks).update(amount=0)
+            cls._update_accounts(deltas=totals)
+
+        return len(totals)
+
+    @classmethod
+    def lock(cls, *, checking_account_ids: Collection[int]) -> None:
+        """
+        Блокирует строки счетов до конца транзакции в порядке возрастания id
+
+        Нужна при изоляции read_committed: операции с несколькими счетами ждут друг друга в одном порядке
+        и не попадают во взаимную блокировку. Должна вызываться внутри transaction.atomic
+
+        Блокировка FOR NO KEY UPDATE - та же, что берет UPDATE суммы. FOR UPDATE конфликтует с FOR KEY SHARE, которую
+        проверка внешних ключей новой транзакции берет при коммите на второй счет, и перевод A -> B взаимно
+        блокируется с переводом B -> A
+        """
+        list(
+            CheckingAccount.objects.select_for_update(no_key=connection.features.has_select_for_no_key_update)
+            .filter(pk__in=checking_account_ids)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+    @classmethod
+    def _add_to_shard(cls, *, checking_account_id: int, amount: Decimal, shards: int) -> bool:
+        updated = CheckingAccountShard.objects.filter(
+            checking_account_id=checking_account_id, number=random.randrange(shards)
+        ).update(amount=F("amount") + amount)
+
+        # Шарды могли выключить, пока их количество было в кэше
+        return updated > 0
+
+    @classmethod
+    def _update_accounts(
+        cls,
+        *,
+        deltas: dict[int, Decimal],
+        held_deltas: dict[int, Decimal] | None = None,
+        checked_ids: Collection[int] = (),
+    ) -> None:
+        held_deltas = held_deltas or {}
+
+        pks = deltas.keys() | held_deltas.keys()
+
+        if not pks:
+            return
+
+        if settings.DATABASE_ISOLATION == "read_committed":
+            cls.lock(checking_account_ids=pks)
+
+        condition = Q(pk__in=[pk for pk in pks if pk not in checked_ids or pk not in deltas])
+        for pk in checked_ids:
+            if pk in deltas:
+                condition |= Q(pk=pk, amount__gte=-deltas[pk])
+
+        fields: dict[str, Any] = {"updated_at": timezone.now()}
+
+        if deltas:
+            fields["amount"] = F("amount") + cls._deltas_case(deltas)
+
+        if held_deltas:
+            fields["held_amount"] = F("held_amount") + cls._deltas_case(held_deltas)
+
+        updated = CheckingAccount.objects.filter(condition).update(**fields)
+
+        if updated != len(pks):
+            raise ValidationError("Insufficient funds in the checking account")
+
+    @classmethod
+    def _add_ledger_entries(cls, *, deltas: dict[int, Decimal]) -> None:
+        """
+        Записывает изменения в журнал одним INSERT ... SELECT, сумма после изменения берется из только что
+        обновленной строки счета, которая заблокирована до конца транзакции
+        """
+        if not deltas:
+            return
+
+        entries = CheckingAccount.objects.filter(pk__in=deltas).values_list(
+            "pk",
+            cls._deltas_case(deltas),
+            # Зачисления в шарды не блокируют счёт, сумма после них неизвестна
+            Case(
+                When(balance_shards__gt=1, then=Value(None)),
+                default=F("amount") + F("held_amount"),
+                output_field=DecimalField(max_digits=13, decimal_places=4),
+            ),
+            Value(timezone.now(), output_field=DateTimeField()),
+        )
+        select_sql, params = entries.query.sql_with_params()
+
+        columns = ", ".join(
+            connection.ops.quote_name(LedgerEntry._meta.get_field(name).column)
+            for name in ("checking_account", "delta", "balance_after", "created_at")
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {connection.ops.quote_name(LedgerEntry._meta.db_table)} ({columns}) {select_sql}", params
+            )
+
+    @classmethod
+    def _with_shards_amount(cls, queryset: QuerySet[CheckingAccount]) -> QuerySet[CheckingAccount]:
+        shards_amount = (
+            CheckingAccountShard.objects.filter(checking_account=OuterRef("pk"))
+            .values("checking_account")
+            .annotate(total=Sum("amount"))
+            .values("total")
+        )
+
+        return queryset.annotate(
+            shards_amount=Coalesce(
+                Subquery(shards_amount), Value(Decimal(0)), output_field=DecimalField(max_digits=13, decimal_places=4)
+            )
+        )
+
+    @classmethod
+    def _deltas_case(cls, deltas: dict[int, Decimal]) -> Case:
+        return Case(
+            *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+            default=Value(Decimal(0)),
+            output_field=DecimalField(max_digits=13, decimal_places=4),
+        )
+
     @classmethod
     def list(cls, *, filters: dict[str, str] | None = None):
         filters = filters or {}
 
-        queryset = CheckingAccount.objects.all()
+        queryset = cls._with_shards_amount(CheckingAccount.objects.all())
 
         return AccountsFilter(data=filters, queryset=queryset).qs
 
@@ -1,7 +1,8 @@
-import logging
-from datetime import timedelta
+from collections import defaultdict
+from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import Any
+from typing import Any, Sequence
+from uuid import UUID
 
 import django_filters
 from common.utils import get_decimal_places, retry_on_serialization_error
@@ -9,9 +10,12 @@ from currencies.models import AdjustmentTransaction, CheckingAccount, CurrencySe
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import F, QuerySet
+from django.db.models import QuerySet
 from django.utils import timezone
 
+from .accounts import AccountsService
+from .transactions import TransactionsService
+
 
 class AdjustmentsService:
     ValidationError = ValidationError
@@ -26,39 +30,38 @@ class AdjustmentsService:
         amount: Decimal | int,
         description: str,
         auto_reject_timedelta: timedelta = settings.DEFAULT_AUTO_REJECT_TIMEDELTA,
+        instant: bool = False,
+        uuid: UUID | None = None,
     ) -> AdjustmentTransaction:
-        if isinstance(amount, int):
-            amount = Decimal(amount)
-        else:
-            amount = amount.normalize()
-
-        if amount == 0:
-            raise ValidationError({"amount": "The amount cannot be zero"})
-
-        if get_decimal_places(amount) > checking_account.currency_unit.precision:
-            raise ValidationError(
-                f"Число знаков после запятой у валюты больше чем возможно: {amount},"
-                f" максимальная точность {checking_account.currency_unit.precision}"
-            )
+        """
+        :param instant: Создать сразу подтвержденную транзакцию, сумма счета меняется в той же транзакции БД
+        :param uuid: uuid транзакции, выбранный клиентом, по умолчанию генерируется
+        """
+        amount = cls._clean_amount(amount=amount, checking_account=checking_account)
 
         with transaction.atomic():
             # Когда мы тратим валюту (amount < 0) - выводим валюту со счета сразу, чтобы заблокировать её трату до
             # подтверждения транзакции или же вернуть её при отмене транзакции
 
-            abs_amount = abs(amount)
-
-            if amount < 0:
-                if checking_account.currency_unit.is_negative_allowed:
-                    CheckingAccount.objects.filter(pk=checking_account.pk).update(amount=F("amount") - abs_amount)
-                else:
-                    updated = CheckingAccount.objects.filter(pk=checking_account.pk, amount__gte=abs_amount).update(
-                        amount=F("amount") - abs_amount
-                    )
+            if instant:
+                # Мгновенная транзакция меняет сумму сразу и ничего не блокирует
+                AccountsService.change_amount(
+                    checking_account=checking_account,
+                    delta=amount,
+                    check_funds=amount < 0 and not checking_account.currency_unit.is_negative_allowed,
+                )
 
-                    if not updated:
-                        raise ValidationError("Insufficient funds in the checking account")
+                checking_account.refresh_from_db(fields=["amount", "held_amount", "updated_at"])
+            elif amount < 0:
+                # Списание - одно условное обновление счета, без чтения суммы перед ним
+                AccountsService.change_amount(
+                    checking_account=checking_account,
+                    delta=amount,
+                    held_delta=-amount,
+                    check_funds=not checking_account.currency_unit.is_negative_allowed,
+                )
 
-                checking_account.refresh_from_db(fields=["amount", "updated_at"])
+                checking_account.refresh_from_db(fields=["amount", "held_amount", "updated_at"])
 
             currency_transaction = AdjustmentTransaction(
                 service=service,
@@ -66,24 +69,115 @@ class AdjustmentsService:
                 amount=amount,
                 description=description,
                 auto_reject_after=timezone.now() + auto_reject_timedelta,
+                **TransactionsService.get_create_fields(uuid=uuid, instant=instant),
             )
 
-            currency_transaction.full_clean()
-            currency_transaction.save()
+            # Сервис, правило и счета уже загружены, проверка внешних ключей только добавит запросов
+            currency_transaction.full_clean(
+                exclude=["service", "checking_account"], validate_unique=False, validate_constraints=False
+            )
+            TransactionsService.save_new(currency_transaction, uuid=uuid)
 
         return currency_transaction
 
+    @classmethod
+    @retry_on_serialization_error()
+    def create_many(
+        cls, *, service: CurrencyService, items: Sequence[dict[str, Any]]
+    ) -> list[AdjustmentTransaction | ValidationError]:
+        """
+        Пакетное создание транзакций
+
+        Каждый элемент items - dict с ключами checking_account, amount, description и необязательным
+        auto_reject_timedelta. Возвращает список той же длины, где на месте каждого элемента стоит созданная
+        транзакция или ValidationError, из-за которой она не была создана
+        """
+        results: list[AdjustmentTransaction | ValidationError] = []
+        now = timezone.now()
+
+        with transaction.atomic():
+            accounts_ids = {item["checking_account"].pk for item in items}
+
+            # Суммы счетов с шардами проверяются вместе с шардами
+            sharded_ids = accounts_ids & AccountsService.balance_shards.get().keys()
+            if sharded_ids:
+                AccountsService.fold_shards(checking_account_ids=sharded_ids)
+
+            # Проверенные ниже суммы не должны измениться до UPDATE
+            if settings.DATABASE_ISOLATION == "read_committed":
+                AccountsService.lock(checking_account_ids=accounts_ids)
+
+            balances = dict(CheckingAccount.objects.filter(pk__in=accounts_ids).values_list("pk", "amount"))
+
+            deltas: dict[int, Decimal] = defaultdict(Decimal)
+            held_deltas: dict[int, Decimal] = defaultdict(Decimal)
+            checked_ids: set[int] = set()
+            adjustments = []
+
+            for item in items:
+                checking_account: CheckingAccount = item["checking_account"]
+                auto_reject_timedelta = item.get("auto_reject_timedelta", settings.DEFAULT_AUTO_REJECT_TIMEDELTA)
+
+                try:
+                    amount = cls._clean_amount(amount=item["amount"], checking_account=checking_account)
+
+                    if amount < 0 and not checking_account.currency_unit.is_negative_allowed:
+                        if balances[checking_account.pk] + deltas[checking_account.pk] < abs(amount):
+                            raise ValidationError("Insufficient funds in the checking account")
+
+                        checked_ids.add(checking_account.pk)
+
+                    adjustment = AdjustmentTransaction(
+                        service=service,
+                        checking_account=checking_account,
+                        amount=amount,
+                        description=item["description"],
+                        auto_reject_after=now + auto_reject_timedelta,
+                    )
+
+                    # Счета и сервис уже загружены, проверка внешних ключей только добавит запросов
+                    adjustment.full_clean(
+                        exclude=["service", "checking_account"], validate_unique=False, validate_constraints=False
+                    )
+                except ValidationError as e:
+                    results.append(e)
+                    continue
+
+                # Как и в create - списываем валюту сразу, зачисляем только при подтверждении
+                if amount < 0:
+                    deltas[checking_account.pk] += amount
+                    held_deltas[checking_account.pk] -= amount
+
+                adjustments.append(adjustment)
+                results.append(adjustment)
+
+            AccountsService.change_amounts(deltas=deltas, held_deltas=held_deltas, checked_ids=checked_ids)
+            TransactionsService.register_uuids(
+                model=AdjustmentTransaction, uuids=[adjustment.uuid for adjustment in adjustments]
+            )
+            AdjustmentTransaction.objects.bulk_create(adjustments)
+
+        return results
+
     @classmethod
     @retry_on_serialization_error()
     def confirm(cls, *, adjustment_transaction: AdjustmentTransaction, status_description: str):
         with transaction.atomic():
             adjustment_transaction._confirm(status_description)
 
-            # Когда мы добавляем валюту на счет - мы добавляем её только при подтвержденном статусе транзакции
+            # Когда мы добавляем валюту на счет - мы добавляем её только при подтвержденном статусе транзакции,
+            # списанная при создании валюта перестаёт быть заблокированной
             if adjustment_transaction.amount > 0:
-                adjustment_transaction.checking_account.amount = F("amount") + adjustment_transaction.amount
-                adjustment_transaction.checking_account.save(update_fields=["amount", "updated_at"])
-                adjustment_transaction.checking_account.refresh_from_db(fields=["amount", "updated_at"])
+                AccountsService.change_amount(
+                    checking_account=adjustment_transaction.checking_account, delta=adjustment_transaction.amount
+                )
+            else:
+                AccountsService.change_amount(
+                    checking_account=adjustment_transaction.checking_account,
+                    held_delta=adjustment_transaction.amount,
+                )
+
+            adjustment_transaction.checking_account.refresh_from_db(fields=["amount", "held_amount", "updated_at"])
 
         return adjustment_transaction
 
@@ -96,30 +190,150 @@ class AdjustmentsService:
 
             # Возвращаем валюту которая была заблокирована при создании транзакции
             if adjustment_transaction.amount < 0:
-                adjustment_transaction.checking_account.amount = F("amount") + abs(adjustment_transaction.amount)
-                adjustment_transaction.checking_account.save(update_fields=["amount", "updated_at"])
-                adjustment_transaction.checking_account.refresh_from_db(fields=["amount", "updated_at"])
+                AccountsService.change_amount(
+                    checking_account=adjustment_transaction.checking_account,
+                    delta=-adjustment_transaction.amount,
+                    held_delta=adjustment_transaction.amount,
+                )
+                adjustment_transaction.checking_account.refresh_from_db(fields=["amount", "held_amount", "updated_at"])
 
         return adjustment_transaction
 
     @classmethod
-    def reject_all_outdated(cls, *, status_description="Rejected as outdated") -> list[AdjustmentTransaction]:
-        now = timezone.now()
+    @retry_on_serialization_error()
+    def confirm_many(
+        cls, *, adjustment_transactions: Sequence[AdjustmentTransaction], status_description: str
+    ) -> list[AdjustmentTransaction | ValidationError]:
+        """
+        Пакетное подтверждение транзакций, возвращает список той же длины, где на месте каждой транзакции стоит
+        она сама или ValidationError, из-за которой она не была подтверждена
+        """
+        return cls._close_many(
+            adjustment_transactions=adjustment_transactions,
+            status="CONFIRMED",
+            status_description=status_description,
+        )
 
-        transactions = AdjustmentTransaction.objects.filter(status="PENDING", auto_reject_after__lt=now)
+    @classmethod
+    @retry_on_serialization_error()
+    def reject_many(
+        cls, *, adjustment_transactions: Sequence[AdjustmentTransaction], status_description: str
+    ) -> list[AdjustmentTransaction | ValidationError]:
+        """
+        Пакетное отклонение транзакций, возвращает список той же длины, где на месте каждой транзакции стоит
+        она сама или ValidationError, из-за которой она не была отклонена
+        """
+        return cls._close_many(
+            adjustment_transactions=adjustment_transactions,
+            status="REJECTED",
+            status_description=status_description,
+        )
 
-        rejected = []
-        for adjustment in transactions:
-            try:
-                rejected.append(cls.reject(adjustment_transaction=adjustment, status_description=status_description))
-            except cls.ValidationError as e:
-                logging.error(
-                    f"Error on rejecting outdated transfer transactions, transaction {adjustment.uuid}, error {str(e)}"
-                )
+    @classmethod
+    def _close_many(
+        cls, *, adjustment_transactions: Sequence[AdjustmentTransaction], status: str, status_description: str
+    ) -> list[AdjustmentTransaction | ValidationError]:
+        with transaction.atomic():
+            # Статус меняется сразу условным UPDATE, без предварительного чтения статусов
+            closed_rows = TransactionsService.close_pending(
+                model=AdjustmentTransaction,
+                pks=list({adjustment.pk for adjustment in adjustment_transactions}),
+                status=status,
+                status_description=status_description,
+                returning=["closed_at"],
+            )
+            closed_at_by_pk = dict(closed_rows)
+            pending_pks = set(closed_at_by_pk)
+
+            results: list[AdjustmentTransaction | ValidationError] = []
+            deltas: dict[int, Decimal] = defaultdict(Decimal)
+            held_deltas: dict[int, Decimal] = defaultdict(Decimal)
+
+            for adjustment in adjustment_transactions:
+                if adjustment.pk not in pending_pks:
+                    results.append(ValidationError("The transaction has already been closed"))
+                    continue
+
+                # Одна и та же транзакция может прийти в пакете дважды
+                pending_pks.remove(adjustment.pk)
+
+                # При подтверждении зачисляем положительные суммы, при отклонении возвращаем заблокированные,
+                # в обоих случаях отрицательная сумма перестаёт быть заблокированной
+                account_id = adjustment.checking_account_id  # type: ignore _id adds by django
+
+                if status == "CONFIRMED" and adjustment.amount > 0:
+                    deltas[account_id] += adjustment.amount
+                elif adjustment.amount < 0:
+                    held_deltas[account_id] += adjustment.amount
+
+                    if status == "REJECTED":
+                        deltas[account_id] -= adjustment.amount
+
+                adjustment.status = status
+                adjustment.status_description = status_description
+                adjustment.closed_at = closed_at_by_pk[adjustment.pk]
+
+                results.append(adjustment)
+
+            AccountsService.change_amounts(deltas=deltas, held_deltas=held_deltas)
+
+        return results
+
+    @classmethod
+    def reject_all_outdated(
+        cls,
+        *,
+        status_description="Rejected as outdated",
+        chunk_size: int = settings.CURRENCY_REJECT_OUTDATED_CHUNK_SIZE,
+        time_budget: timedelta = settings.CURRENCY_REJECT_OUTDATED_TIME_BUDGET,
+    ) -> list[UUID]:
+        """Отклоняет устаревшие корректировки пачками, см. TransactionsService.reject_all_outdated"""
+        return TransactionsService.reject_all_outdated(
+            reject_chunk=cls._reject_outdated_chunk,
+            status_description=status_description,
+            chunk_size=chunk_size,
+            time_budget=time_budget,
+        )
 
-            # TODO Ошибки сериализации?
+    @classmethod
+    @retry_on_serialization_error()
+    def _reject_outdated_chunk(cls, *, outdated_before: datetime, status_description: str, chunk_size: int):
+        with transaction.atomic():
+            rows = TransactionsService.reject_outdated_chunk(
+                model=AdjustmentTransaction,
+                outdated_before=outdated_before,
+                status_description=status_description,
+                returning=["checking_account", "amount"],
+                chunk_size=chunk_size,
+            )
+
+            # Возвращаем валюту, заблокированную при создании транзакций
+            deltas: dict[int, Decimal] = defaultdict(Decimal)
+            for _, account_id, amount in rows:
+                if amount < 0:
+                    deltas[account_id] += abs(amount)
+
+            AccountsService.change_amounts(deltas=deltas, held_deltas={pk: -delta for pk, delta in deltas.items()})
+
+        return [uuid for uuid, *_ in rows]
+
+    @classmethod
+    def _clean_amount(cls, *, amount: Decimal | int, checking_account: CheckingAccount) -> Decimal:
+        if isinstance(amount, int):
+            amount = Decimal(amount)
+        else:
+            amount = amount.normalize()
+
+        if amount == 0:
+            raise ValidationError({"amount": "The amount cannot be zero"})
+
+        if get_decimal_places(amount) > checking_account.currency_unit.precision:
+            raise ValidationError(
+                f"Число знаков после запятой у валюты больше чем возможно: {amount},"
+                f" максимальная точность {checking_account.currency_unit.precision}"
+            )
 
-        return rejected
+        return amount
 
     @classmethod
     def list(cls, *, filters: dict[str, Any] | None = None) -> QuerySet[AdjustmentTransaction]:
@@ -1,7 +1,8 @@
-import logging
-from datetime import timedelta
+from collections import defaultdict
+from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Any
+from uuid import UUID
 
 import django_filters
 from common.utils import get_decimal_places, retry_on_serialization_error
@@ -15,10 +16,11 @@ from currencies.models import (
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import F, QuerySet
+from django.db.models import QuerySet
 from django.utils import timezone
 
 from .accounts import AccountsService
+from .transactions import TransactionsService
 
 
 class ExchangesService:
@@ -37,7 +39,13 @@ class ExchangesService:
         from_amount: Decimal | int,
         description: str,
         auto_reject_timedelta: timedelta = settings.DEFAULT_AUTO_REJECT_TIMEDELTA,
+        instant: bool = False,
+        uuid: UUID | None = None,
     ):
+        """
+        :param instant: Создать сразу подтвержденную транзакцию, суммы обоих счетов меняются одним UPDATE
+        :param uuid: uuid транзакции, выбранный клиентом, по умолчанию генерируется
+        """
         if isinstance(from_amount, int):
             from_amount = Decimal(from_amount)
         else:
@@ -95,12 +103,20 @@ class ExchangesService:
             if to_account is None:
                 raise ValidationError("To checking account not found")
 
-            if from_account.amount < from_amount:
+            # Списание и проверка средств одним условным UPDATE, сумма из загруженного счета может быть устаревшей
+            try:
+                if instant:
+                    AccountsService.change_amounts(
+                        deltas={from_account.pk: -from_amount, to_account.pk: to_amount},
+                        checked_ids=(from_account.pk,),
+                    )
+                else:
+                    AccountsService.change_amount(
+                        checking_account=from_account, delta=-from_amount, held_delta=from_amount, check_funds=True
+                    )
+            except ValidationError:
                 raise ValidationError("Insufficient funds in the 'from' checking account")
 
-            from_account.amount = F("amount") - from_amount
-            from_account.save(update_fields=["amount", "updated_at"])
-
             exchange_transaction = ExchangeTransaction(
                 service=service,
                 description=description,
@@ -110,10 +126,16 @@ class ExchangesService:
                 to_checking_account=to_account,
                 from_amount=from_amount,
                 to_amount=to_amount,
+                **TransactionsService.get_create_fields(uuid=uuid, instant=instant),
             )
 
-            exchange_transaction.full_clean()
-            exchange_transaction.save()
+            # Сервис, правило и счета уже загружены, проверка внешних ключей только добавит запросов
+            exchange_transaction.full_clean(
+                exclude=["service", "exchange_rule", "from_checking_account", "to_checking_account"],
+                validate_unique=False,
+                validate_constraints=False,
+            )
+            TransactionsService.save_new(exchange_transaction, uuid=uuid)
 
         return exchange_transaction
 
@@ -123,9 +145,13 @@ class ExchangesService:
         with transaction.atomic():
             exchange_transaction._confirm(status_description)
 
-            to_checking_account = exchange_transaction.to_checking_account
-            to_checking_account.amount = F("amount") + exchange_transaction.to_amount
-            to_checking_account.save(update_fields=["amount", "updated_at"])
+            from_account_id = exchange_transaction.from_checking_account_id  # type: ignore _id adds by django
+            to_account_id = exchange_transaction.to_checking_account_id  # type: ignore _id adds by django
+
+            AccountsService.change_amounts(
+                deltas={to_account_id: exchange_transaction.to_amount},
+                held_deltas={from_account_id: -exchange_transaction.from_amount},
+            )
 
         return exchange_transaction
 
@@ -135,30 +161,49 @@ class ExchangesService:
         with transaction.atomic():
             exchange_transaction._reject(status_description)
 
-            from_checking_account = exchange_transaction.from_checking_account
-            from_checking_account.amount = F("amount") + exchange_transaction.from_amount
-            from_checking_account.save(update_fields=["amount", "updated_at"])
+            AccountsService.change_amount(
+                checking_account=exchange_transaction.from_checking_account,
+                delta=exchange_transaction.from_amount,
+                held_delta=-exchange_transaction.from_amount,
+            )
 
         return exchange_transaction
 
     @classmethod
-    def reject_all_outdated(cls, *, status_description="Rejected as outdated") -> list[ExchangeTransaction]:
-        now = timezone.now()
+    def reject_all_outdated(
+        cls,
+        *,
+        status_description="Rejected as outdated",
+        chunk_size: int = settings.CURRENCY_REJECT_OUTDATED_CHUNK_SIZE,
+        time_budget: timedelta = settings.CURRENCY_REJECT_OUTDATED_TIME_BUDGET,
+    ) -> list[UUID]:
+        """Отклоняет устаревшие обмены пачками, см. TransactionsService.reject_all_outdated"""
+        return TransactionsService.reject_all_outdated(
+            reject_chunk=cls._reject_outdated_chunk,
+            status_description=status_description,
+            chunk_size=chunk_size,
+            time_budget=time_budget,
+        )
 
-        transactions = ExchangeTransaction.objects.filter(status="PENDING", auto_reject_after__lt=now)
+    @classmethod
+    @retry_on_serialization_error()
+    def _reject_outdated_chunk(cls, *, outdated_before: datetime, status_description: str, chunk_size: int):
+        with transaction.atomic():
+            rows = TransactionsService.reject_outdated_chunk(
+                model=ExchangeTransaction,
+                outdated_before=outdated_before,
+                status_description=status_description,
+                returning=["from_checking_account", "from_amount"],
+                chunk_size=chunk_size,
+            )
 
-        rejected = []
-        for exchange in transactions:
-            try:
-                rejected.append(cls.reject(exchange_transaction=exchange, status_description=status_description))
-            except cls.ValidationError as e:
-                logging.error(
-                    f"Error on rejecting outdated transfer transactions, transaction {exchange.uuid}, error {str(e)}"
-                )
+            deltas: dict[int, Decimal] = defaultdict(Decimal)
+            for _, account_id, from_amount in rows:
+                deltas[account_id] += from_amount
 
-            # TODO Ошибки сериализации?
+            AccountsService.change_amounts(deltas=deltas, held_deltas={pk: -delta for pk, delta in deltas.items()})
 
-        return rejected
+        return [uuid for uuid, *_ in rows]
 
     @classmethod
     def list(cls, *, filters: dict[str, Any] | None = None) -> QuerySet[ExchangeTransaction]:
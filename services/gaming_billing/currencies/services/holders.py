@@ -1,10 +1,14 @@
 from typing import Any
 
 import django_filters
+from asgiref.sync import sync_to_async
 from common.services import model_update
 from currencies.models import Holder, HolderType
+from django.conf import settings
 from django.db.models import QuerySet
 
+from .references import ReferencesService
+
 
 class HoldersService:
     @classmethod
@@ -23,6 +27,17 @@ class HoldersService:
         except Holder.DoesNotExist:
             return None
 
+    @classmethod
+    async def aget(cls, *, holder_id: str, holder_type: HolderType | None = None):
+        filters = {"holder_id": holder_id}
+        if holder_type is not None:
+            filters["holder_type"] = holder_type
+
+        try:
+            return await Holder.objects.select_related("holder_type").aget(**filters)
+        except Holder.DoesNotExist:
+            return None
+
     @classmethod
     def update(cls, *, holder: Holder, data: dict) -> tuple[Holder, bool]:
         fields = ["enabled", "info"]
@@ -41,14 +56,25 @@ class HoldersService:
 class HoldersTypeService:
     @classmethod
     def get(cls, *, name: str):
-        try:
-            return HolderType.objects.get(name=name)
-        except HolderType.DoesNotExist:
-            return None
+        return ReferencesService.get_holder_type(name=name)
 
     @classmethod
     def get_default(cls):
-        return HolderType.get_default()
+        holder_type = ReferencesService.get_holder_type(name=settings.CURRENCY_DEFAULT_HOLDER_TYPE_SLUG)
+
+        if holder_type is None:
+            holder_type = HolderType.get_default()
+
+        return holder_type
+
+    @classmethod
+    async def aget_default(cls):
+        holder_type = await ReferencesService.aget_holder_type(name=settings.CURRENCY_DEFAULT_HOLDER_TYPE_SLUG)
+
+        if holder_type is None:
+            holder_type = await sync_to_async(HolderType.get_default)()
+
+        return holder_type
 
 
 class HoldersFilter(django_filters.FilterSet):
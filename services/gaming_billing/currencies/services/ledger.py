@@ -0,0 +1,126 @@
+from datetime import datetime
+from decimal import Decimal
+
+from common.utils import retry_on_serialization_error
+from currencies.models import BalanceSnapshot, CheckingAccount, LedgerEntry
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import OuterRef, QuerySet, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .accounts import AccountsService
+
+
+class LedgerService:
+    """
+    Журнал изменений сумм счетов (LedgerEntry) и периодические снимки сумм (BalanceSnapshot)
+
+    Записи журнала добавляет AccountsService.change_amounts, снимки - задача currencies.tasks.take_balance_snapshots.
+    Сумма счета на момент времени - последний снимок до него и записи после снимка, поэтому запрос читает
+    не больше записей, чем добавляется между снимками
+    """
+
+    ValidationError = ValidationError
+
+    @classmethod
+    def balance_at(cls, *, checking_account: CheckingAccount, at: datetime) -> Decimal:
+        """Сумма счета вместе с заблокированной на момент at, до появления журнала - 0"""
+        snapshot = (
+            BalanceSnapshot.objects.filter(checking_account=checking_account, created_at__lte=at)
+            .order_by("-created_at", "-pk")
+            .values("balance", "last_entry_id")
+            .first()
+        )
+
+        balance, last_entry_id = (snapshot["balance"], snapshot["last_entry_id"]) if snapshot else (Decimal(0), 0)
+
+        entries_sum = LedgerEntry.objects.filter(
+            checking_account=checking_account, pk__gt=last_entry_id, created_at__lte=at
+        ).aggregate(total=Sum("delta"))["total"]
+
+        return balance + (entries_sum or 0)
+
+    @classmethod
+    def statement(
+        cls,
+        *,
+        checking_account: CheckingAccount,
+        created_after: datetime | None = None,
+        created_before: datetime | None = None,
+    ) -> QuerySet[LedgerEntry]:
+        """Записи журнала счета за период от новых к старым"""
+        entries = LedgerEntry.objects.filter(checking_account=checking_account)
+
+        if created_after is not None:
+            entries = entries.filter(created_at__gte=created_after)
+
+        if created_before is not None:
+            entries = entries.filter(created_at__lte=created_before)
+
+        return entries.order_by("-created_at", "-pk")
+
+    @classmethod
+    def take_snapshots(cls, *, chunk_size: int = settings.CURRENCY_LEDGER_SNAPSHOT_CHUNK_SIZE) -> int:
+        """
+        Сохраняет снимки сумм счетов, у которых появились записи журнала после прошлого снимка
+
+        Счета обходятся пачками по chunk_size в порядке id, каждая пачка в своей транзакции БД.
+        Возвращает количество сохраненных снимков
+        """
+        after_pk = 0
+        taken = 0
+
+        while True:
+            after_pk, count, chunk_taken = cls._take_snapshots_chunk(after_pk=after_pk, chunk_size=chunk_size)
+            taken += chunk_taken
+
+            if count < chunk_size:
+                return taken
+
+    @classmethod
+    @retry_on_serialization_error()
+    def _take_snapshots_chunk(cls, *, after_pk: int, chunk_size: int) -> tuple[int, int, int]:
+        pks = list(
+            CheckingAccount.objects.filter(pk__gt=after_pk).order_by("pk").values_list("pk", flat=True)[:chunk_size]
+        )
+
+        if not pks:
+            return after_pk, 0, 0
+
+        with transaction.atomic():
+            changed = list(
+                cls._with_last_entries(CheckingAccount.objects.filter(pk__in=pks))
+                .filter(last_entry_id__gt=Coalesce("snapshot_entry_id", Value(0)))
+                .values_list("pk", flat=True)
+            )
+
+            if changed:
+                # Пока строки счетов и шарды заблокированы, новых записей журнала по этим счетам нет
+                AccountsService.lock(checking_account_ids=changed)
+                AccountsService.fold_shards(checking_account_ids=changed)
+
+                accounts = cls._with_last_entries(CheckingAccount.objects.filter(pk__in=changed)).values_list(
+                    "pk", "amount", "held_amount", "last_entry_id"
+                )
+
+                BalanceSnapshot.objects.bulk_create(
+                    BalanceSnapshot(checking_account_id=pk, balance=amount + held_amount, last_entry_id=last_entry_id)
+                    for pk, amount, held_amount, last_entry_id in accounts
+                )
+
+        return pks[-1], len(pks), len(changed)
+
+    @classmethod
+    def _with_last_entries(cls, queryset: QuerySet[CheckingAccount]) -> QuerySet[CheckingAccount]:
+        """id последней записи журнала счета и последней записи, учтенной в снимке"""
+        return queryset.annotate(
+            last_entry_id=Subquery(
+                LedgerEntry.objects.filter(checking_account=OuterRef("pk")).order_by("-pk").values("pk")[:1]
+            ),
+            snapshot_entry_id=Subquery(
+                BalanceSnapshot.objects.filter(checking_account=OuterRef("pk"))
+                .order_by("-created_at", "-pk")
+                .values("last_entry_id")[:1]
+            ),
+        )
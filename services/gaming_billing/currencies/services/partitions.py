@@ -0,0 +1,256 @@
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from currencies.models import (
+    AdjustmentTransaction,
+    BaseTransaction,
+    ExchangeTransaction,
+    TransactionUUID,
+    TransferTransaction,
+)
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.utils import timezone
+
+
+class PartitionsService:
+    """
+    Помесячные партиции таблиц транзакций по created_at, только Postgres
+
+    Партиция месяца называется <таблица>_pYYYY_MM, строки вне созданных партиций попадают в партицию <таблица>_default
+    """
+
+    ValidationError = ValidationError
+
+    MODELS: tuple[type[BaseTransaction], ...] = (AdjustmentTransaction, TransferTransaction, ExchangeTransaction)
+    AHEAD_MONTHS = 3
+
+    @classmethod
+    def is_partitioned(cls, model: type[BaseTransaction]) -> bool:
+        if connection.vendor != "postgresql":
+            return False
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+                [model._meta.db_table],
+            )
+            return cursor.fetchone()[0]
+
+    @classmethod
+    def tables_partitioned(cls) -> bool:
+        return all(cls.is_partitioned(model) for model in cls.MODELS)
+
+    @classmethod
+    def partition(cls, model: type[BaseTransaction], *, schema_editor, ahead_months: int = AHEAD_MONTHS):
+        """
+        Пересоздает таблицу партиционированной по месяцам created_at и копирует в нее строки
+
+        Первичный ключ партиционированной таблицы - (uuid, created_at), Postgres требует ключ партиции в уникальных
+        индексах, поэтому uuid существующих строк занимаются в TransactionUUID. Партиции создаются с месяца самой
+        старой транзакции по текущий месяц + ahead_months
+        """
+        created_at = cls._quote_column(model, "created_at")
+
+        legacy_table = cls._recreate_table(
+            model, schema_editor=schema_editor, suffix=f"PARTITION BY RANGE ({created_at})"
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT min({created_at}) FROM {connection.ops.quote_name(legacy_table)}")
+            oldest = cursor.fetchone()[0] or timezone.now()
+
+        schema_editor.execute(
+            f"CREATE TABLE {connection.ops.quote_name(f'{model._meta.db_table}_default')} PARTITION OF"
+            f" {connection.ops.quote_name(model._meta.db_table)} DEFAULT"
+        )
+        cls.create_partitions(model, start=cls._month(oldest), months=cls._months_between(oldest) + ahead_months + 1)
+
+        cls._copy_and_finish(
+            model, schema_editor=schema_editor, legacy_table=legacy_table, primary_key=("uuid", "created_at")
+        )
+
+        # uuid строк, созданных до того, как TransactionUUID стала занимать uuid всех транзакций
+        schema_editor.execute(
+            f"INSERT INTO {connection.ops.quote_name(TransactionUUID._meta.db_table)} (transaction_type, uuid)"
+            f" SELECT %s, {cls._quote_column(model, 'uuid')} FROM {connection.ops.quote_name(model._meta.db_table)}"
+            " ON CONFLICT DO NOTHING",
+            [model._meta.model_name],
+        )
+
+    @classmethod
+    def unpartition(cls, model: type[BaseTransaction], *, schema_editor):
+        """Пересоздает таблицу обычной со строками всех присоединенных партиций, отсоединенные партиции не копируются"""
+        legacy_table = cls._recreate_table(model, schema_editor=schema_editor, suffix="")
+
+        cls._copy_and_finish(model, schema_editor=schema_editor, legacy_table=legacy_table, primary_key=("uuid",))
+
+    @classmethod
+    def create_upcoming(cls, *, ahead_months: int = AHEAD_MONTHS) -> list[str]:
+        """Создает партиции всех таблиц транзакций с текущего месяца по текущий + ahead_months"""
+        today = timezone.now().date()
+
+        return [
+            name for model in cls.MODELS for name in cls.create_partitions(model, start=today, months=ahead_months + 1)
+        ]
+
+    @classmethod
+    def create_partitions(cls, model: type[BaseTransaction], *, start: date, months: int) -> list[str]:
+        """
+        Создает недостающие партиции months месяцев начиная с месяца start, возвращает имена созданных
+
+        Если в партиции default уже есть строки месяца новой партиции, Postgres откажет в создании - партиции нужно
+        создавать заранее, например задачей currencies.tasks.create_transaction_partitions
+        """
+        existing = cls.list_partitions(model)
+        table = connection.ops.quote_name(model._meta.db_table)
+
+        created = []
+        with connection.cursor() as cursor:
+            for number in range(months):
+                month = cls._add_months(cls._month(start), number)
+                if month in existing:
+                    continue
+
+                name = cls._partition_name(model, month)
+                cursor.execute(
+                    f"CREATE TABLE {connection.ops.quote_name(name)} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)",
+                    list(cls.month_bounds(month)),
+                )
+                created.append(name)
+
+        return created
+
+    @classmethod
+    def detach_partitions(cls, model: type[BaseTransaction], *, before: date, drop: bool = False) -> list[str]:
+        """
+        Отсоединяет партиции месяцев до before, с drop - удаляет их, возвращает имена партиций
+
+        Закрытые транзакции уходят из таблицы без суммирующих корректировок, для удаления старых месяцев с сохранением
+        сумм используйте схлопывание currencies.tasks.collapse_all_old_transactions - оно удаляет партиции само
+        """
+        return [
+            cls.detach_month(model, month, drop=drop)
+            for month in sorted(cls.list_partitions(model))
+            if month < cls._month(before)
+        ]
+
+    @classmethod
+    def detach_month(cls, model: type[BaseTransaction], month: date, *, drop: bool = False) -> str:
+        """
+        Отсоединяет партицию месяца, с drop - удаляет её, возвращает имя партиции
+
+        PENDING транзакции месяца переносятся в партицию default и остаются в таблице. Должен вызываться внутри
+        transaction.atomic, до коммита таблица транзакций заблокирована целиком
+        """
+        table = connection.ops.quote_name(model._meta.db_table)
+        name = cls._partition_name(model, month)
+        status = cls._quote_column(model, "status")
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {connection.ops.quote_name(name)}")
+
+            # Диапазон месяца больше не занят партицией, строки попадают в default
+            cursor.execute(
+                f"INSERT INTO {table} SELECT * FROM {connection.ops.quote_name(name)} WHERE {status} = %s",
+                ["PENDING"],
+            )
+
+            if drop:
+                cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)}")
+            else:
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(name)} WHERE {status} = %s", ["PENDING"])
+
+        return name
+
+    @classmethod
+    def lock_month(cls, model: type[BaseTransaction], month: date):
+        """Блокирует изменение строк партиции месяца до конца транзакции БД, чтение не блокируется"""
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {connection.ops.quote_name(cls._partition_name(model, month))} IN SHARE MODE")
+
+    @classmethod
+    def months_before(cls, model: type[BaseTransaction], *, before: datetime) -> list[date]:
+        """Месяцы присоединенных партиций, которые целиком раньше before"""
+        return sorted(month for month in cls.list_partitions(model) if cls.month_bounds(month)[1] <= before)
+
+    @classmethod
+    def month_bounds(cls, month: date) -> tuple[datetime, datetime]:
+        """Начало месяца и начало следующего - диапазон created_at партиции месяца"""
+        return cls._month_start(month), cls._month_start(cls._add_months(month, 1))
+
+    @classmethod
+    def list_partitions(cls, model: type[BaseTransaction]) -> set[date]:
+        """Месяцы присоединенных помесячных партиций"""
+        pattern = re.compile(rf"^{re.escape(model._meta.db_table)}_p(\d{{4}})_(\d{{2}})$")
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+                " WHERE pg_inherits.inhparent = to_regclass(%s)",
+                [model._meta.db_table],
+            )
+            names = [row[0] for row in cursor.fetchall()]
+
+        return {date(int(match[1]), int(match[2]), 1) for name in names if (match := pattern.match(name))}
+
+    @classmethod
+    def _recreate_table(cls, model: type[BaseTransaction], *, schema_editor, suffix: str) -> str:
+        # Индексы и ограничения переименованной таблицы удаляются вместе с ней, имена освобождаются для новой
+        table = model._meta.db_table
+        legacy_table = f"{table}_legacy"
+
+        schema_editor.execute(
+            f"ALTER TABLE {connection.ops.quote_name(table)} RENAME TO {connection.ops.quote_name(legacy_table)}"
+        )
+        schema_editor.execute(
+            f"CREATE TABLE {connection.ops.quote_name(table)}"
+            f" (LIKE {connection.ops.quote_name(legacy_table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) {suffix}"
+        )
+
+        return legacy_table
+
+    @classmethod
+    def _copy_and_finish(
+        cls, model: type[BaseTransaction], *, schema_editor, legacy_table: str, primary_key: tuple[str, ...]
+    ):
+        table = connection.ops.quote_name(model._meta.db_table)
+
+        schema_editor.execute(f"INSERT INTO {table} SELECT * FROM {connection.ops.quote_name(legacy_table)}")
+        schema_editor.execute(f"DROP TABLE {connection.ops.quote_name(legacy_table)}")
+
+        columns = ", ".join(cls._quote_column(model, name) for name in primary_key)
+        schema_editor.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({columns})")
+
+        for sql in schema_editor._model_indexes_sql(model):
+            schema_editor.execute(sql)
+
+        for field in model._meta.local_fields:
+            if field.remote_field and field.db_constraint:
+                schema_editor.execute(schema_editor._create_fk_sql(model, field, "_fk_%(to_table)s_%(to_column)s"))
+
+    @classmethod
+    def _partition_name(cls, model: type[BaseTransaction], month: date) -> str:
+        return f"{model._meta.db_table}_p{month:%Y_%m}"
+
+    @classmethod
+    def _quote_column(cls, model: type[BaseTransaction], name: str) -> str:
+        return connection.ops.quote_name(model._meta.get_field(name).column)
+
+    @classmethod
+    def _month(cls, value: date) -> date:
+        return date(value.year, value.month, 1)
+
+    @classmethod
+    def _add_months(cls, month: date, months: int) -> date:
+        year, month_index = divmod(month.year * 12 + month.month - 1 + months, 12)
+        return date(year, month_index + 1, 1)
+
+    @classmethod
+    def _months_between(cls, since: date) -> int:
+        today = timezone.now().date()
+        return (today.year - since.year) * 12 + today.month - since.month
+
+    @classmethod
+    def _month_start(cls, month: date) -> datetime:
+        return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
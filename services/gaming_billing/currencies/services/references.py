@@ -0,0 +1,50 @@
+from currencies.cache import ReferenceCache
+from currencies.models import CurrencyUnit, ExchangeRule, HolderType, TransferRule
+
+
+class ReferencesService:
+    """
+    Справочные данные - валюты, правила переводов и обменов, типы держателей
+
+    Меняются редко, поэтому берутся из кэша процесса, кэш сбрасывается сигналами в currencies.signals
+    """
+
+    currency_units = ReferenceCache(model=CurrencyUnit, slug_field="symbol")
+    transfer_rules = ReferenceCache(model=TransferRule, slug_field="name", select_related=("unit",))
+    exchange_rules = ReferenceCache(model=ExchangeRule, slug_field="name", select_related=("first_unit", "second_unit"))
+    holder_types = ReferenceCache(model=HolderType, slug_field="name")
+
+    @classmethod
+    def get_currency_unit(cls, *, symbol: str) -> CurrencyUnit | None:
+        return cls.currency_units.get(symbol)
+
+    @classmethod
+    def get_transfer_rule(cls, *, name: str) -> TransferRule | None:
+        return cls.transfer_rules.get(name)
+
+    @classmethod
+    def get_exchange_rule(cls, *, name: str) -> ExchangeRule | None:
+        return cls.exchange_rules.get(name)
+
+    @classmethod
+    def get_holder_type(cls, *, name: str) -> HolderType | None:
+        return cls.holder_types.get(name)
+
+    @classmethod
+    async def aget_currency_unit(cls, *, symbol: str) -> CurrencyUnit | None:
+        return await cls.currency_units.aget(symbol)
+
+    @classmethod
+    async def aget_holder_type(cls, *, name: str) -> HolderType | None:
+        return await cls.holder_types.aget(name)
+
+    @classmethod
+    def invalidate(cls) -> None:
+        for cache in (cls.currency_units, cls.transfer_rules, cls.exchange_rules, cls.holder_types):
+            cache.invalidate()
+
+    @classmethod
+    def reset(cls) -> None:
+        """Сбрасывает кэши только этого процесса"""
+        for cache in (cls.currency_units, cls.transfer_rules, cls.exchange_rules, cls.holder_types):
+            cache.reset()
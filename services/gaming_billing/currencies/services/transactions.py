@@ -1,113 +1,422 @@
+import time
 from collections import defaultdict
-from datetime import datetime, timedelta
-from itertools import chain
-from typing import Sequence
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Sequence
+from uuid import UUID
 
 from common.utils import retry_on_serialization_error
 from currencies.models import (
     AdjustmentTransaction,
+    BaseTransaction,
+    CurrencyService,
     ExchangeTransaction,
+    TransactionUUID,
     TransferTransaction,
 )
-from django.db import transaction
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
 from django.db.models import F, Q, Sum
 from django.utils import timezone
 
+from .partitions import PartitionsService
+
 
 class TransactionsService:
+    INSTANT_STATUS_DESCRIPTION = "Confirmed on creation"
 
     @classmethod
-    def collapse_old_transactions(cls, *, old_than_timedelta: timedelta, service_names: Sequence[str]):
-        now = timezone.now()
-        cutoff_date = now - old_than_timedelta
+    def get_create_fields(cls, *, uuid: UUID | None = None, instant: bool = False) -> dict[str, Any]:
+        """
+        Поля новой транзакции: uuid, выбранный клиентом, и статус мгновенной (instant) транзакции,
+        которая создается сразу подтвержденной
+        """
+        fields: dict[str, Any] = {}
 
-        # Cуммы для AdjustmentTransaction
-        adjustment_sums = (
-            AdjustmentTransaction.objects.filter(
-                created_at__lt=cutoff_date, status="CONFIRMED", service__name__in=service_names
+        if uuid is not None:
+            fields["uuid"] = uuid
+
+        if instant:
+            fields.update(
+                status="CONFIRMED", status_description=cls.INSTANT_STATUS_DESCRIPTION, closed_at=timezone.now()
             )
-            .values("checking_account", "service")
-            .annotate(total_amount=Sum("amount"))
+
+        return fields
+
+    @classmethod
+    def save_new(cls, currency_transaction: BaseTransaction, *, uuid: UUID | None = None) -> None:
+        """
+        Сохраняет новую транзакцию, должна вызываться внутри transaction.atomic
+
+        :param uuid: uuid, выбранный клиентом, если он уже занят - ValidationError вместо IntegrityError
+        """
+        try:
+            cls.register_uuids(model=type(currency_transaction), uuids=[currency_transaction.uuid])
+            currency_transaction.save(force_insert=True)
+        except IntegrityError:
+            # Внешние ключи проверяются при коммите, при вставке нарушается только уникальность uuid
+            if uuid is None:
+                raise
+
+            raise ValidationError("Transaction with this uuid already exists")
+
+    @classmethod
+    def register_uuids(cls, *, model: type[BaseTransaction], uuids: Sequence[UUID]) -> None:
+        """
+        Занимает uuid новых транзакций строками TransactionUUID, должна вызываться для каждой создаваемой транзакции
+
+        Первичный ключ партиционированной таблицы (uuid, created_at) не ловит повтор uuid с другой датой создания,
+        в том числе uuid, созданного сервисом, а ограничение уникальности TransactionUUID ловит и параллельный повтор
+        """
+        TransactionUUID.objects.bulk_create(
+            TransactionUUID(transaction_type=model._meta.model_name, uuid=uuid) for uuid in uuids
         )
 
-        # Cуммы для TransferTransaction (входящие и исходящие)
-        transfer_sums_in = (
-            TransferTransaction.objects.filter(
-                created_at__lt=cutoff_date, status="CONFIRMED", service__name__in=service_names
-            )
-            .values("service", checking_account=F("to_checking_account"))
-            .annotate(total_amount=Sum("to_amount"))
+    @classmethod
+    def reject_all_outdated(
+        cls,
+        *,
+        reject_chunk: Callable[..., list[UUID]],
+        status_description: str,
+        chunk_size: int,
+        time_budget: timedelta,
+    ) -> list[UUID]:
+        """
+        Отклоняет устаревшие транзакции пачками по chunk_size, каждая пачка в своей транзакции БД
+
+        Пачки берутся, пока очередная не окажется пустой или не истечет time_budget. Неполная пачка не значит,
+        что устаревших транзакций не осталось - часть строк может быть заблокирована другим воркером (SKIP LOCKED).
+        Возвращает uuid отклоненных транзакций
+
+        :param reject_chunk: _reject_outdated_chunk сервиса транзакций, отклоняет одну пачку и возвращает ее uuid
+        """
+        now = timezone.now()
+        deadline = time.monotonic() + time_budget.total_seconds()
+
+        rejected = []
+        while True:
+            chunk = reject_chunk(outdated_before=now, status_description=status_description, chunk_size=chunk_size)
+            rejected.extend(chunk)
+
+            if not chunk or time.monotonic() >= deadline:
+                return rejected
+
+    @classmethod
+    def reject_outdated_chunk(
+        cls,
+        *,
+        model: type[BaseTransaction],
+        outdated_before: datetime,
+        status_description: str,
+        returning: Sequence[str],
+        chunk_size: int,
+    ) -> list[tuple[Any, ...]]:
+        """
+        Отклоняет до chunk_size устаревших транзакций одним UPDATE ... RETURNING
+
+        Возвращает для каждой отклоненной транзакции кортеж из uuid и значений полей returning. Транзакции,
+        которые уже были закрыты параллельно, не возвращаются, поэтому повторный вызов безопасен.
+        Должен вызываться внутри transaction.atomic, возврат средств на счета остается вызывающему
+        """
+        outdated = (
+            model.objects.filter(status="PENDING", auto_reject_after__lt=outdated_before)
+            .order_by("auto_reject_after")
+            .values("pk")[:chunk_size]
         )
 
-        transfer_sums_out = (
-            TransferTransaction.objects.filter(
-                created_at__lt=cutoff_date, status="CONFIRMED", service__name__in=service_names
-            )
-            .values("service", checking_account=F("from_checking_account"))
-            .annotate(total_amount=Sum("from_amount") * -1)  # Учитываем исходящие транзакции как отрицательные
+        # Параллельные воркеры берут разные пачки вместо ожидания блокировок друг друга
+        if connection.features.has_select_for_update_skip_locked:
+            outdated = outdated.select_for_update(skip_locked=True)
+
+        outdated_sql, outdated_params = outdated.query.sql_with_params()
+
+        return cls._close_returning(
+            model=model,
+            where_sql=f"{connection.ops.quote_name(model._meta.pk.column)} IN ({outdated_sql})",
+            where_params=outdated_params,
+            status="REJECTED",
+            status_description=status_description,
+            returning=returning,
         )
 
-        # Cуммы для ExchangeTransaction (входящие и исходящие)
-        exchange_sums_in = (
-            ExchangeTransaction.objects.filter(
-                created_at__lt=cutoff_date, status="CONFIRMED", service__name__in=service_names
-            )
-            .values("service", checking_account=F("to_checking_account"))
-            .annotate(total_amount=Sum("to_amount"))
+    @classmethod
+    def close_pending(
+        cls,
+        *,
+        model: type[BaseTransaction],
+        pks: Sequence[Any],
+        status: str,
+        status_description: str,
+        returning: Sequence[str] = (),
+    ) -> list[tuple[Any, ...]]:
+        """
+        Закрывает транзакции pks, которые еще в статусе PENDING, одним UPDATE ... RETURNING
+
+        Возвращает кортежи из uuid и значений полей returning только для закрытых этим вызовом транзакций,
+        остальные уже были закрыты ранее или параллельно. Должен вызываться внутри transaction.atomic,
+        изменение счетов остается вызывающему
+        """
+        if not pks:
+            return []
+
+        return cls._close_returning(
+            model=model,
+            where_sql=f"{connection.ops.quote_name(model._meta.pk.column)} IN ({', '.join(['%s'] * len(pks))})",
+            where_params=[model._meta.pk.get_db_prep_value(pk, connection) for pk in pks],
+            status=status,
+            status_description=status_description,
+            returning=returning,
         )
 
-        exchange_sums_out = (
-            ExchangeTransaction.objects.filter(
-                created_at__lt=cutoff_date, status="CONFIRMED", service__name__in=service_names
-            )
-            .values("service", checking_account=F("from_checking_account"))
-            .annotate(total_amount=Sum("from_amount") * -1)  # Учитываем исходящие транзакции как отрицательные
+    @classmethod
+    def _close_returning(
+        cls,
+        *,
+        model: type[BaseTransaction],
+        where_sql: str,
+        where_params: Sequence[Any],
+        status: str,
+        status_description: str,
+        returning: Sequence[str],
+    ) -> list[tuple[Any, ...]]:
+        quote_name = connection.ops.quote_name
+        fields = [model._meta.pk, *[model._meta.get_field(name) for name in returning]]
+
+        sql = (
+            f"UPDATE {quote_name(model._meta.db_table)}"
+            f" SET {quote_name('status')} = %s, {quote_name('status_description')} = %s, {quote_name('closed_at')} = %s"
+            f" WHERE {where_sql} AND {quote_name('status')} = %s"
+            f" RETURNING {', '.join(quote_name(field.column) for field in fields)}"
         )
 
-        # для хранения итоговых сумм по каждому аккаунту для каждого сервиса
-        total_amounts = defaultdict(lambda: defaultdict(int))
+        params = (
+            status,
+            status_description,
+            connection.ops.adapt_datetimefield_value(timezone.now()),
+            *where_params,
+            "PENDING",
+        )
 
-        for item in chain(adjustment_sums, transfer_sums_in, transfer_sums_out, exchange_sums_in, exchange_sums_out):
-            total_amounts[item["service"]][item["checking_account"]] += item["total_amount"]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
 
-        for service, accounts_with_total_amounts in total_amounts.items():
-            cls._create_fake_transaction_and_remove_old(
-                accounts_with_total_amounts=accounts_with_total_amounts,
-                cutoff_date=cutoff_date,
-                closed_date=now,
-                service=service,
-            )
+        return [tuple(field.to_python(value) for field, value in zip(fields, row)) for row in rows]
+
+    COLLAPSED_DESCRIPTION = "The amount of old collapsed transactions"
+    COLLAPSED_STATUS_DESCRIPTION = "Confirmed without real change amount in checking account"
+
+    # Суммы считаются по транзакциям, а не по журналу LedgerEntry: суммирующие корректировки ведутся по сервису
+    # и счету, а запись журнала не знает, какой сервис изменил счет. Журнал схлопыванием не меняется
+    # Стороны транзакций при схлопывании: поле счета, поле суммы и знак суммы для счета
+    COLLAPSE_SIDES: dict[type[BaseTransaction], tuple[tuple[str, str, int], ...]] = {
+        AdjustmentTransaction: (("checking_account", "amount", 1),),
+        TransferTransaction: (("to_checking_account", "to_amount", 1), ("from_checking_account", "from_amount", -1)),
+        ExchangeTransaction: (("to_checking_account", "to_amount", 1), ("from_checking_account", "from_amount", -1)),
+    }
 
     @classmethod
-    @retry_on_serialization_error(max_retries=5)
-    def _create_fake_transaction_and_remove_old(
-        cls, *, accounts_with_total_amounts, cutoff_date: datetime, closed_date: datetime, service: str
-    ):
+    def collapse_old_transactions(
+        cls,
+        *,
+        old_than_timedelta: timedelta,
+        service_names: Sequence[str],
+        chunk_size: int = settings.CURRENCY_COLLAPSE_CHUNK_SIZE,
+    ) -> int:
+        """
+        Заменяет закрытые транзакции старше old_than_timedelta суммирующими корректировками по каждому счету
+
+        На партиционированных таблицах месяцы, целиком старше old_than_timedelta, схлопываются удалением партиции
+        месяца (_collapse_month) вместо DELETE по строке. Остальные транзакции обрабатываются пачками по chunk_size
+        в порядке индекса (created_at, uuid), каждая пачка в своей транзакции БД: суммы подтвержденных транзакций
+        пачки добавляются к суммирующим корректировкам этого запуска, а сама пачка удаляется. Память и время
+        блокировок ограничены размером пачки, прерванный запуск продолжается повторным вызовом - обработанные
+        пачки и месяцы уже удалены.
+
+        Возвращает количество удаленных транзакций
+        """
+        now = timezone.now()
+        cutoff_date = now - old_than_timedelta
+
+        service_ids = list(CurrencyService.objects.filter(name__in=service_names).values_list("pk", flat=True))
+
+        collapsed = 0
+        for model in cls.COLLAPSE_SIDES:
+            if PartitionsService.is_partitioned(model):
+                for month in PartitionsService.months_before(model, before=cutoff_date):
+                    collapsed += cls._collapse_month(
+                        model=model, month=month, service_ids=service_ids, cutoff_date=cutoff_date, closed_date=now
+                    )
+
+            for service_id in service_ids:
+                checkpoint = None
+
+                while True:
+                    checkpoint, count = cls._collapse_chunk(
+                        model=model,
+                        service_id=service_id,
+                        cutoff_date=cutoff_date,
+                        closed_date=now,
+                        checkpoint=checkpoint,
+                        chunk_size=chunk_size,
+                    )
+                    collapsed += count
+
+                    if count < chunk_size:
+                        break
+
+        return collapsed
+
+    @classmethod
+    @retry_on_serialization_error()
+    def _collapse_month(
+        cls,
+        *,
+        model: type[BaseTransaction],
+        month: date,
+        service_ids: Sequence[int],
+        cutoff_date: datetime,
+        closed_date: datetime,
+    ) -> int:
+        """
+        Схлопывает месяц партиционированной таблицы одной транзакцией БД: суммы подтвержденных транзакций месяца
+        добавляются к суммирующим корректировкам, PENDING транзакции переносятся в партицию default, а партиция
+        месяца удаляется. Месяц с транзакциями сервисов не из service_ids остается построчному схлопыванию.
+
+        Возвращает количество удаленных транзакций
+        """
+        month_start, month_end = PartitionsService.month_bounds(month)
+        month_transactions = model.objects.filter(created_at__gte=month_start, created_at__lt=month_end)
+        closed = month_transactions.filter(~Q(status="PENDING"))
+
         with transaction.atomic():
-            # Создаем AdjustmentTransaction для каждого аккаунта
-            # Удаляем старые транзакции
+            # Закрытие PENDING транзакций месяца ждет до удаления партиции, иначе его суммы потеряются
+            PartitionsService.lock_month(model, month)
 
-            AdjustmentTransaction.objects.filter(
-                ~Q(status="PENDING"), created_at__lt=cutoff_date, service=service
-            ).delete()
-            TransferTransaction.objects.filter(
-                ~Q(status="PENDING"), created_at__lt=cutoff_date, service=service
-            ).delete()
-            ExchangeTransaction.objects.filter(
-                ~Q(status="PENDING"), created_at__lt=cutoff_date, service=service
+            if month_transactions.exclude(service_id__in=service_ids).exists():
+                return 0
+
+            totals: dict[int, dict[int, Decimal]] = defaultdict(lambda: defaultdict(Decimal))
+            for account_field, amount_field, sign in cls.COLLAPSE_SIDES[model]:
+                sums = (
+                    closed.filter(status="CONFIRMED")
+                    .values("service", account=F(account_field))
+                    .annotate(total=Sum(amount_field))
+                )
+
+                for item in sums:
+                    totals[item["service"]][item["account"]] += item["total"] * sign
+
+            for service_id, service_totals in totals.items():
+                cls._add_collapsed_amounts(
+                    totals=service_totals, service_id=service_id, cutoff_date=cutoff_date, closed_date=closed_date
+                )
+
+            count = closed.count()
+            TransactionUUID.objects.filter(
+                transaction_type=model._meta.model_name, uuid__in=closed.values("uuid")
             ).delete()
 
-            for account_id, total_amount in accounts_with_total_amounts.items():
-                adjustment_transaction = AdjustmentTransaction.objects.create(
-                    description="The amount of old collapsed transactions",
-                    service_id=service,
+            PartitionsService.detach_month(model, month, drop=True)
+
+        return count
+
+    @classmethod
+    @retry_on_serialization_error()
+    def _collapse_chunk(
+        cls,
+        *,
+        model: type[BaseTransaction],
+        service_id: int,
+        cutoff_date: datetime,
+        closed_date: datetime,
+        checkpoint: tuple[datetime, UUID] | None,
+        chunk_size: int,
+    ) -> tuple[tuple[datetime, UUID] | None, int]:
+        """
+        Схлопывает одну пачку закрытых транзакций после checkpoint, возвращает новый checkpoint
+        и количество удаленных транзакций
+        """
+        old = model.objects.filter(~Q(status="PENDING"), created_at__lt=cutoff_date, service_id=service_id)
+
+        # PENDING транзакции остаются, поэтому следующая пачка начинается после последней строки предыдущей.
+        # OR не ограничивает сканирование индекса, граница created_at >= начинает его с checkpoint
+        if checkpoint is not None:
+            created_at, uuid = checkpoint
+            old = old.filter(created_at__gte=created_at).filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, uuid__gt=uuid)
+            )
+
+        with transaction.atomic():
+            chunk = list(old.order_by("created_at", "uuid").values_list("created_at", "uuid")[:chunk_size])
+
+            if not chunk:
+                return checkpoint, 0
+
+            uuids = [uuid for _, uuid in chunk]
+            confirmed = model.objects.filter(uuid__in=uuids, status="CONFIRMED")
+
+            totals = defaultdict(Decimal)
+            for account_field, amount_field, sign in cls.COLLAPSE_SIDES[model]:
+                sums = confirmed.values(account=F(account_field)).annotate(total=Sum(amount_field))
+
+                for item in sums:
+                    totals[item["account"]] += item["total"] * sign
+
+            model.objects.filter(uuid__in=uuids).delete()
+            TransactionUUID.objects.filter(transaction_type=model._meta.model_name, uuid__in=uuids).delete()
+
+            cls._add_collapsed_amounts(
+                totals=totals, service_id=service_id, cutoff_date=cutoff_date, closed_date=closed_date
+            )
+
+        return chunk[-1], len(chunk)
+
+    @classmethod
+    def _add_collapsed_amounts(
+        cls, *, totals: dict[int, Decimal], service_id: int, cutoff_date: datetime, closed_date: datetime
+    ):
+        """
+        Добавляет суммы к суммирующим корректировкам счетов, созданным этим запуском (created_at = cutoff_date),
+        недостающие корректировки создаются одним bulk_create
+        """
+        if not totals:
+            return
+
+        existing = AdjustmentTransaction.objects.filter(
+            service_id=service_id,
+            created_at=cutoff_date,
+            status_description=cls.COLLAPSED_STATUS_DESCRIPTION,
+            checking_account_id__in=totals,
+        ).only("uuid", "checking_account_id", "amount")
+
+        updated = []
+        for adjustment in existing:
+            adjustment.amount += totals.pop(adjustment.checking_account_id)  # type: ignore _id adds by django
+            updated.append(adjustment)
+
+        if updated:
+            AdjustmentTransaction.objects.bulk_update(updated, ["amount"])
+
+        if totals:
+            created = AdjustmentTransaction.objects.bulk_create(
+                AdjustmentTransaction(
+                    description=cls.COLLAPSED_DESCRIPTION,
+                    service_id=service_id,
                     status="CONFIRMED",
-                    status_description="Confirmed without real change amount in checking account",
+                    status_description=cls.COLLAPSED_STATUS_DESCRIPTION,
                     auto_reject_after=closed_date,
-                    created_at=cutoff_date,
                     closed_at=closed_date,
                     checking_account_id=account_id,
-                    amount=total_amount,
+                    amount=total,
                 )
-                adjustment_transaction.created_at = cutoff_date
-                adjustment_transaction.save()
+                for account_id, total in totals.items()
+            )
+
+            cls.register_uuids(model=AdjustmentTransaction, uuids=[adjustment.uuid for adjustment in created])
+
+            # auto_now_add перезаписывает created_at при вставке
+            AdjustmentTransaction.objects.filter(uuid__in=[adjustment.uuid for adjustment in created]).update(
+                created_at=cutoff_date
+            )
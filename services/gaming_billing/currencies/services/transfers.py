@@ -1,7 +1,8 @@
-import logging
-from datetime import timedelta
+from collections import defaultdict
+from datetime import datetime, timedelta
 from decimal import ROUND_DOWN, Decimal
 from typing import Any
+from uuid import UUID
 
 import django_filters
 from common.utils import get_decimal_places, retry_on_serialization_error
@@ -14,9 +15,12 @@ from currencies.models import (
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import F, QuerySet
+from django.db.models import QuerySet
 from django.utils import timezone
 
+from .accounts import AccountsService
+from .transactions import TransactionsService
+
 
 class TransfersService:
     ValidationError = ValidationError
@@ -33,7 +37,13 @@ class TransfersService:
         from_amount: Decimal | int,
         description: str,
         auto_reject_timedelta: timedelta = settings.DEFAULT_AUTO_REJECT_TIMEDELTA,
+        instant: bool = False,
+        uuid: UUID | None = None,
     ) -> TransferTransaction:
+        """
+        :param instant: Создать сразу подтвержденную транзакцию, суммы обоих счетов меняются одним UPDATE
+        :param uuid: uuid транзакции, выбранный клиентом, по умолчанию генерируется
+        """
         if not transfer_rule.enabled:
             raise ValidationError("Transfer is disabled")
 
@@ -68,13 +78,20 @@ class TransfersService:
             raise ValidationError("from_amount is too small, to_amount <= 0")
 
         with transaction.atomic():
-            blocked_from_checking_account = CheckingAccount.objects.get(pk=from_checking_account.pk)
-
-            if blocked_from_checking_account.amount < from_amount:
-                raise ValidationError("Insufficient funds in the checking account")
-
-            blocked_from_checking_account.amount = F("amount") - from_amount
-            blocked_from_checking_account.save()
+            # Списание и проверка средств одним условным UPDATE - без чтения счета, которое под SERIALIZABLE
+            # конфликтует с параллельными списаниями с того же счета
+            if instant:
+                AccountsService.change_amounts(
+                    deltas={from_checking_account.pk: -from_amount, to_checking_account.pk: to_amount},
+                    checked_ids=(from_checking_account.pk,),
+                )
+            else:
+                AccountsService.change_amount(
+                    checking_account=from_checking_account,
+                    delta=-from_amount,
+                    held_delta=from_amount,
+                    check_funds=True,
+                )
 
             transfer_transaction = TransferTransaction(
                 service=service,
@@ -85,10 +102,16 @@ class TransfersService:
                 to_amount=to_amount,
                 description=description,
                 auto_reject_after=timezone.now() + auto_reject_timedelta,
+                **TransactionsService.get_create_fields(uuid=uuid, instant=instant),
             )
 
-            transfer_transaction.full_clean()
-            transfer_transaction.save()
+            # Сервис, правило и счета уже загружены, проверка внешних ключей только добавит запросов
+            transfer_transaction.full_clean(
+                exclude=["service", "transfer_rule", "from_checking_account", "to_checking_account"],
+                validate_unique=False,
+                validate_constraints=False,
+            )
+            TransactionsService.save_new(transfer_transaction, uuid=uuid)
 
         return transfer_transaction
 
@@ -98,10 +121,14 @@ class TransfersService:
         with transaction.atomic():
             transfer_transaction._confirm(status_description)
 
-            # Передаём валюту получателю
-            to_checking_account = transfer_transaction.to_checking_account
-            to_checking_account.amount = F("amount") + transfer_transaction.to_amount
-            to_checking_account.save(update_fields=["amount", "updated_at"])
+            # Передаём валюту получателю и снимаем блокировку со списанной у отправителя
+            from_account_id = transfer_transaction.from_checking_account_id  # type: ignore _id adds by django
+            to_account_id = transfer_transaction.to_checking_account_id  # type: ignore _id adds by django
+
+            AccountsService.change_amounts(
+                deltas={to_account_id: transfer_transaction.to_amount},
+                held_deltas={from_account_id: -transfer_transaction.from_amount},
+            )
 
         return transfer_transaction
 
@@ -112,30 +139,50 @@ class TransfersService:
             transfer_transaction._reject(status_description)
 
             # Возвращаем валюту отправителю
-            from_checking_account = transfer_transaction.from_checking_account
-            from_checking_account.amount = F("amount") + transfer_transaction.from_amount
-            from_checking_account.save(update_fields=["amount", "updated_at"])
+            AccountsService.change_amount(
+                checking_account=transfer_transaction.from_checking_account,
+                delta=transfer_transaction.from_amount,
+                held_delta=-transfer_transaction.from_amount,
+            )
 
         return transfer_transaction
 
     @classmethod
-    def reject_all_outdated(cls, *, status_description="Rejected as outdated") -> list[TransferTransaction]:
-        now = timezone.now()
-
-        transactions = TransferTransaction.objects.filter(status="PENDING", auto_reject_after__lt=now)
-
-        rejected = []
-        for transfer in transactions:
-            try:
-                rejected.append(cls.reject(transfer_transaction=transfer, status_description=status_description))
-            except cls.ValidationError as e:
-                logging.error(
-                    f"Error on rejecting outdated transfer transactions, transaction {transfer.uuid}, error {str(e)}"
-                )
+    def reject_all_outdated(
+        cls,
+        *,
+        status_description="Rejected as outdated",
+        chunk_size: int = settings.CURRENCY_REJECT_OUTDATED_CHUNK_SIZE,
+        time_budget: timedelta = settings.CURRENCY_REJECT_OUTDATED_TIME_BUDGET,
+    ) -> list[UUID]:
+        """Отклоняет устаревшие переводы пачками, см. TransactionsService.reject_all_outdated"""
+        return TransactionsService.reject_all_outdated(
+            reject_chunk=cls._reject_outdated_chunk,
+            status_description=status_description,
+            chunk_size=chunk_size,
+            time_budget=time_budget,
+        )
+
+    @classmethod
+    @retry_on_serialization_error()
+    def _reject_outdated_chunk(cls, *, outdated_before: datetime, status_description: str, chunk_size: int):
+        with transaction.atomic():
+            rows = TransactionsService.reject_outdated_chunk(
+                model=TransferTransaction,
+                outdated_before=outdated_before,
+                status_description=status_description,
+                returning=["from_checking_account", "from_amount"],
+                chunk_size=chunk_size,
+            )
+
+            # Возвращаем валюту отправителям
+            deltas: dict[int, Decimal] = defaultdict(Decimal)
+            for _, account_id, from_amount in rows:
+                deltas[account_id] += from_amount
 
-            # TODO Ошибки сериализации?
+            AccountsService.change_amounts(deltas=deltas, held_deltas={pk: -delta for pk, delta in deltas.items()})
 
-        return rejected
+        return [uuid for uuid, *_ in rows]
 
     @classmethod
     def list(cls, *, filters: dict[str, Any] | None = None) -> QuerySet[TransferTransaction]:
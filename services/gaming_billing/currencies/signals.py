@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CurrencyUnit, ExchangeRule, HolderType, TransferRule
+from .services import ReferencesService
+
+
+@receiver(post_save, sender=CurrencyUnit)
+@receiver(post_delete, sender=CurrencyUnit)
+def invalidate_currency_units_cache(**kwargs):
+    # Правила хранят загруженные вместе с ними валюты
+    ReferencesService.currency_units.invalidate()
+    ReferencesService.transfer_rules.invalidate()
+    ReferencesService.exchange_rules.invalidate()
+
+
+@receiver(post_save, sender=TransferRule)
+@receiver(post_delete, sender=TransferRule)
+def invalidate_transfer_rules_cache(**kwargs):
+    ReferencesService.transfer_rules.invalidate()
+
+
+@receiver(post_save, sender=ExchangeRule)
+@receiver(post_delete, sender=ExchangeRule)
+def invalidate_exchange_rules_cache(**kwargs):
+    ReferencesService.exchange_rules.invalidate()
+
+
+@receiver(post_save, sender=HolderType)
+@receiver(post_delete, sender=HolderType)
+def invalidate_holder_types_cache(**kwargs):
+    ReferencesService.holder_types.invalidate()
@@ -2,9 +2,13 @@ from datetime import timedelta
 from typing import Sequence
 
 from celery import shared_task
+from common.utils import retry_on_serialization_error
 from currencies.services import (
+    AccountsService,
     AdjustmentsService,
     ExchangesService,
+    LedgerService,
+    PartitionsService,
     TransactionsService,
     TransfersService,
 )
@@ -15,7 +19,7 @@ def reject_outdated_adjustments():
 
     rejecteds = AdjustmentsService.reject_all_outdated(status_description="Rejected by cron as outdated")
 
-    return [str(i.uuid) for i in rejecteds]
+    return [str(uuid) for uuid in rejecteds]
 
 
 @shared_task
@@ -23,7 +27,7 @@ def rejecting_outdated_transfers():
 
     rejecteds = TransfersService.reject_all_outdated(status_description="Rejected by cron as outdated")
 
-    return [str(i.uuid) for i in rejecteds]
+    return [str(uuid) for uuid in rejecteds]
 
 
 @shared_task
@@ -31,11 +35,30 @@ def reject_outdated_exchanges():
 
     rejecteds = ExchangesService.reject_all_outdated(status_description="Rejected by cron as outdated")
 
-    return [str(i.uuid) for i in rejecteds]
+    return [str(uuid) for uuid in rejecteds]
 
 
 @shared_task
 def collapse_all_old_transactions(*, older_than_days: int, service_names: Sequence[str]):
-    TransactionsService.collapse_old_transactions(
+    return TransactionsService.collapse_old_transactions(
         old_than_timedelta=timedelta(days=older_than_days), service_names=service_names
     )
+
+
+@shared_task
+@retry_on_serialization_error()
+def fold_account_shards():
+    return AccountsService.fold_shards()
+
+
+@shared_task
+def create_transaction_partitions():
+    if not PartitionsService.tables_partitioned():
+        return []
+
+    return PartitionsService.create_upcoming()
+
+
+@shared_task
+def take_balance_snapshots():
+    return LedgerService.take_snapshots()
@@ -0,0 +1,143 @@
+import dataclasses
+from decimal import Decimal
+
+from currencies.permissions import (
+    AdjustmentsPermissionsService,
+    HoldersPermissionsService,
+    PermissionsPolicy,
+)
+from currencies.test_factories import CurrencyServicesTestFactory
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+
+class PermissionsPolicyTests(TestCase):
+    def setUp(self):
+        self.permissions = {
+            "adjustments": {
+                "enabled": True,
+                "create": {
+                    "enabled": True,
+                    "min_amount": "0.5",
+                    "max_amount": 100,
+                    "min_auto_reject": 10,
+                    "max_auto_reject": 200,
+                },
+                "confirm": {"enabled": True, "services": ["service_1"]},
+                "reject": {"enabled": False, "services": ["service_1"]},
+            },
+            "holders": {"enabled": True, "update": {"enabled": True}},
+        }
+
+    def test_compile(self):
+        policy = PermissionsPolicy.compile(self.permissions)
+
+        self.assertFalse(policy.root)
+        self.assertEqual(policy.errors, ())
+
+        adjustments = policy.sections["adjustments"]
+
+        self.assertIsNone(adjustments.create_error)
+        self.assertEqual(adjustments.min_amount, Decimal("0.5"))
+        self.assertEqual(adjustments.max_amount, Decimal(100))
+        self.assertEqual(adjustments.confirm_services, frozenset(["service_1"]))
+        self.assertEqual(adjustments.reject_error, "adjustments: Reject is disabled")
+        self.assertEqual(
+            policy.sections["transfers"].access_error, "transfers: Missing required permission 'transfers'"
+        )
+
+    def test_enforce_with_policy(self):
+        policy = PermissionsPolicy.compile(self.permissions)
+
+        AdjustmentsPermissionsService.enforce_create(permissions=policy)
+        AdjustmentsPermissionsService.enforce_amount(permissions=policy, amount=Decimal(1))
+        AdjustmentsPermissionsService.enforce_auto_reject_timeout(permissions=policy, auto_reject=100)
+        AdjustmentsPermissionsService.enforce_confirm(permissions=policy, service_name="service_1")
+        HoldersPermissionsService.enforce_update(permissions=policy)
+
+        with self.assertRaisesMessage(AdjustmentsPermissionsService.PermissionDenied, "Amount is out of range"):
+            AdjustmentsPermissionsService.enforce_amount(permissions=policy, amount=Decimal("0.1"))
+
+        with self.assertRaisesMessage(
+            AdjustmentsPermissionsService.PermissionDenied, "No access to confirm the transaction from another service"
+        ):
+            AdjustmentsPermissionsService.enforce_confirm(permissions=policy, service_name="service_2")
+
+        with self.assertRaisesMessage(AdjustmentsPermissionsService.PermissionDenied, "Reject is disabled"):
+            AdjustmentsPermissionsService.enforce_reject(permissions=policy, service_name="service_1")
+
+    def test_instant(self):
+        policy = PermissionsPolicy.compile(self.permissions)
+
+        with self.assertRaisesMessage(
+            AdjustmentsPermissionsService.PermissionDenied, "Instant transactions are disabled"
+        ):
+            AdjustmentsPermissionsService.enforce_instant(permissions=policy)
+
+        self.permissions["adjustments"]["create"]["instant"] = True
+        AdjustmentsPermissionsService.enforce_instant(permissions=PermissionsPolicy.compile(self.permissions))
+
+        self.permissions["adjustments"]["create"]["enabled"] = False
+        with self.assertRaisesMessage(AdjustmentsPermissionsService.PermissionDenied, "Creating is disabled"):
+            AdjustmentsPermissionsService.enforce_instant(permissions=PermissionsPolicy.compile(self.permissions))
+
+        self.permissions["adjustments"]["create"]["instant"] = "yes"
+        self.assertIn("adjustments: Error in instant permission", PermissionsPolicy.compile(self.permissions).errors)
+
+    def test_root_policy(self):
+        policy = PermissionsPolicy.compile({"root": True})
+
+        AdjustmentsPermissionsService.enforce_amount(permissions=policy, amount=Decimal(10**6))
+        AdjustmentsPermissionsService.enforce_reject(permissions=policy, service_name="any")
+
+    def test_policy_is_immutable(self):
+        policy = PermissionsPolicy.compile(self.permissions)
+
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            policy.root = True  # type: ignore
+
+        with self.assertRaises(TypeError):
+            policy.sections["adjustments"] = policy.sections["transfers"]  # type: ignore
+
+        self.assertFalse(hasattr(policy.sections["adjustments"], "__dict__"))
+
+    def test_malformed_permissions(self):
+        self.permissions["adjustments"]["create"]["max_amount"] = "trash"
+        self.permissions["adjustments"]["confirm"]["services"] = "service_1"
+        self.permissions["holders"] = True
+
+        policy = PermissionsPolicy.compile(self.permissions)
+
+        self.assertEqual(
+            policy.errors,
+            (
+                "adjustments: Error in min_amount or in max_amount permission",
+                "adjustments: Error in confirm services permission",
+                "holders: Error in holders permission",
+            ),
+        )
+
+        with self.assertRaises(ValidationError):
+            PermissionsPolicy.validate(self.permissions)
+
+    def test_malformed_auto_reject(self):
+        for value in ("60", True, None, [60]):
+            with self.subTest(value=value):
+                self.permissions["adjustments"]["create"]["max_auto_reject"] = value
+
+                policy = PermissionsPolicy.compile(self.permissions)
+
+                self.assertEqual(
+                    policy.errors, ("adjustments: Error in min_auto_reject or in max_auto_reject permission",)
+                )
+
+    def test_service_clean_validates_permissions(self):
+        service = CurrencyServicesTestFactory(permissions={"adjustments": {"enabled": True, "create": []}})
+
+        with self.assertRaisesMessage(ValidationError, "adjustments: Error in create permission"):
+            service.full_clean()
+
+    def test_service_compiles_once(self):
+        service = CurrencyServicesTestFactory(permissions=self.permissions)
+
+        self.assertIs(service.permissions_policy, service.permissions_policy)
@@ -1,5 +1,9 @@
-from currencies.models import HolderType
-from currencies.services import AccountsService
+from currencies.models import AdjustmentTransaction, CheckingAccountShard, HolderType
+from currencies.services import (
+    AccountsService,
+    AdjustmentsService,
+    CurrencyServicesService,
+)
 from currencies.test_factories import CurrencyUnitsTestFactory, HoldersTestFactory
 from django.test import TestCase
 
@@ -31,3 +35,119 @@ class CheckingAccountServicesTests(TestCase):
 
     def test_get_does_not_exists(self):
         self.assertIsNone(AccountsService.get(holder=self.holder, currency_unit=self.currency_unit))
+
+    def test_get_many(self):
+        holder_2 = HoldersTestFactory()
+        currency_unit_2 = CurrencyUnitsTestFactory()
+
+        account_1 = AccountsService.get_or_create(holder=self.holder, currency_unit=self.currency_unit)[0]
+        account_2 = AccountsService.get_or_create(holder=holder_2, currency_unit=currency_unit_2)[0]
+
+        with self.assertNumQueries(1):
+            accounts = AccountsService.get_many(
+                holder_ids=[self.holder.holder_id, holder_2.holder_id, "undefined"],
+                unit_symbols=[self.currency_unit.symbol, currency_unit_2.symbol],
+            )
+
+            self.assertEqual(
+                accounts,
+                {
+                    (self.holder.holder_id, self.currency_unit.symbol): account_1,
+                    (holder_2.holder_id, currency_unit_2.symbol): account_2,
+                },
+            )
+            self.assertEqual(accounts[(holder_2.holder_id, currency_unit_2.symbol)].holder, holder_2)
+
+    def test_get_many_with_holder_type(self):
+        AccountsService.get_or_create(holder=self.holder, currency_unit=self.currency_unit)
+
+        self.assertEqual(
+            AccountsService.get_many(
+                holder_ids=[self.holder.holder_id],
+                unit_symbols=[self.currency_unit.symbol],
+                holder_type_name="undefined_type",
+            ),
+            {},
+        )
+
+
+class BalanceShardsServicesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.service = CurrencyServicesService.get_default()
+        cls.currency_unit = CurrencyUnitsTestFactory()
+
+    def setUp(self):
+        self.holder = HoldersTestFactory()
+        self.checking_account = AccountsService.get_or_create(holder=self.holder, currency_unit=self.currency_unit)[0]
+
+        AccountsService.set_balance_shards(checking_account=self.checking_account, shards=4)
+
+    def credit(self, amount: int):
+        AdjustmentsService.confirm(
+            adjustment_transaction=AdjustmentsService.create(
+                service=self.service, checking_account=self.checking_account, amount=amount, description=""
+            ),
+            status_description="",
+        )
+
+    def get_balance(self):
+        return AccountsService.get(holder=self.holder, currency_unit=self.currency_unit).balance
+
+    def test_credits_go_to_shards(self):
+        for _ in range(10):
+            self.credit(10)
+
+        self.checking_account.refresh_from_db()
+        self.assertEqual(self.checking_account.amount, 0)
+        self.assertEqual(self.get_balance(), 100)
+
+        self.assertEqual(AccountsService.fold_shards(), 1)
+
+        self.checking_account.refresh_from_db()
+        self.assertEqual(self.checking_account.amount, 100)
+        self.assertEqual(self.get_balance(), 100)
+        self.assertFalse(CheckingAccountShard.objects.exclude(amount=0).exists())
+
+    def test_debit_checks_shards_amount(self):
+        self.credit(60)
+
+        AdjustmentsService.create(
+            service=self.service, checking_account=self.checking_account, amount=-50, description=""
+        )
+
+        with self.assertRaises(AccountsService.ValidationError):
+            AdjustmentsService.create(
+                service=self.service, checking_account=self.checking_account, amount=-20, description=""
+            )
+
+        self.assertEqual(self.get_balance(), 10)
+
+    def test_create_many_checks_shards_amount(self):
+        self.credit(30)
+
+        results = AdjustmentsService.create_many(
+            service=self.service,
+            items=[
+                dict(checking_account=self.checking_account, amount=-20, description=""),
+                dict(checking_account=self.checking_account, amount=-20, description=""),
+            ],
+        )
+
+        self.assertIsInstance(results[0], AdjustmentTransaction)
+        self.assertIsInstance(results[1], AccountsService.ValidationError)
+        self.assertEqual(self.get_balance(), 10)
+
+    def test_disable_shards_folds_amount(self):
+        self.credit(40)
+
+        AccountsService.set_balance_shards(checking_account=self.checking_account, shards=0)
+
+        self.checking_account.refresh_from_db()
+        self.assertEqual(self.checking_account.amount, 40)
+        self.assertFalse(CheckingAccountShard.objects.filter(checking_account=self.checking_account).exists())
+
+        self.credit(5)
+
+        self.checking_account.refresh_from_db()
+        self.assertEqual(self.checking_account.amount, 45)
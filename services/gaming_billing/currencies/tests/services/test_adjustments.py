@@ -1,7 +1,14 @@
 from datetime import timedelta
 from decimal import Decimal
-
-from currencies.models import CurrencyService, CurrencyUnit, Holder
+from unittest import mock
+from uuid import uuid4
+
+from currencies.models import (
+    AdjustmentTransaction,
+    CurrencyService,
+    CurrencyUnit,
+    Holder,
+)
 from currencies.services import (
     AccountsService,
     AdjustmentsService,
@@ -157,6 +164,50 @@ class AdjustmentTransactionServicesTests(TestCase):
         self.checking_account.refresh_from_db()
         self.assertEqual(self.checking_account.amount, 100)
 
+    def test_negative_transaction_held_until_closed(self):
+        self.add_amount(100)
+
+        adjustments = [
+            AdjustmentsService.create(
+                service=self.service, checking_account=self.checking_account, amount=-30, description=""
+            )
+            for _ in range(3)
+        ]
+
+        self.checking_account.refresh_from_db()
+        self.assertEqual(self.checking_account.amount, 10)
+        self.assertEqual(self.checking_account.held_amount, 90)
+
+        AdjustmentsService.confirm(adjustment_transaction=adjustments[0], status_description="")
+        AdjustmentsService.confirm_many(adjustment_transactions=adjustments[1:2], status_description="")
+        AdjustmentsService.reject_many(adjustment_transactions=adjustments[2:], status_description="")
+
+        self.checking_account.refresh_from_db()
+        self.assertEqual(self.checking_account.amount, 40)
+        self.assertEqual(self.checking_account.held_amount, 0)
+
+    def test_instant_adjustments(self):
+        credit = AdjustmentsService.create(
+            service=self.service, checking_account=self.checking_account, amount=100, description="", instant=True
+        )
+
+        self.assertEqual(credit.status, "CONFIRMED")
+        self.assertEqual(credit.status_description, "Confirmed on creation")
+        self.assertEqual(self.checking_account.amount, 100)
+
+        debit = AdjustmentsService.create(
+            service=self.service, checking_account=self.checking_account, amount=-30, description="", instant=True
+        )
+
+        self.assertEqual(debit.status, "CONFIRMED")
+        self.assertEqual(self.checking_account.amount, 70)
+        self.assertEqual(self.checking_account.held_amount, 0)
+
+        with self.assertRaisesMessage(AdjustmentsService.ValidationError, "Insufficient funds in the checking account"):
+            AdjustmentsService.create(
+                service=self.service, checking_account=self.checking_account, amount=-71, description="", instant=True
+            )
+
     def test_confirm_rejected_transaction_raise_error(self):
         rejected_transaction = AdjustmentsService.reject(
             adjustment_transaction=AdjustmentsService.create(
@@ -227,6 +278,49 @@ class AdjustmentTransactionServicesTests(TestCase):
         self.assertEqual(transaction1.status, "REJECTED")
         self.assertEqual(transaction2.status, "REJECTED")
 
+    def test_reject_outdated_in_chunks_returns_amount(self):
+        self.add_amount(100)
+
+        for amount in (-10, -20, 30):
+            AdjustmentsService.create(
+                service=self.service,
+                checking_account=self.checking_account,
+                amount=amount,
+                description="",
+                auto_reject_timedelta=timedelta(seconds=-1),
+            )
+
+        not_outdated = AdjustmentsService.create(
+            service=self.service, checking_account=self.checking_account, amount=-5, description=""
+        )
+
+        rejecteds = AdjustmentsService.reject_all_outdated(chunk_size=2)
+        self.assertEqual(len(rejecteds), 3)
+        self.assertNotIn(not_outdated.uuid, rejecteds)
+
+        self.checking_account.refresh_from_db()
+        self.assertEqual(self.checking_account.amount, 95)
+        self.assertEqual(self.checking_account.held_amount, 5)
+
+        self.assertEqual(AdjustmentsService.reject_all_outdated(chunk_size=2), [])
+
+    def test_reject_outdated_continues_after_short_chunk(self):
+        # Неполная пачка из-за строк, заблокированных другим воркером, не останавливает обработку
+        chunks = [[uuid4()], [uuid4(), uuid4()], []]
+
+        with mock.patch.object(AdjustmentsService, "_reject_outdated_chunk", side_effect=chunks) as reject_chunk:
+            rejecteds = AdjustmentsService.reject_all_outdated(chunk_size=2)
+
+        self.assertEqual(len(rejecteds), 3)
+        self.assertEqual(reject_chunk.call_count, 3)
+
+    def test_reject_outdated_stops_after_time_budget(self):
+        with mock.patch.object(AdjustmentsService, "_reject_outdated_chunk", return_value=[uuid4()]) as reject_chunk:
+            rejecteds = AdjustmentsService.reject_all_outdated(chunk_size=1, time_budget=timedelta(0))
+
+        self.assertEqual(len(rejecteds), 1)
+        self.assertEqual(reject_chunk.call_count, 1)
+
     def test_amount_precision_raise_error(self):
         with self.assertRaisesRegex(
             AdjustmentsService.ValidationError, "Число знаков после запятой у валюты больше чем возможно.*"
@@ -239,6 +333,146 @@ class AdjustmentTransactionServicesTests(TestCase):
             )
 
 
+class AdjustmentBatchServicesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.service = CurrencyServicesService.get_default()
+        cls.currency_unit = CurrencyUnitsTestFactory()
+
+    def setUp(self):
+        self.account_1 = AccountsService.get_or_create(holder=HoldersTestFactory(), currency_unit=self.currency_unit)[0]
+        self.account_2 = AccountsService.get_or_create(holder=HoldersTestFactory(), currency_unit=self.currency_unit)[0]
+
+        AdjustmentsService.confirm(
+            adjustment_transaction=AdjustmentsService.create(
+                service=self.service, checking_account=self.account_1, amount=100, description=""
+            ),
+            status_description="",
+        )
+
+    def test_create_many(self):
+        results = AdjustmentsService.create_many(
+            service=self.service,
+            items=[
+                dict(checking_account=self.account_1, amount=Decimal(-60), description="1"),
+                dict(checking_account=self.account_2, amount=Decimal(10), description="2"),
+                dict(checking_account=self.account_1, amount=Decimal(-30), description="3"),
+            ],
+        )
+
+        self.assertEqual([result.status for result in results], ["PENDING"] * 3)  # type: ignore
+        self.assertEqual(AdjustmentsService.list(filters=dict(status="PENDING")).count(), 3)
+
+        self.account_1.refresh_from_db()
+        self.account_2.refresh_from_db()
+        self.assertEqual(self.account_1.amount, 10)
+        self.assertEqual(self.account_2.amount, 0)
+
+    def test_create_many_reports_errors_per_item(self):
+        results = AdjustmentsService.create_many(
+            service=self.service,
+            items=[
+                dict(checking_account=self.account_1, amount=Decimal(-60), description=""),
+                dict(checking_account=self.account_1, amount=Decimal(-60), description=""),
+                dict(checking_account=self.account_2, amount=Decimal(0), description=""),
+                dict(checking_account=self.account_2, amount=Decimal("0.00001"), description=""),
+            ],
+        )
+
+        self.assertIsInstance(results[0], AdjustmentTransaction)
+        self.assertIsInstance(results[1], AdjustmentsService.ValidationError)
+        self.assertIn("Insufficient funds in the checking account", results[1].messages)  # type: ignore
+        self.assertIsInstance(results[2], AdjustmentsService.ValidationError)
+        self.assertIsInstance(results[3], AdjustmentsService.ValidationError)
+
+        self.assertEqual(AdjustmentsService.list(filters=dict(status="PENDING")).count(), 1)
+
+        self.account_1.refresh_from_db()
+        self.assertEqual(self.account_1.amount, 40)
+
+    def test_create_many_query_count(self):
+        items = [
+            dict(checking_account=self.account_1, amount=Decimal(-1), description=""),
+            dict(checking_account=self.account_1, amount=Decimal(-2), description=""),
+            dict(checking_account=self.account_1, amount=Decimal(3), description=""),
+            dict(checking_account=self.account_2, amount=Decimal(4), description=""),
+        ]
+
+        # SAVEPOINT, SELECT сумм, UPDATE счетов, INSERT uuid и транзакций, RELEASE SAVEPOINT
+        with self.assertNumQueries(6):
+            AdjustmentsService.create_many(service=self.service, items=items)
+
+    def test_confirm_many(self):
+        adjustments = AdjustmentsService.create_many(
+            service=self.service,
+            items=[
+                dict(checking_account=self.account_1, amount=Decimal(-50), description=""),
+                dict(checking_account=self.account_2, amount=Decimal(20), description=""),
+                dict(checking_account=self.account_2, amount=Decimal(30), description=""),
+            ],
+        )
+
+        results = AdjustmentsService.confirm_many(
+            adjustment_transactions=adjustments, status_description="confirm"  # type: ignore
+        )
+
+        self.assertEqual([result.status for result in results], ["CONFIRMED"] * 3)  # type: ignore
+
+        self.account_1.refresh_from_db()
+        self.account_2.refresh_from_db()
+        self.assertEqual(self.account_1.amount, 50)
+        self.assertEqual(self.account_2.amount, 50)
+
+        for adjustment in adjustments:
+            adjustment.refresh_from_db()  # type: ignore
+            self.assertEqual(adjustment.status, "CONFIRMED")  # type: ignore
+            self.assertEqual(adjustment.status_description, "confirm")  # type: ignore
+            self.assertIsNotNone(adjustment.closed_at)  # type: ignore
+
+    def test_confirm_many_closed_and_duplicated(self):
+        adjustment = AdjustmentsService.create(
+            service=self.service, checking_account=self.account_2, amount=10, description=""
+        )
+        closed = AdjustmentsService.reject(
+            adjustment_transaction=AdjustmentsService.create(
+                service=self.service, checking_account=self.account_2, amount=10, description=""
+            ),
+            status_description="",
+        )
+
+        results = AdjustmentsService.confirm_many(
+            adjustment_transactions=[adjustment, closed, adjustment], status_description=""
+        )
+
+        self.assertEqual(results[0], adjustment)
+        self.assertIsInstance(results[1], AdjustmentsService.ValidationError)
+        self.assertIsInstance(results[2], AdjustmentsService.ValidationError)
+
+        self.account_2.refresh_from_db()
+        self.assertEqual(self.account_2.amount, 10)
+
+    def test_reject_many(self):
+        adjustments = AdjustmentsService.create_many(
+            service=self.service,
+            items=[
+                dict(checking_account=self.account_1, amount=Decimal(-50), description=""),
+                dict(checking_account=self.account_1, amount=Decimal(-30), description=""),
+                dict(checking_account=self.account_2, amount=Decimal(20), description=""),
+            ],
+        )
+
+        results = AdjustmentsService.reject_many(
+            adjustment_transactions=adjustments, status_description="reject"  # type: ignore
+        )
+
+        self.assertEqual([result.status for result in results], ["REJECTED"] * 3)  # type: ignore
+
+        self.account_1.refresh_from_db()
+        self.account_2.refresh_from_db()
+        self.assertEqual(self.account_1.amount, 100)
+        self.assertEqual(self.account_2.amount, 0)
+
+
 class AdjustmentListServiceTests(TestCase):
     @classmethod
     def setUpTestData(cls) -> None:
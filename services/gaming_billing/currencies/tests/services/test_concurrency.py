@@ -0,0 +1,189 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from common.utils import get_sqlstate
+from currencies.models import CheckingAccount, TransferRule, TransferTransaction
+from currencies.services import (
+    AccountsService,
+    AdjustmentsService,
+    CurrencyServicesService,
+    TransfersService,
+)
+from currencies.test_factories import CurrencyUnitsTestFactory, HoldersTestFactory
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+ISOLATION_MODES = ("serializable", "read_committed")
+
+
+class BalancesConsistencyMixin:
+    accounts: list[CheckingAccount]
+    initial_total: Decimal
+
+    def create_accounts(self, count: int, amount: int):
+        self.service = CurrencyServicesService.get_default()
+        self.currency_unit = CurrencyUnitsTestFactory()
+        self.transfer_rule = TransferRule.objects.create(
+            enabled=True,
+            name=f"concurrency-{self.currency_unit.symbol}",
+            unit=self.currency_unit,
+            fee_percent=Decimal(0),
+            min_from_amount=Decimal(1),
+        )
+
+        self.accounts = [
+            AccountsService.get_or_create(holder=HoldersTestFactory(), currency_unit=self.currency_unit)[0]
+            for _ in range(count)
+        ]
+
+        for account in self.accounts:
+            AdjustmentsService.confirm(
+                adjustment_transaction=AdjustmentsService.create(
+                    service=self.service, checking_account=account, amount=amount, description=""
+                ),
+                status_description="",
+            )
+
+        self.initial_total = Decimal(count * amount)
+
+    def transfer(self, from_account: CheckingAccount, to_account: CheckingAccount, amount: int, confirm: bool):
+        transfer = TransfersService.create(
+            service=self.service,
+            transfer_rule=self.transfer_rule,
+            from_checking_account=from_account,
+            to_checking_account=to_account,
+            from_amount=amount,
+            description="",
+        )
+
+        if confirm:
+            TransfersService.confirm(transfer_transaction=transfer, status_description="")
+        else:
+            TransfersService.reject(transfer_transaction=transfer, status_description="")
+
+    def assert_balances_consistent(self):
+        accounts = CheckingAccount.objects.filter(pk__in=[account.pk for account in self.accounts])
+
+        self.assertEqual(sum(account.amount + account.held_amount for account in accounts), self.initial_total)
+
+        for account in accounts:
+            self.assertGreaterEqual(account.amount, 0)
+
+            pending = TransferTransaction.objects.filter(from_checking_account=account, status="PENDING").aggregate(
+                total=Sum("from_amount")
+            )["total"]
+            self.assertEqual(account.held_amount, pending or 0)
+
+
+class IsolationModesTests(BalancesConsistencyMixin, TestCase):
+    def setUp(self):
+        self.create_accounts(count=3, amount=100)
+
+    def test_balances_consistent(self):
+        for mode in ISOLATION_MODES:
+            with self.subTest(mode=mode), override_settings(DATABASE_ISOLATION=mode):
+                self.create_accounts(count=3, amount=100)
+                first, second, third = self.accounts
+
+                self.transfer(first, second, 30, confirm=True)
+                self.transfer(second, third, 50, confirm=False)
+                self.transfer(third, first, 100, confirm=True)
+
+                with self.assertRaises(ValidationError):
+                    self.transfer(third, first, 1000, confirm=True)
+
+                TransfersService.create(
+                    service=self.service,
+                    transfer_rule=self.transfer_rule,
+                    from_checking_account=second,
+                    to_checking_account=first,
+                    from_amount=10,
+                    description="",
+                )
+
+                self.assert_balances_consistent()
+
+    @override_settings(DATABASE_ISOLATION="read_committed")
+    def test_read_committed_locks_accounts_in_order(self):
+        first, second, third = self.accounts
+
+        with CaptureQueriesContext(connection) as queries:
+            AccountsService.change_amounts(deltas={third.pk: Decimal(1), first.pk: Decimal(-1)})
+
+        # Блокировка, обновление счетов и запись в журнал
+        self.assertEqual(len(queries), 3)
+        self.assertIn("ORDER BY", queries[0]["sql"])
+        self.assertTrue(queries[1]["sql"].startswith("UPDATE"))
+        self.assertTrue(queries[2]["sql"].startswith("INSERT"))
+
+    @override_settings(DATABASE_ISOLATION="serializable")
+    def test_serializable_without_locks(self):
+        first, second, third = self.accounts
+
+        with self.assertNumQueries(2):
+            AccountsService.change_amounts(deltas={third.pk: Decimal(1), first.pk: Decimal(-1)})
+
+
+@skipUnless(connection.vendor == "postgresql", "Concurrent transactions need Postgres")
+class ConcurrentTransfersTests(BalancesConsistencyMixin, TransactionTestCase):
+    """
+    Потоки одновременно переводят валюту между несколькими счетами в обе стороны, часть переводов может
+    не пройти из-за нехватки средств или исчерпанных повторов, но суммы счетов должны сходиться
+    """
+
+    writers = 8
+    operations = 25
+
+    def run_writers(self) -> list[DatabaseError]:
+        """Возвращает ошибки БД, которые дошли до вызывающего"""
+
+        def write(seed: int) -> list[DatabaseError]:
+            randomizer = random.Random(seed)
+            errors = []
+
+            try:
+                for _ in range(self.operations):
+                    from_account, to_account = randomizer.sample(self.accounts, 2)
+
+                    try:
+                        self.transfer(
+                            from_account, to_account, randomizer.randint(1, 20), confirm=randomizer.random() < 0.7
+                        )
+                    except ValidationError:
+                        pass
+                    except DatabaseError as e:
+                        errors.append(e)
+            finally:
+                connection.close()
+
+            return errors
+
+        with ThreadPoolExecutor(max_workers=self.writers) as executor:
+            return [error for errors in executor.map(write, range(self.writers)) for error in errors]
+
+    def test_balances_consistent(self):
+        for mode in ISOLATION_MODES:
+            with (
+                self.subTest(mode=mode),
+                override_settings(DATABASE_ISOLATION=mode),
+                # Новые соединения потоков открываются с уровнем изоляции режима
+                mock.patch.dict(
+                    connection.settings_dict["OPTIONS"], isolation_level=settings.DATABASE_ISOLATION_LEVELS[mode]
+                ),
+            ):
+                self.create_accounts(count=4, amount=50)
+                errors = self.run_writers()
+                self.assert_balances_consistent()
+
+                if mode == "read_committed":
+                    # Счета блокируются по порядку, взаимных блокировок и ошибок сериализации быть не должно
+                    self.assertEqual(errors, [])
+                else:
+                    # Ошибки сериализации, для которых закончились повторы
+                    self.assertEqual({get_sqlstate(error) for error in errors} - {"40001"}, set())
@@ -176,6 +176,26 @@ class ExchangesServiceTests(TestCase):
         self.checking_account_unit1.refresh_from_db()
         self.assertEqual(self.checking_account_unit1.amount, 900)
 
+    def test_instant_exchange(self):
+        exchange = ExchangesService.create(
+            service=self.service,
+            holder=self.holder,
+            exchange_rule=self.exchange_rule,
+            from_unit=self.unit1,
+            to_unit=self.unit2,
+            from_amount=100,
+            description="",
+            instant=True,
+        )
+
+        self.assertEqual(exchange.status, "CONFIRMED")
+
+        self.checking_account_unit1.refresh_from_db()
+        self.checking_account_unit2.refresh_from_db()
+        self.assertEqual(self.checking_account_unit1.amount, 900)
+        self.assertEqual(self.checking_account_unit1.held_amount, 0)
+        self.assertEqual(self.checking_account_unit2.amount, 110)
+
     def test_confirm_exchange_change_status_and_status_description(self):
         exchange_transaction = ExchangesService.confirm(
             exchange_transaction=ExchangesService.create(
@@ -284,6 +304,28 @@ class ExchangesServiceTests(TestCase):
 
         self.assertEqual(self.checking_account_unit2.amount, 100)
 
+    def test_held_amount_until_closed(self):
+        exchange_transaction = ExchangesService.create(
+            service=self.service,
+            holder=self.holder,
+            exchange_rule=self.exchange_rule,
+            from_unit=self.unit1,
+            to_unit=self.unit2,
+            from_amount=100,
+            description="",
+        )
+
+        self.checking_account_unit1.refresh_from_db()
+        self.assertEqual(self.checking_account_unit1.held_amount, 100)
+
+        ExchangesService.confirm(exchange_transaction=exchange_transaction, status_description="")
+
+        self.checking_account_unit1.refresh_from_db()
+        self.checking_account_unit2.refresh_from_db()
+        self.assertEqual(self.checking_account_unit1.amount, 900)
+        self.assertEqual(self.checking_account_unit1.held_amount, 0)
+        self.assertEqual(self.checking_account_unit2.held_amount, 0)
+
     def test_reject_outdated(self):
         exchange_transaction1 = ExchangesService.create(
             service=self.service,
@@ -0,0 +1,141 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from currencies.models import BalanceSnapshot, LedgerEntry, TransferRule
+from currencies.services import (
+    AccountsService,
+    AdjustmentsService,
+    CurrencyServicesService,
+    LedgerService,
+    TransfersService,
+)
+from currencies.test_factories import CurrencyUnitsTestFactory, HoldersTestFactory
+from django.test import TestCase
+from django.utils import timezone
+
+
+class LedgerServiceTests(TestCase):
+    def setUp(self):
+        self.service = CurrencyServicesService.get_default()
+        self.currency_unit = CurrencyUnitsTestFactory()
+
+        self.account_1 = AccountsService.get_or_create(holder=HoldersTestFactory(), currency_unit=self.currency_unit)[0]
+        self.account_2 = AccountsService.get_or_create(holder=HoldersTestFactory(), currency_unit=self.currency_unit)[0]
+
+        self.transfer_rule = TransferRule.objects.create(
+            enabled=True,
+            name="ledger_transfer_rule",
+            unit=self.currency_unit,
+            fee_percent=Decimal(0),
+            min_from_amount=Decimal(1),
+        )
+
+    def add(self, account, amount):
+        AdjustmentsService.create(
+            service=self.service, checking_account=account, amount=amount, description="", instant=True
+        )
+
+    def entries(self, account):
+        return list(
+            LedgerEntry.objects.filter(checking_account=account).order_by("pk").values_list("delta", "balance_after")
+        )
+
+    def test_entries_on_confirmed_changes(self):
+        self.add(self.account_1, 100)
+
+        transfer = TransfersService.create(
+            service=self.service,
+            transfer_rule=self.transfer_rule,
+            from_checking_account=self.account_1,
+            to_checking_account=self.account_2,
+            from_amount=30,
+            description="",
+        )
+
+        # Блокировка средств переводом сумму вместе с заблокированной не меняет
+        self.assertEqual(self.entries(self.account_1), [(100, 100)])
+
+        TransfersService.confirm(transfer_transaction=transfer, status_description="")
+
+        self.assertEqual(self.entries(self.account_1), [(100, 100), (-30, 70)])
+        self.assertEqual(self.entries(self.account_2), [(30, 30)])
+
+    def test_rejected_without_entries(self):
+        self.add(self.account_1, 100)
+
+        adjustment = AdjustmentsService.create(
+            service=self.service, checking_account=self.account_1, amount=-40, description=""
+        )
+        AdjustmentsService.reject(adjustment_transaction=adjustment, status_description="")
+
+        self.assertEqual(self.entries(self.account_1), [(100, 100)])
+
+    def test_sharded_account_without_balance_after(self):
+        AccountsService.set_balance_shards(checking_account=self.account_1, shards=4)
+
+        self.add(self.account_1, 10)
+
+        self.assertEqual(self.entries(self.account_1), [(10, None)])
+
+    def test_balance_at(self):
+        self.add(self.account_1, 100)
+        middle = timezone.now()
+        self.add(self.account_1, -30)
+
+        self.assertEqual(LedgerService.balance_at(checking_account=self.account_1, at=middle), 100)
+        self.assertEqual(LedgerService.balance_at(checking_account=self.account_1, at=timezone.now()), 70)
+        self.assertEqual(LedgerService.balance_at(checking_account=self.account_1, at=middle - timedelta(days=1)), 0)
+
+    def test_balance_at_with_snapshot(self):
+        self.add(self.account_1, 100)
+        self.assertEqual(LedgerService.take_snapshots(), 1)
+
+        self.add(self.account_1, 5)
+
+        # Снимок и одна запись после него
+        with self.assertNumQueries(2):
+            balance = LedgerService.balance_at(checking_account=self.account_1, at=timezone.now())
+
+        self.assertEqual(balance, 105)
+
+    def test_snapshots_only_changed_accounts(self):
+        self.add(self.account_1, 100)
+        self.add(self.account_2, 50)
+
+        self.assertEqual(LedgerService.take_snapshots(chunk_size=1), 2)
+        self.assertEqual(LedgerService.take_snapshots(chunk_size=1), 0)
+
+        self.add(self.account_2, 1)
+
+        self.assertEqual(LedgerService.take_snapshots(), 1)
+        self.assertEqual(
+            list(
+                BalanceSnapshot.objects.filter(checking_account=self.account_2)
+                .order_by("pk")
+                .values_list("balance", flat=True)
+            ),
+            [50, 51],
+        )
+
+    def test_snapshot_folds_shards(self):
+        AccountsService.set_balance_shards(checking_account=self.account_1, shards=4)
+        self.add(self.account_1, 10)
+        self.add(self.account_1, 15)
+
+        LedgerService.take_snapshots()
+
+        self.assertEqual(BalanceSnapshot.objects.get(checking_account=self.account_1).balance, 25)
+        self.assertEqual(LedgerService.balance_at(checking_account=self.account_1, at=timezone.now()), 25)
+
+    def test_statement(self):
+        self.add(self.account_1, 100)
+        self.add(self.account_1, -30)
+
+        self.assertEqual(
+            list(LedgerService.statement(checking_account=self.account_1).values_list("delta", flat=True)), [-30, 100]
+        )
+        self.assertFalse(
+            LedgerService.statement(
+                checking_account=self.account_1, created_before=timezone.now() - timedelta(days=1)
+            ).exists()
+        )
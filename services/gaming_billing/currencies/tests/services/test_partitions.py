@@ -0,0 +1,211 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from io import StringIO
+from threading import Barrier
+from unittest import mock, skipUnless
+from uuid import uuid4
+
+from currencies.models import AdjustmentTransaction
+from currencies.services import (
+    AccountsService,
+    AdjustmentsService,
+    PartitionsService,
+    TransactionsService,
+)
+from currencies.tasks import create_transaction_partitions
+from currencies.test_factories import (
+    CurrencyServicesTestFactory,
+    CurrencyUnitsTestFactory,
+    HoldersTestFactory,
+)
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+
+class PartitionsDisabledTests(TestCase):
+    def test_command_requires_partitioned_tables(self):
+        with self.assertRaisesMessage(CommandError, "Transaction tables are not partitioned"):
+            call_command("transaction_partitions")
+
+    def test_task_without_partitions(self):
+        self.assertEqual(create_transaction_partitions(), [])
+
+
+@skipUnless(connection.vendor == "postgresql", "Partitions need Postgres")
+class PartitionsTests(TestCase):
+    def setUp(self):
+        self.service = CurrencyServicesTestFactory()
+        self.checking_account = AccountsService.get_or_create(
+            holder=HoldersTestFactory(), currency_unit=CurrencyUnitsTestFactory()
+        )[0]
+
+        self.now = timezone.now()
+        self.old_adjustment = self.create_adjustment(
+            created_at=PartitionsService._month_start(self.month(2)) + timedelta(days=1)
+        )
+        self.new_adjustment = self.create_adjustment(created_at=self.now)
+
+        with connection.schema_editor() as schema_editor:
+            PartitionsService.partition(AdjustmentTransaction, schema_editor=schema_editor)
+
+    def create_adjustment(self, *, created_at, **kwargs) -> AdjustmentTransaction:
+        adjustment = AdjustmentsService.create(
+            service=self.service, checking_account=self.checking_account, amount=10, description="", **kwargs
+        )
+        AdjustmentTransaction.objects.filter(pk=adjustment.pk).update(created_at=created_at)
+        # Строки вставлены в транзакции теста, отложенные проверки внешних ключей не дают удалить таблицу партиции
+        connection.check_constraints()
+
+        return adjustment
+
+    def month(self, months_ago: int) -> date:
+        return PartitionsService._add_months(PartitionsService._month(self.now.date()), -months_ago)
+
+    def test_partition_keeps_rows(self):
+        self.assertTrue(PartitionsService.is_partitioned(AdjustmentTransaction))
+
+        months = PartitionsService.list_partitions(AdjustmentTransaction)
+        self.assertIn(self.month(2), months)
+        self.assertIn(self.month(-PartitionsService.AHEAD_MONTHS), months)
+
+        self.assertEqual(
+            set(AdjustmentTransaction.objects.values_list("uuid", flat=True)),
+            {self.old_adjustment.uuid, self.new_adjustment.uuid},
+        )
+
+    def test_create_partitions_idempotent(self):
+        created = PartitionsService.create_partitions(AdjustmentTransaction, start=self.now.date(), months=6)
+
+        self.assertEqual(len(created), 6 - PartitionsService.AHEAD_MONTHS - 1)
+        self.assertEqual(
+            PartitionsService.create_partitions(AdjustmentTransaction, start=self.now.date(), months=6), []
+        )
+
+    def test_detach_keeps_pending(self):
+        created_at = AdjustmentTransaction.objects.get(pk=self.old_adjustment.pk).created_at
+
+        names = PartitionsService.detach_partitions(AdjustmentTransaction, before=self.month(1), drop=True)
+
+        self.assertIn(PartitionsService._partition_name(AdjustmentTransaction, self.month(2)), names)
+        self.assertNotIn(self.month(2), PartitionsService.list_partitions(AdjustmentTransaction))
+
+        old_adjustment = AdjustmentTransaction.objects.get(pk=self.old_adjustment.pk)
+        self.assertEqual(old_adjustment.status, "PENDING")
+        self.assertEqual(old_adjustment.created_at, created_at)
+
+    def test_collapse_drops_whole_months(self):
+        AdjustmentTransaction.objects.filter(pk=self.old_adjustment.pk).update(status="CONFIRMED")
+        old_pending = self.create_adjustment(
+            created_at=PartitionsService._month_start(self.month(2)) + timedelta(days=2)
+        )
+
+        collapsed = TransactionsService.collapse_old_transactions(
+            old_than_timedelta=self.now - PartitionsService._month_start(self.month(1)),
+            service_names=[self.service.name],
+        )
+
+        self.assertEqual(collapsed, 1)
+        self.assertNotIn(self.month(2), PartitionsService.list_partitions(AdjustmentTransaction))
+        self.assertFalse(AdjustmentTransaction.objects.filter(pk=self.old_adjustment.pk).exists())
+        self.assertTrue(AdjustmentTransaction.objects.filter(pk=self.new_adjustment.pk).exists())
+        self.assertEqual(AdjustmentTransaction.objects.get(pk=old_pending.pk).status, "PENDING")
+
+        summary = AdjustmentTransaction.objects.get(
+            service=self.service, status_description=TransactionsService.COLLAPSED_STATUS_DESCRIPTION
+        )
+        self.assertEqual(summary.amount, 10)
+        self.assertEqual(summary.checking_account, self.checking_account)
+
+    def test_collapse_keeps_months_of_other_services(self):
+        AdjustmentTransaction.objects.filter(pk=self.old_adjustment.pk).update(status="CONFIRMED")
+        other_service = CurrencyServicesTestFactory()
+
+        collapsed = TransactionsService.collapse_old_transactions(
+            old_than_timedelta=self.now - PartitionsService._month_start(self.month(1)),
+            service_names=[other_service.name],
+        )
+
+        self.assertEqual(collapsed, 0)
+        self.assertIn(self.month(2), PartitionsService.list_partitions(AdjustmentTransaction))
+        self.assertTrue(AdjustmentTransaction.objects.filter(pk=self.old_adjustment.pk).exists())
+
+    def test_client_uuid_unique_across_partitions(self):
+        uuid = uuid4()
+        self.create_adjustment(created_at=self.now - timedelta(days=40), uuid=uuid)
+
+        with self.assertRaises(AdjustmentsService.ValidationError):
+            AdjustmentsService.create(
+                service=self.service, checking_account=self.checking_account, amount=10, description="", uuid=uuid
+            )
+
+    def test_server_uuid_unique_across_partitions(self):
+        created_after = self.create_adjustment(created_at=self.now - timedelta(days=40))
+        (created_many,) = AdjustmentsService.create_many(
+            service=self.service,
+            items=[dict(checking_account=self.checking_account, amount=10, description="")],
+        )
+
+        # uuid строки, созданной до партиционирования, занимается при партиционировании
+        for adjustment in (self.old_adjustment, created_after, created_many):
+            with self.subTest(adjustment=adjustment), self.assertRaises(AdjustmentsService.ValidationError):
+                AdjustmentsService.create(
+                    service=self.service,
+                    checking_account=self.checking_account,
+                    amount=10,
+                    description="",
+                    uuid=adjustment.uuid,
+                )
+
+            self.assertEqual(AdjustmentTransaction.objects.filter(uuid=adjustment.uuid).count(), 1)
+
+
+@skipUnless(connection.vendor == "postgresql", "Partitions need Postgres")
+class ConcurrentClientUUIDTests(TransactionTestCase):
+    writers = 4
+
+    def setUp(self):
+        self.service = CurrencyServicesTestFactory()
+        self.checking_account = AccountsService.get_or_create(
+            holder=HoldersTestFactory(), currency_unit=CurrencyUnitsTestFactory()
+        )[0]
+
+        call_command("transaction_partitions", "--partition", stdout=StringIO())
+        self.addCleanup(call_command, "transaction_partitions", "--unpartition", stdout=StringIO())
+
+    def test_same_uuid_created_once(self):
+        for mode in ("serializable", "read_committed"):
+            with (
+                self.subTest(mode=mode),
+                override_settings(DATABASE_ISOLATION=mode),
+                # Новые соединения потоков открываются с уровнем изоляции режима
+                mock.patch.dict(
+                    connection.settings_dict["OPTIONS"], isolation_level=settings.DATABASE_ISOLATION_LEVELS[mode]
+                ),
+            ):
+                uuid = uuid4()
+                barrier = Barrier(self.writers)
+
+                def create() -> bool:
+                    try:
+                        barrier.wait()
+                        AdjustmentsService.create(
+                            service=self.service,
+                            checking_account=self.checking_account,
+                            amount=10,
+                            description="",
+                            uuid=uuid,
+                        )
+                        return True
+                    except AdjustmentsService.ValidationError:
+                        return False
+                    finally:
+                        connection.close()
+
+                with ThreadPoolExecutor(max_workers=self.writers) as executor:
+                    created = list(executor.map(lambda _: create(), range(self.writers)))
+
+                self.assertEqual(created.count(True), 1)
+                self.assertEqual(AdjustmentTransaction.objects.filter(uuid=uuid).count(), 1)
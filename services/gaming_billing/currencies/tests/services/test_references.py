@@ -0,0 +1,66 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from currencies.models import TransferRule
+from currencies.services import ReferencesService
+from currencies.test_factories import CurrencyUnitsTestFactory, HoldersTypeTestFactory
+from django.test import TestCase, override_settings
+
+
+class ReferencesServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.unit = CurrencyUnitsTestFactory()
+        cls.holder_type = HoldersTypeTestFactory()
+
+        cls.transfer_rule = TransferRule.objects.create(
+            enabled=True, name="transferrule", unit=cls.unit, fee_percent=Decimal(0), min_from_amount=Decimal(1)
+        )
+
+    def test_get_currency_unit(self):
+        self.assertEqual(ReferencesService.get_currency_unit(symbol=self.unit.symbol), self.unit)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(ReferencesService.get_currency_unit(symbol=self.unit.symbol), self.unit)
+            self.assertIsNone(ReferencesService.get_currency_unit(symbol="undefined"))
+
+    def test_get_holder_type(self):
+        self.assertEqual(ReferencesService.get_holder_type(name=self.holder_type.name), self.holder_type)
+        self.assertIsNone(ReferencesService.get_holder_type(name="undefined"))
+
+    def test_get_transfer_rule_with_unit(self):
+        ReferencesService.get_transfer_rule(name=self.transfer_rule.name)
+
+        with self.assertNumQueries(0):
+            transfer_rule = ReferencesService.get_transfer_rule(name=self.transfer_rule.name)
+            self.assertEqual(transfer_rule.unit, self.unit)  # type: ignore
+
+    def test_save_invalidates(self):
+        ReferencesService.get_currency_unit(symbol=self.unit.symbol)
+
+        new_unit = CurrencyUnitsTestFactory()
+
+        self.assertEqual(ReferencesService.get_currency_unit(symbol=new_unit.symbol), new_unit)
+
+    def test_unit_save_invalidates_rules(self):
+        ReferencesService.get_transfer_rule(name=self.transfer_rule.name)
+
+        self.unit.precision = 2
+        self.unit.save()
+
+        transfer_rule = ReferencesService.get_transfer_rule(name=self.transfer_rule.name)
+        self.assertEqual(transfer_rule.unit.precision, 2)  # type: ignore
+
+    def test_delete_invalidates(self):
+        ReferencesService.get_transfer_rule(name=self.transfer_rule.name)
+
+        self.transfer_rule.delete()
+
+        self.assertIsNone(ReferencesService.get_transfer_rule(name="transferrule"))
+
+    @override_settings(REFERENCE_CACHE_TTL=timedelta(0))
+    def test_disabled_cache(self):
+        ReferencesService.get_currency_unit(symbol=self.unit.symbol)
+
+        with self.assertNumQueries(1):
+            ReferencesService.get_currency_unit(symbol=self.unit.symbol)
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 from itertools import chain
 from typing import Literal
+from uuid import uuid4
 
 from currencies.models import (
     AdjustmentTransaction,
@@ -26,7 +27,9 @@ from currencies.test_factories import (
     CurrencyUnitsTestFactory,
     HoldersTestFactory,
 )
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 
@@ -573,3 +576,89 @@ class TransactionsTest(TestCase):
         for adjustment in chain(adjustments_service_1, adjustments_service_2):
             with self.assertRaises(AdjustmentTransaction.DoesNotExist):
                 adjustment.refresh_from_db()
+
+    def test_collapse_in_chunks(self):
+        self.create_adjustments(
+            count=5,
+            status="confirmed",
+            checking_account=self.checking_account_unit_1_user_1,
+            amount=100,
+            service=self.service,
+            created_at=self.old_datetime,
+        )
+        pending_outdated = self.create_adjustments(
+            count=3,
+            status="pending",
+            checking_account=self.checking_account_unit_1_user_1,
+            amount=10,
+            service=self.service,
+            created_at=self.old_datetime,
+        )
+        self.create_transfers(
+            count=3,
+            status="confirmed",
+            from_account=self.checking_account_unit_1_user_1,
+            to_account=self.checking_account_unit_1_user_2,
+            amount=50,
+            service=self.service,
+            created_at=self.old_datetime,
+        )
+        self.create_transfers(
+            count=2,
+            status="rejected",
+            from_account=self.checking_account_unit_1_user_1,
+            to_account=self.checking_account_unit_1_user_2,
+            amount=50,
+            service=self.service,
+            created_at=self.old_datetime,
+        )
+
+        collapsed = TransactionsService.collapse_old_transactions(
+            old_than_timedelta=self.cutoff_timedelta, service_names=[self.service.name], chunk_size=2
+        )
+
+        self.assertEqual(collapsed, 10)
+
+        # Одна суммирующая корректировка на счет за запуск, несмотря на несколько пачек
+        collapsed_adjustments = AdjustmentTransaction.objects.filter(
+            status_description=TransactionsService.COLLAPSED_STATUS_DESCRIPTION
+        )
+        self.assertEqual(
+            dict(collapsed_adjustments.values_list("checking_account", "amount")),
+            {self.checking_account_unit_1_user_1.pk: 350, self.checking_account_unit_1_user_2.pk: 150},
+        )
+
+        self.assertEqual(TransferTransaction.objects.count(), 0)
+        self.assertEqual(
+            set(AdjustmentTransaction.objects.filter(status="PENDING").values_list("uuid", flat=True)),
+            {adjustment.uuid for adjustment in pending_outdated},
+        )
+
+        # Следующий запуск схлопывает суммирующие корректировки предыдущего, суммы не меняются
+        self.assertEqual(
+            TransactionsService.collapse_old_transactions(
+                old_than_timedelta=self.cutoff_timedelta, service_names=[self.service.name], chunk_size=2
+            ),
+            2,
+        )
+        self.assertEqual(
+            dict(collapsed_adjustments.values_list("checking_account", "amount")),
+            {self.checking_account_unit_1_user_1.pk: 350, self.checking_account_unit_1_user_2.pk: 150},
+        )
+
+    def test_collapse_chunk_starts_at_checkpoint(self):
+        checkpoint = (self.old_datetime, uuid4())
+
+        with CaptureQueriesContext(connection) as context:
+            TransactionsService._collapse_chunk(
+                model=AdjustmentTransaction,
+                service_id=self.service.pk,
+                cutoff_date=timezone.now() - self.cutoff_timedelta,
+                closed_date=timezone.now(),
+                checkpoint=checkpoint,
+                chunk_size=10,
+            )
+
+        # Граница created_at стоит отдельным условием рядом с OR, сканирование индекса начинается с checkpoint
+        (select,) = [query["sql"] for query in context.captured_queries if query["sql"].startswith("SELECT")]
+        self.assertRegex(select, r'WHERE .*"created_at" >= .* AND \(')
@@ -1,7 +1,8 @@
 from datetime import timedelta
 from decimal import Decimal
+from uuid import uuid4
 
-from currencies.models import CheckingAccount, TransferRule
+from currencies.models import CheckingAccount, TransferRule, TransferTransaction
 from currencies.services import (
     AccountsService,
     AdjustmentsService,
@@ -142,6 +143,48 @@ class CurrencyTransferTransactionServicesTests(TestCase):
         self.assertEqual(self.one_checking_account.amount, 100)
         self.assertEqual(self.two_checking_account.amount, 0)
 
+    def test_held_amount_until_closed(self):
+        transfers = [
+            TransfersService.create(
+                service=self.service,
+                transfer_rule=self.transfer_rule,
+                from_checking_account=self.one_checking_account,
+                to_checking_account=self.two_checking_account,
+                from_amount=from_amount,
+                description="test",
+            )
+            for from_amount in (30, 20)
+        ]
+
+        self.one_checking_account.refresh_from_db()
+        self.assertEqual(self.one_checking_account.amount, 50)
+        self.assertEqual(self.one_checking_account.held_amount, 50)
+
+        TransfersService.confirm(transfer_transaction=transfers[0], status_description="")
+        TransfersService.reject(transfer_transaction=transfers[1], status_description="")
+
+        self.one_checking_account.refresh_from_db()
+        self.two_checking_account.refresh_from_db()
+        self.assertEqual(self.one_checking_account.amount, 70)
+        self.assertEqual(self.one_checking_account.held_amount, 0)
+        self.assertEqual(self.two_checking_account.amount, 30)
+        self.assertEqual(self.two_checking_account.held_amount, 0)
+
+    def test_insufficient_amount_not_change_account(self):
+        with self.assertRaises(TransfersService.ValidationError):
+            TransfersService.create(
+                service=self.service,
+                transfer_rule=self.transfer_rule,
+                from_checking_account=self.one_checking_account,
+                to_checking_account=self.two_checking_account,
+                from_amount=101,
+                description="test",
+            )
+
+        self.one_checking_account.refresh_from_db()
+        self.assertEqual(self.one_checking_account.amount, 100)
+        self.assertEqual(self.one_checking_account.held_amount, 0)
+
     def test_transfer_confirm_rejected_error(self):
         rejected_transfer = TransfersService.reject(
             transfer_transaction=TransfersService.create(
@@ -174,6 +217,93 @@ class CurrencyTransferTransactionServicesTests(TestCase):
         with self.assertRaises(TransfersService.ValidationError):
             TransfersService.reject(transfer_transaction=rejected_transfer, status_description="")
 
+    def test_stale_transfer_closed_once(self):
+        transfer = TransfersService.create(
+            service=self.service,
+            transfer_rule=self.transfer_rule,
+            from_checking_account=self.one_checking_account,
+            to_checking_account=self.two_checking_account,
+            from_amount=70,
+            description="test",
+        )
+        stale_transfer = TransferTransaction.objects.get(pk=transfer.pk)
+
+        # Смена статуса и изменение счетов - два условных UPDATE внутри транзакции и запись в журнал
+        with self.assertNumQueries(5):
+            TransfersService.confirm(transfer_transaction=transfer, status_description="")
+
+        with self.assertRaisesMessage(TransfersService.ValidationError, "The transaction has already been closed"):
+            TransfersService.reject(transfer_transaction=stale_transfer, status_description="")
+
+        stale_transfer.refresh_from_db()
+        self.assertEqual(stale_transfer.status, "CONFIRMED")
+
+        self.one_checking_account.refresh_from_db()
+        self.two_checking_account.refresh_from_db()
+        self.assertEqual(self.one_checking_account.amount, 30)
+        self.assertEqual(self.one_checking_account.held_amount, 0)
+        self.assertEqual(self.two_checking_account.amount, 70)
+
+    def test_instant_transfer(self):
+        transfer = TransfersService.create(
+            service=self.service,
+            transfer_rule=self.transfer_rule,
+            from_checking_account=self.one_checking_account,
+            to_checking_account=self.two_checking_account,
+            from_amount=70,
+            description="test",
+            instant=True,
+        )
+
+        self.assertEqual(transfer.status, "CONFIRMED")
+        self.assertIsNotNone(transfer.closed_at)
+
+        self.one_checking_account.refresh_from_db()
+        self.two_checking_account.refresh_from_db()
+        self.assertEqual(self.one_checking_account.amount, 30)
+        self.assertEqual(self.one_checking_account.held_amount, 0)
+        self.assertEqual(self.two_checking_account.amount, 70)
+
+        with self.assertRaisesMessage(TransfersService.ValidationError, "Insufficient funds"):
+            TransfersService.create(
+                service=self.service,
+                transfer_rule=self.transfer_rule,
+                from_checking_account=self.one_checking_account,
+                to_checking_account=self.two_checking_account,
+                from_amount=31,
+                description="test",
+                instant=True,
+            )
+
+    def test_client_uuid(self):
+        client_uuid = uuid4()
+
+        transfer = TransfersService.create(
+            service=self.service,
+            transfer_rule=self.transfer_rule,
+            from_checking_account=self.one_checking_account,
+            to_checking_account=self.two_checking_account,
+            from_amount=10,
+            description="test",
+            uuid=client_uuid,
+        )
+        self.assertEqual(transfer.uuid, client_uuid)
+
+        with self.assertRaisesMessage(TransfersService.ValidationError, "Transaction with this uuid already exists"):
+            TransfersService.create(
+                service=self.service,
+                transfer_rule=self.transfer_rule,
+                from_checking_account=self.one_checking_account,
+                to_checking_account=self.two_checking_account,
+                from_amount=10,
+                description="test",
+                uuid=client_uuid,
+            )
+
+        self.one_checking_account.refresh_from_db()
+        self.assertEqual(self.one_checking_account.amount, 90)
+        self.assertEqual(self.one_checking_account.held_amount, 10)
+
     def test_transfer_with_different_currency_units(self):
         currency_unit = CurrencyUnitsTestFactory()
 
@@ -252,6 +382,28 @@ class CurrencyTransferTransactionServicesTests(TestCase):
         self.assertEqual(transaction1.status, "REJECTED")
         self.assertEqual(transaction2.status, "REJECTED")
 
+    def test_reject_outdated_in_chunks_returns_amount(self):
+        for _ in range(3):
+            TransfersService.create(
+                service=self.service,
+                transfer_rule=self.transfer_rule,
+                from_checking_account=self.one_checking_account,
+                to_checking_account=self.two_checking_account,
+                from_amount=10,
+                description="test",
+                auto_reject_timedelta=timedelta(seconds=-1),
+            )
+
+        rejecteds = TransfersService.reject_all_outdated(chunk_size=2)
+        self.assertEqual(len(rejecteds), 3)
+
+        self.one_checking_account.refresh_from_db()
+        self.two_checking_account.refresh_from_db()
+
+        self.assertEqual(self.one_checking_account.amount, 100)
+        self.assertEqual(self.two_checking_account.amount, 0)
+        self.assertEqual(self.one_checking_account.held_amount, 0)
+
     def test_transfer_rule_disabled(self):
         rule = TransferRule.objects.create(
             enabled=False, name="test", unit=self.currency_unit, fee_percent=Decimal(0), min_from_amount=Decimal(0)
@@ -1,8 +1,16 @@
 from django.contrib import admin
 
-from .models import CurrencyServiceAuth
+from .models import CurrencyServiceAuth, IdempotencyKey
 
 
 @admin.register(CurrencyServiceAuth)
 class ServiceAuthAdmin(admin.ModelAdmin):
     list_display = ["service", "is_battlemetrics"]
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ["key", "service", "endpoint", "status_code", "created_at"]
+    list_filter = ["endpoint"]
+    search_fields = ["key"]
+    readonly_fields = ["service", "endpoint", "key", "request_hash", "status_code", "response", "created_at"]
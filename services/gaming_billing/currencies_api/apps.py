@@ -5,3 +5,6 @@ class CurrenciesApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "currencies_api"
     verbose_name = "API игровых валют"
+
+    def ready(self) -> None:
+        from . import signals  # noqa
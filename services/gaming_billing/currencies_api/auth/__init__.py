@@ -1 +1 @@
-from .decorators import hmac_service_auth  # noqa
+from .decorators import ahmac_service_auth, hmac_service_auth  # noqa
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from currencies.cache import VersionedCache
+from currencies_api.models import CurrencyServiceAuth
+from django.conf import settings
+
+
+class ServiceAuthCache(VersionedCache[CurrencyServiceAuth]):
+    """Кэш доступов сервисов в памяти процесса, сбрасывается сигналами CurrencyServiceAuth и CurrencyService"""
+
+    version_key = "currencies_api:service_auth_version"
+
+    @property
+    def ttl(self) -> timedelta:
+        return settings.SERVICE_AUTH_CACHE_TTL
+
+    def get(self, *, service_name: str) -> CurrencyServiceAuth:
+        """
+        :raises CurrencyServiceAuth.DoesNotExist: Если доступа сервиса нет, отсутствие не кэшируется
+        """
+        return self._get_or_load(service_name, lambda: self._load(service_name=service_name))
+
+    async def aget(self, *, service_name: str) -> CurrencyServiceAuth:
+        return await self._aget_or_load(service_name, lambda: self._aload(service_name=service_name))
+
+    def _load(self, *, service_name: str) -> CurrencyServiceAuth:
+        return CurrencyServiceAuth.objects.select_related("service").get(service__name=service_name)
+
+    async def _aload(self, *, service_name: str) -> CurrencyServiceAuth:
+        return await CurrencyServiceAuth.objects.select_related("service").aget(service__name=service_name)
+
+
+service_auth_cache = ServiceAuthCache()
@@ -5,37 +5,67 @@ from django.conf import settings
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.validators import ValidationError
 
+from .cache import service_auth_cache
 from .validators import BattlemetricsRequestHMACValidator, TimestampRequestHMACValidator
 
 
 def hmac_service_auth(func):
     @wraps(func)
     def wrapper(self, request, *args, **kwargs):
-        service_header = request.headers.get(settings.SERVICE_HEADER)
-
-        if not service_header:
-            raise AuthenticationFailed("Service header not found")
+        service_header = _get_service_header(request)
 
         try:
-            service_auth = CurrencyServiceAuth.objects.select_related("service").get(service__name=service_header)
+            service_auth = service_auth_cache.get(service_name=service_header)
         except CurrencyServiceAuth.DoesNotExist:
             raise AuthenticationFailed("Service not found")
 
-        if not service_auth.service.enabled:
-            raise AuthenticationFailed("Service disabled")
+        _validate_service_auth(request, service_auth)
+
+        return func(self, request, service_auth, *args, **kwargs)
 
-        if settings.ENABLE_HMAC_VALIDATION:
+    return wrapper
 
-            if service_auth.is_battlemetrics:
-                validator = BattlemetricsRequestHMACValidator()
-            else:
-                validator = TimestampRequestHMACValidator()
 
-            try:
-                validator.validate_request(request=request, secret_key=service_auth.key)
-            except ValidationError as e:
-                raise AuthenticationFailed(e.detail)
+def ahmac_service_auth(func):
+    """hmac_service_auth для async обработчиков, доступ сервиса загружается через async ORM"""
 
-        return func(self, request, service_auth, *args, **kwargs)
+    @wraps(func)
+    async def wrapper(self, request, *args, **kwargs):
+        service_header = _get_service_header(request)
+
+        try:
+            service_auth = await service_auth_cache.aget(service_name=service_header)
+        except CurrencyServiceAuth.DoesNotExist:
+            raise AuthenticationFailed("Service not found")
+
+        _validate_service_auth(request, service_auth)
+
+        return await func(self, request, service_auth, *args, **kwargs)
 
     return wrapper
+
+
+def _get_service_header(request) -> str:
+    service_header = request.headers.get(settings.SERVICE_HEADER)
+
+    if not service_header:
+        raise AuthenticationFailed("Service header not found")
+
+    return service_header
+
+
+def _validate_service_auth(request, service_auth: CurrencyServiceAuth) -> None:
+    if not service_auth.service.enabled:
+        raise AuthenticationFailed("Service disabled")
+
+    if settings.ENABLE_HMAC_VALIDATION:
+
+        if service_auth.is_battlemetrics:
+            validator = BattlemetricsRequestHMACValidator()
+        else:
+            validator = TimestampRequestHMACValidator()
+
+        try:
+            validator.validate_request(request=request, secret_key=service_auth.key)
+        except ValidationError as e:
+            raise AuthenticationFailed(e.detail)
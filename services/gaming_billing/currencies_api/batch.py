@@ -0,0 +1,21 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+
+
+def get_batch_response_data(*, results: list, serializer_class) -> list[dict]:
+    """
+    Собирает ответ пакетного запроса - по одному элементу на каждый элемент запроса, в том же порядке
+
+    Элемент results - объект, который будет передан в serializer_class, или исключение, из-за которого
+    элемент не был обработан
+    """
+    data = []
+
+    for result in results:
+        if isinstance(result, DjangoValidationError):
+            data.append({"success": False, "errors": result.messages})
+        elif isinstance(result, Exception):
+            data.append({"success": False, "errors": [str(result)]})
+        else:
+            data.append({"success": True, **serializer_class(result).data})
+
+    return data
@@ -0,0 +1,35 @@
+from currencies.cache import ReferenceCache
+from django.utils.encoding import smart_str
+from rest_framework import serializers
+
+
+class ReferenceSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, который ищет справочные данные в кэше процесса, а не запросом к базе"""
+
+    def __init__(self, *, reference: ReferenceCache, **kwargs):
+        self.reference = reference
+
+        super().__init__(queryset=reference.model.objects.all(), slug_field=reference.slug_field, **kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail("invalid")
+
+        instance = self.reference.get(data)
+
+        if instance is None:
+            self.fail("does_not_exist", slug_name=self.slug_field, value=smart_str(data))
+
+        return instance
+
+    async def ato_internal_value(self, data):
+        """to_internal_value для async обработчиков, кэш загружается через async ORM"""
+        if not isinstance(data, str):
+            self.fail("invalid")
+
+        instance = await self.reference.aget(data)
+
+        if instance is None:
+            self.fail("does_not_exist", slug_name=self.slug_field, value=smart_str(data))
+
+        return instance
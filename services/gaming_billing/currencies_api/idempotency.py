@@ -0,0 +1,106 @@
+import hashlib
+import json
+from typing import Callable
+
+from common.utils import retry_on_serialization_error
+from currencies.models import CurrencyService
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_KEY_FIELD = "idempotency_key"
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def get_idempotent_response(
+    *, request, service: CurrencyService, endpoint: str, get_response: Callable[[], Response]
+) -> Response:
+    """
+    Выполняет запрос создания не больше одного раза для ключа idempotency_key из данных запроса
+
+    Успешный ответ сохраняется вместе с ключом в той же транзакции БД, что и созданная транзакция. Повтор запроса
+    с тем же ключом возвращает сохраненный ответ одним запросом по уникальному индексу, без проверки данных
+    и изменения счетов. Без ключа запрос выполняется как обычно
+    """
+    key = request.data.get(IDEMPOTENCY_KEY_FIELD)
+
+    if key is None:
+        return get_response()
+
+    if not isinstance(key, str) or not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise ValidationError(
+            {IDEMPOTENCY_KEY_FIELD: [f"Must be a non-empty string up to {IDEMPOTENCY_KEY_MAX_LENGTH} characters"]}
+        )
+
+    request_hash = _get_request_hash(request.data)
+
+    stored = _get_stored(service=service, endpoint=endpoint, key=key)
+    if stored is not None:
+        return _replay(stored, request_hash=request_hash)
+
+    return _create_once(
+        service=service, endpoint=endpoint, key=key, request_hash=request_hash, get_response=get_response
+    )
+
+
+def delete_expired_idempotency_keys() -> int:
+    """Удаляет ключи старше settings.API_IDEMPOTENCY_KEY_TTL, возвращает количество удаленных"""
+    deleted, _ = IdempotencyKey.objects.filter(
+        created_at__lt=timezone.now() - settings.API_IDEMPOTENCY_KEY_TTL
+    ).delete()
+
+    return deleted
+
+
+@retry_on_serialization_error()
+def _create_once(
+    *, service: CurrencyService, endpoint: str, key: str, request_hash: str, get_response: Callable[[], Response]
+) -> Response:
+    try:
+        with transaction.atomic():
+            response = get_response()
+
+            if status.is_success(response.status_code):
+                IdempotencyKey.objects.create(
+                    service=service,
+                    endpoint=endpoint,
+                    key=key,
+                    request_hash=request_hash,
+                    status_code=response.status_code,
+                    response=response.data,
+                )
+    except IntegrityError:
+        # Параллельный запрос с тем же ключом успел сохранить ответ, созданное этим запросом откачено
+        stored = _get_stored(service=service, endpoint=endpoint, key=key)
+
+        if stored is None:
+            raise
+
+        return _replay(stored, request_hash=request_hash)
+
+    return response
+
+
+def _get_stored(*, service: CurrencyService, endpoint: str, key: str) -> IdempotencyKey | None:
+    return (
+        IdempotencyKey.objects.filter(service=service, endpoint=endpoint, key=key)
+        .only("request_hash", "status_code", "response")
+        .first()
+    )
+
+
+def _replay(stored: IdempotencyKey, *, request_hash: str) -> Response:
+    if stored.request_hash != request_hash:
+        raise ValidationError({IDEMPOTENCY_KEY_FIELD: ["Key has already been used with different request data"]})
+
+    return Response(status=stored.status_code, data=stored.response)
+
+
+def _get_request_hash(data) -> str:
+    return hashlib.sha256(json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode()).hexdigest()
@@ -0,0 +1,96 @@
+import hmac
+import http.client
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any
+from urllib.parse import urlsplit
+
+from currencies_api.models import CurrencyServiceAuth
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест запущенного API - отправляет подписанные GET запросы в несколько потоков и выводит"
+        " пропускную способность и задержки. Для сравнения настроек (CONN_MAX_AGE, пул соединений, режим"
+        " сервера) запускайте с одинаковыми параметрами против сервера с разными настройками"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://localhost:8000", help="Адрес запущенного сервиса")
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="Путь с query string, можно указать несколько раз, по умолчанию /api/currencies/units/",
+        )
+        parser.add_argument("--service", required=True, help="Имя сервиса, ключом которого подписываются запросы")
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--warmup", type=int, default=100, help="Запросы перед замером, не учитываются")
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        try:
+            service_auth = CurrencyServiceAuth.objects.select_related("service").get(service__name=options["service"])
+        except CurrencyServiceAuth.DoesNotExist:
+            raise CommandError(f"Service auth for {options['service']} not found")
+
+        if service_auth.is_battlemetrics:
+            raise CommandError("Battlemetrics signature is not supported, use another service")
+
+        url = urlsplit(options["url"])
+        paths = options["paths"] or ["/api/currencies/units/"]
+        local = threading.local()
+
+        def send(number: int) -> tuple[float, int]:
+            if not hasattr(local, "connection"):
+                connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+                local.connection = connection_class(url.netloc, timeout=30)
+
+            path = paths[number % len(paths)]
+            timestamp_text = datetime.now(timezone.utc).isoformat()
+            signature = hmac.digest(
+                service_auth.key.encode(), f"{timestamp_text}.{path}.".encode(), settings.HMAC_HASH_TYPE
+            ).hex()
+
+            headers = {
+                settings.SERVICE_HEADER: service_auth.service.name,
+                settings.HMAC_TIMESTAMP_HEADER: timestamp_text,
+                settings.HMAC_SIGNATURE_HEADER: signature,
+            }
+
+            started = time.perf_counter()
+            try:
+                local.connection.request("GET", path, headers=headers)
+                response = local.connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                local.connection.close()
+                del local.connection
+                status = 0
+
+            return time.perf_counter() - started, status
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            list(executor.map(send, range(options["warmup"])))
+
+            started = time.perf_counter()
+            results = list(executor.map(send, range(options["requests"])))
+            elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for latency, _ in results)
+        errors = sum(1 for _, status in results if not 200 <= status < 300)
+        percentiles = statistics.quantiles(latencies, n=100)
+
+        self.stdout.write(f"Requests: {len(results)}, concurrency: {options['concurrency']}, errors: {errors}")
+        self.stdout.write(f"Throughput: {len(results) / elapsed:.1f} req/s")
+        self.stdout.write(
+            "Latency, ms: "
+            f"p50 {percentiles[49] * 1000:.1f}, p95 {percentiles[94] * 1000:.1f}, p99 {percentiles[98] * 1000:.1f}, "
+            f"max {latencies[-1] * 1000:.1f}"
+        )
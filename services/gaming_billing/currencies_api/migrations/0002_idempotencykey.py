@@ -0,0 +1,34 @@
+# Generated by Django 5.2.14 on 2026-10-17 02:24
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('currencies', '0007_checkingaccount_balance_shards'),
+        ('currencies_api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=64, verbose_name='Запрос')),
+                ('key', models.CharField(max_length=255, verbose_name='Ключ')),
+                ('request_hash', models.CharField(max_length=64, verbose_name='Хэш данных запроса')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='Код ответа')),
+                ('response', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Ответ')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата создания')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='idempotency_keys', to='currencies.currencyservice', verbose_name='Сервис')),
+            ],
+            options={
+                'verbose_name': 'Ключ идемпотентности',
+                'verbose_name_plural': 'Ключи идемпотентности',
+                'constraints': [models.UniqueConstraint(fields=('service', 'endpoint', 'key'), name='unique_idempotency_key')],
+            },
+        ),
+    ]
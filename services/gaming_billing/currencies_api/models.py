@@ -1,4 +1,5 @@
 from currencies.models import CurrencyService
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 
@@ -19,3 +20,27 @@ class CurrencyServiceAuth(models.Model):
     class Meta:
         verbose_name = "Доступ сервиса"
         verbose_name_plural = "Доступы сервисов"
+
+
+class IdempotencyKey(models.Model):
+    service = models.ForeignKey(
+        verbose_name="Сервис", to=CurrencyService, on_delete=models.CASCADE, related_name="idempotency_keys"
+    )
+    endpoint = models.CharField(verbose_name="Запрос", max_length=64)
+    key = models.CharField(verbose_name="Ключ", max_length=255)
+    request_hash = models.CharField(verbose_name="Хэш данных запроса", max_length=64)
+
+    status_code = models.PositiveSmallIntegerField(verbose_name="Код ответа")
+    response = models.JSONField(verbose_name="Ответ", encoder=DjangoJSONEncoder)
+
+    created_at = models.DateTimeField(verbose_name="Дата создания", auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"Ключ идемпотентности '{self.key}' сервиса '{self.service_id}'"  # type: ignore _id adds by django
+
+    class Meta:
+        verbose_name = "Ключ идемпотентности"
+        verbose_name_plural = "Ключи идемпотентности"
+        constraints = [
+            models.UniqueConstraint(fields=["service", "endpoint", "key"], name="unique_idempotency_key"),
+        ]
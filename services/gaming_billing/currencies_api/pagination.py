@@ -1,10 +1,27 @@
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from collections import OrderedDict
+from uuid import UUID
 
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
 from rest_framework.pagination import LimitOffsetPagination as _LimitOffsetPagination
+from rest_framework.pagination import _positive_int
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
-def get_paginated_response(*, pagination_class, serializer_class, queryset, request, view):
+def get_paginated_response(
+    *, pagination_class, serializer_class, queryset, request, view, cursor_pagination_class=None
+):
+    """
+    Если передан cursor_pagination_class - клиент может включить его параметром pagination=cursor
+    """
+    if cursor_pagination_class is not None and request.query_params.get("pagination") == "cursor":
+        pagination_class = cursor_pagination_class
+
     paginator = pagination_class()
 
     page = paginator.paginate_queryset(queryset, request, view=view)
@@ -18,6 +35,26 @@ def get_paginated_response(*, pagination_class, serializer_class, queryset, requ
     return Response(data=serializer.data)
 
 
+async def aget_paginated_response(
+    *, pagination_class, serializer_class, queryset, request, view, cursor_pagination_class=None
+):
+    """get_paginated_response для async обработчиков, страница загружается через async ORM"""
+    if cursor_pagination_class is not None and request.query_params.get("pagination") == "cursor":
+        pagination_class = cursor_pagination_class
+
+    paginator = pagination_class()
+
+    page = await paginator.apaginate_queryset(queryset, request, view=view)
+
+    if page is not None:
+        serializer = serializer_class(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    serializer = serializer_class([instance async for instance in queryset], many=True)
+
+    return Response(data=serializer.data)
+
+
 class LimitOffsetPagination(_LimitOffsetPagination):
     """
     From Django Styleguide
@@ -40,3 +77,133 @@ class LimitOffsetPagination(_LimitOffsetPagination):
 
     def get_paginated_response(self, data):
         return Response(self.get_paginated_data(data))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        if self.count == 0 or self.offset > self.count:
+            return []
+
+        return [instance async for instance in queryset[self.offset : self.offset + self.limit]]
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу (created_at, uuid), от новых записей к старым
+
+    В отличие от LimitOffsetPagination не использует OFFSET, поэтому глубокие страницы загружаются так же быстро,
+    как и первая, и не считает COUNT(*), если его явно не запросили параметром with_count=true.
+    Переход возможен только вперед, по ссылке next или по переданному в cursor значению next_cursor
+    """
+
+    default_limit = 10
+    max_limit = 50
+
+    limit_query_param = "limit"
+    cursor_query_param = "cursor"
+    count_query_param = "with_count"
+
+    ordering = ("created_at", "uuid")
+
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request)
+
+        if self.with_count:
+            self.count = queryset.count()
+
+        return self.set_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request)
+
+        if self.with_count:
+            self.count = await queryset.acount()
+
+        return self.set_page([instance async for instance in page_queryset])
+
+    def get_page_queryset(self, queryset, request):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.with_count = request.query_params.get(self.count_query_param) in ("true", "1")
+        self.count = None
+
+        queryset = queryset.order_by(*[f"-{field}" for field in self.ordering])
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            created_at, uuid = cursor
+            # OR не ограничивает сканирование индекса (created_at, uuid), граница created_at <= начинает его с курсора
+            queryset = queryset.filter(created_at__lte=created_at).filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, uuid__lt=uuid)
+            )
+
+        # Одна лишняя запись показывает, есть ли следующая страница
+        return queryset[: self.limit + 1]
+
+    def set_page(self, results: list) -> list:
+        self.has_next = len(results) > self.limit
+        results = results[: self.limit]
+
+        self.next_cursor = None
+        if self.has_next:
+            self.next_cursor = self.encode_cursor(results[-1])
+
+        return results
+
+    def get_limit(self, request) -> int:
+        try:
+            return _positive_int(request.query_params[self.limit_query_param], strict=True, cutoff=self.max_limit)
+        except (KeyError, ValueError):
+            return self.default_limit
+
+    def decode_cursor(self, request) -> tuple | None:
+        encoded = request.query_params.get(self.cursor_query_param)
+
+        if not encoded:
+            return None
+
+        try:
+            created_at_text, uuid_text = urlsafe_b64decode(encoded.encode("ascii")).decode("ascii").split("|")
+            created_at = parse_datetime(created_at_text)
+            uuid = UUID(uuid_text)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return created_at, uuid
+
+    def encode_cursor(self, instance) -> str:
+        return urlsafe_b64encode(f"{instance.created_at.isoformat()}|{instance.uuid}".encode("ascii")).decode("ascii")
+
+    def get_next_link(self) -> str | None:
+        if self.next_cursor is None:
+            return None
+
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        paginated_data = OrderedDict([("limit", self.limit)])
+
+        if self.count is not None:
+            paginated_data["count"] = self.count
+
+        paginated_data["next_cursor"] = self.next_cursor
+        paginated_data["next"] = self.get_next_link()
+        paginated_data["results"] = data
+
+        return paginated_data
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
@@ -0,0 +1,14 @@
+from currencies.models import CurrencyService
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth.cache import service_auth_cache
+from .models import CurrencyServiceAuth
+
+
+@receiver(post_save, sender=CurrencyService)
+@receiver(post_delete, sender=CurrencyService)
+@receiver(post_save, sender=CurrencyServiceAuth)
+@receiver(post_delete, sender=CurrencyServiceAuth)
+def invalidate_service_auth_cache(**kwargs):
+    service_auth_cache.invalidate()
@@ -0,0 +1,7 @@
+from celery import shared_task
+from currencies_api import idempotency
+
+
+@shared_task
+def delete_expired_idempotency_keys():
+    return idempotency.delete_expired_idempotency_keys()
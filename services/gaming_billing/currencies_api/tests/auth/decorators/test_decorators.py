@@ -1,11 +1,14 @@
 import hmac
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from common.utils import assemble_auth_headers
 from currencies.test_factories import CurrencyServicesTestFactory
+from currencies_api.auth.cache import service_auth_cache
 from currencies_api.auth.decorators import hmac_service_auth
+from currencies_api.models import CurrencyServiceAuth
 from currencies_api.test_factories import CurrencyServiceAuthTestFactory
 from django.conf import settings
+from django.core.cache import caches
 from django.test import TestCase, override_settings
 from django.test.client import RequestFactory
 from rest_framework.exceptions import AuthenticationFailed
@@ -117,3 +120,93 @@ class HMACServiceAuthWithEnabledValidationTests(TestCase):
         )
 
         self.some_view(request=request)  # type: ignore
+
+
+@override_settings(ENABLE_HMAC_VALIDATION=False)
+class HMACServiceAuthCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.factory = RequestFactory()
+
+    def setUp(self):
+        service_auth_cache.clear()
+
+        self.service = CurrencyServicesTestFactory()
+        self.service_auth = CurrencyServiceAuthTestFactory(service=self.service)
+
+        self.request = self.factory.post(
+            "", headers={settings.SERVICE_HEADER: self.service.name}, content_type="application/json"
+        )
+
+    @hmac_service_auth
+    def some_view(self, request, service_auth):
+        return request, service_auth
+
+    def test_second_request_without_queries(self):
+        self.some_view(self.request)  # type: ignore
+
+        with self.assertNumQueries(0):
+            _, service_auth = self.some_view(self.request)  # type: ignore
+
+        self.assertEqual(service_auth.pk, self.service_auth.pk)
+
+    def test_service_save_invalidates(self):
+        self.some_view(self.request)  # type: ignore
+
+        self.service.enabled = False
+        self.service.save()
+
+        with self.assertRaisesMessage(AuthenticationFailed, "Service disabled"):
+            self.some_view(self.request)  # type: ignore
+
+    def test_service_auth_save_invalidates(self):
+        self.some_view(self.request)  # type: ignore
+
+        self.service_auth.key = "new_key"
+        self.service_auth.save()
+
+        _, service_auth = self.some_view(self.request)  # type: ignore
+
+        self.assertEqual(service_auth.key, "new_key")
+
+    def test_service_auth_delete_invalidates(self):
+        self.some_view(self.request)  # type: ignore
+
+        self.service_auth.delete()
+
+        with self.assertRaisesMessage(AuthenticationFailed, "Service not found"):
+            self.some_view(self.request)  # type: ignore
+
+    @override_settings(SERVICE_AUTH_CACHE_TTL=timedelta(0))
+    def test_disabled_cache(self):
+        self.some_view(self.request)  # type: ignore
+
+        with self.assertNumQueries(1):
+            self.some_view(self.request)  # type: ignore
+
+    @override_settings(CACHE_VERSION_CHECK_INTERVAL=timedelta(0))
+    def test_version_bump_from_another_process(self):
+        self.some_view(self.request)  # type: ignore
+
+        # Другой процесс изменил доступ и поднял общую версию, сигнал в этом процессе не сработал
+        versions = caches[settings.CACHE_VERSION_ALIAS]
+        CurrencyServiceAuth.objects.filter(pk=self.service_auth.pk).update(key="new_key")
+        versions.set(service_auth_cache.version_key, versions.get(service_auth_cache.version_key, 0) + 1)
+
+        _, service_auth = self.some_view(self.request)  # type: ignore
+
+        self.assertEqual(service_auth.key, "new_key")
+
+    def test_version_checked_once_per_interval(self):
+        service_auth_cache.reset()
+        self.some_view(self.request)  # type: ignore
+
+        # Версия в общем кэше в базе уже прочитана, до истечения CACHE_VERSION_CHECK_INTERVAL запросов нет
+        with self.assertNumQueries(0):
+            self.some_view(self.request)  # type: ignore
+
+        service_auth_cache.reset()
+
+        # Версия и доступ сервиса
+        with self.assertNumQueries(2):
+            self.some_view(self.request)  # type: ignore
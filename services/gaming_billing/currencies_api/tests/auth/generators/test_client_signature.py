@@ -0,0 +1,55 @@
+import sys
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipIf
+
+from currencies_api.auth.generators import TimestampSignatureGenerator
+from django.test import SimpleTestCase
+from django.test.client import RequestFactory
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[6] / "libs" / "python"))
+
+try:
+    from gaming_billing import GamingBillingSyncAPI
+except ImportError:
+    GamingBillingSyncAPI = None
+
+
+@skipIf(GamingBillingSyncAPI is None, "Client dependencies from libs/python/requirements.txt are not installed")
+class ClientSignatureTests(SimpleTestCase):
+    """Подпись синхронного клиента из libs/python совпадает с подписью, которую считает сервис"""
+
+    def setUp(self):
+        self.generator = TimestampSignatureGenerator(
+            hash_type="sha256", timestamp_header="X-SIGNATURE-TIMESTAMP", timestamp_deviation=timedelta(seconds=10)
+        )
+        self.secret_key = "secret key"
+
+        self.api = GamingBillingSyncAPI("http://testserver", "service", self.secret_key)
+        self.api.pool = mock.Mock()
+        self.api.pool.request.return_value = mock.Mock(status=200, data=b"{}", headers={})
+
+    def assertSignatureMatches(self):
+        (method, url), kwargs = self.api.pool.request.call_args
+        headers = kwargs["headers"]
+
+        request = RequestFactory().generic(
+            method,
+            url.removeprefix("http://testserver"),
+            data=kwargs["body"] or b"",
+            content_type=headers["Content-Type"],
+            headers={"X-SIGNATURE-TIMESTAMP": headers["X-SIGNATURE-TIMESTAMP"]},
+        )
+
+        self.assertEqual(self.generator(request=request, secret_key=self.secret_key), headers["X-SIGNATURE"])
+
+    def test_post(self):
+        self.api.adjustments_create("игрок 1", "gold", Decimal("100.0001"), 'описание "в кавычках"', 60, "key")
+
+        self.assertSignatureMatches()
+
+    def test_get_with_query(self):
+        self.api.accounts_detail("игрок 1&2", "gold")
+
+        self.assertSignatureMatches()
@@ -0,0 +1,62 @@
+from currencies.models import AdjustmentTransaction
+from currencies.services import AccountsService, AdjustmentsService
+from currencies.test_factories import (
+    CurrencyServicesTestFactory,
+    CurrencyUnitsTestFactory,
+    HoldersTestFactory,
+)
+from currencies_api.pagination import KeysetPagination
+from django.db import connection, transaction
+from django.test import TestCase
+from django.test.client import RequestFactory
+from rest_framework.request import Request
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        checking_account = AccountsService.get_or_create(
+            holder=HoldersTestFactory(), currency_unit=CurrencyUnitsTestFactory()
+        )[0]
+        service = CurrencyServicesTestFactory()
+
+        self.adjustments = [
+            AdjustmentsService.create(service=service, checking_account=checking_account, amount=1, description="")
+            for _ in range(5)
+        ]
+
+        self.pagination = KeysetPagination()
+
+    def get_page_queryset(self, after: AdjustmentTransaction):
+        request = Request(RequestFactory().get("/", {"cursor": self.pagination.encode_cursor(after), "limit": 2}))
+
+        return self.pagination.get_page_queryset(AdjustmentTransaction.objects.all(), request)
+
+    def test_page_after_cursor(self):
+        ordered = list(AdjustmentTransaction.objects.order_by("-created_at", "-uuid"))
+
+        self.assertEqual(list(self.get_page_queryset(ordered[1])), ordered[2:5])
+
+    def test_cursor_bounds_created_at(self):
+        # Граница created_at стоит отдельным условием рядом с OR, а не только внутри него
+        where = self.get_page_queryset(self.adjustments[2]).query.where
+
+        self.assertIn(
+            ("created_at", "lte"),
+            [(child.lhs.target.name, child.lookup_name) for child in where.children if hasattr(child, "lhs")],
+        )
+
+    def test_cursor_is_index_bound(self):
+        if connection.vendor != "postgresql":
+            self.skipTest("EXPLAIN format of Postgres")
+
+        sql, params = self.get_page_queryset(self.adjustments[2]).query.sql_with_params()
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # В таблице несколько строк, без запрета планировщик выберет последовательное чтение
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_sort = off")
+            cursor.execute(f"EXPLAIN {sql}", params)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+
+        self.assertIn("adjustment_created_at_uuid_idx", plan)
+        self.assertRegex(plan, r"Index Cond: \(created_at <= ")
@@ -0,0 +1,150 @@
+from decimal import Decimal
+
+from common.utils import assemble_auth_headers
+from currencies.services import (
+    AccountsService,
+    AdjustmentsService,
+    CurrencyServicesService,
+)
+from currencies.test_factories import (
+    CurrencyServicesTestFactory,
+    CurrencyUnitsTestFactory,
+    HoldersTestFactory,
+    HoldersTypeTestFactory,
+)
+from currencies_api.test_factories import CurrencyServiceAuthTestFactory
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+
+@override_settings(ENABLE_HMAC_VALIDATION=False)
+class AccountBulkDetailAPITest(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.service = CurrencyServicesService.get_default()
+        cls.service.enabled = True
+        cls.service.permissions = {"root": True}
+        cls.service.save()
+
+        cls.service_auth = CurrencyServiceAuthTestFactory(service=cls.service)
+
+        cls.holder_1 = HoldersTestFactory()
+        cls.holder_2 = HoldersTestFactory()
+        cls.currency_unit_1 = CurrencyUnitsTestFactory()
+        cls.currency_unit_2 = CurrencyUnitsTestFactory()
+
+        cls.account_1_unit_1 = AccountsService.get_or_create(holder=cls.holder_1, currency_unit=cls.currency_unit_1)[0]
+        cls.account_1_unit_2 = AccountsService.get_or_create(holder=cls.holder_1, currency_unit=cls.currency_unit_2)[0]
+        cls.account_2_unit_1 = AccountsService.get_or_create(holder=cls.holder_2, currency_unit=cls.currency_unit_1)[0]
+
+        AdjustmentsService.confirm(
+            adjustment_transaction=AdjustmentsService.create(
+                service=cls.service, checking_account=cls.account_1_unit_2, amount=100, description=""
+            ),
+            status_description="",
+        )
+
+        cls.bulk_detail_reverse_path = reverse("checking_accounts_bulk_detail")
+
+    def test_get_bulk_detail(self):
+        response = self.client.get(
+            self.bulk_detail_reverse_path,
+            data=dict(
+                holder_id=[self.holder_1.holder_id, self.holder_2.holder_id],
+                unit_symbol=[self.currency_unit_1.symbol, self.currency_unit_2.symbol],
+            ),
+            headers=assemble_auth_headers(service=self.service),
+        )
+
+        data: dict = response.data  # type: ignore
+
+        self.assertEqual(response.status_code, 200, data)
+        self.assertEqual(
+            {
+                holder_id: {symbol: Decimal(amount) for symbol, amount in units.items()}
+                for holder_id, units in data["accounts"].items()
+            },
+            {
+                self.holder_1.holder_id: {
+                    self.currency_unit_1.symbol: Decimal(0),
+                    self.currency_unit_2.symbol: Decimal(100),
+                },
+                self.holder_2.holder_id: {self.currency_unit_1.symbol: Decimal(0)},
+            },
+        )
+        self.assertEqual(
+            data["missing"], [dict(holder_id=self.holder_2.holder_id, unit_symbol=self.currency_unit_2.symbol)]
+        )
+
+    def test_get_bulk_detail_unknown_holder(self):
+        response = self.client.get(
+            self.bulk_detail_reverse_path,
+            data=dict(holder_id=["undefined"], unit_symbol=[self.currency_unit_1.symbol]),
+            headers=assemble_auth_headers(service=self.service),
+        )
+
+        data: dict = response.data  # type: ignore
+
+        self.assertEqual(response.status_code, 200, data)
+        self.assertEqual(data["accounts"], {})
+        self.assertEqual(data["missing"], [dict(holder_id="undefined", unit_symbol=self.currency_unit_1.symbol)])
+
+    def test_get_bulk_detail_with_holder_type(self):
+        holder_type = HoldersTypeTestFactory()
+
+        response = self.client.get(
+            self.bulk_detail_reverse_path,
+            data=dict(
+                holder_id=[self.holder_1.holder_id],
+                unit_symbol=[self.currency_unit_1.symbol],
+                holder_type=holder_type.name,
+            ),
+            headers=assemble_auth_headers(service=self.service),
+        )
+
+        data: dict = response.data  # type: ignore
+
+        self.assertEqual(response.status_code, 200, data)
+        self.assertEqual(data["accounts"], {})
+        self.assertEqual(len(data["missing"]), 1)
+
+    def test_get_bulk_detail_without_holders(self):
+        response = self.client.get(
+            self.bulk_detail_reverse_path,
+            data=dict(unit_symbol=[self.currency_unit_1.symbol]),
+            headers=assemble_auth_headers(service=self.service),
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_bulk_detail_query_count(self):
+        data = dict(
+            holder_id=[self.holder_1.holder_id, self.holder_2.holder_id],
+            unit_symbol=[self.currency_unit_1.symbol, self.currency_unit_2.symbol],
+        )
+
+        self.client.get(self.bulk_detail_reverse_path, data=data, headers=assemble_auth_headers(service=self.service))
+
+        # Доступ сервиса уже в кэше, остаётся один запрос счетов
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.bulk_detail_reverse_path, data=data, headers=assemble_auth_headers(service=self.service)
+            )
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_with_no_access_permissions(self):
+        service = CurrencyServicesTestFactory(permissions={})
+        CurrencyServiceAuthTestFactory(service=service)
+
+        response = self.client.get(
+            self.bulk_detail_reverse_path,
+            data=dict(holder_id=[self.holder_1.holder_id], unit_symbol=[self.currency_unit_1.symbol]),
+            headers=assemble_auth_headers(service=service),
+        )
+
+        data: dict = response.data  # type: ignore
+
+        self.assertEqual(response.status_code, 403)
+        self.assertTrue("Missing required permission" in data["message"], data)
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from common.utils import assemble_auth_headers
+from currencies.services import (
+    AccountsService,
+    AdjustmentsService,
+    CurrencyServicesService,
+    HoldersTypeService,
+)
+from currencies.test_factories import CurrencyUnitsTestFactory, HoldersTestFactory
+from currencies_api.models import CurrencyServiceAuth
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+
+@override_settings(ENABLE_HMAC_VALIDATION=False)
+class AccountLedgerAPITest(APITestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.service = CurrencyServicesService.get_default()
+        cls.service.enabled = True
+        cls.service.permissions = {"root": True}
+        cls.service.save()
+
+        CurrencyServiceAuth.objects.create(service=cls.service, key="", is_battlemetrics=False)
+
+        cls.holder = HoldersTestFactory(holder_type=HoldersTypeService.get_default())
+        cls.currency_unit = CurrencyUnitsTestFactory()
+        cls.account = AccountsService.get_or_create(holder=cls.holder, currency_unit=cls.currency_unit)[0]
+
+        for amount in (100, -30):
+            AdjustmentsService.create(
+                service=cls.service, checking_account=cls.account, amount=amount, description="", instant=True
+            )
+
+        cls.account_params = dict(holder_id=cls.holder.holder_id, unit_symbol=cls.currency_unit.symbol)
+
+    def get(self, name: str, **data):
+        return self.client.get(reverse(name), data=data, headers=assemble_auth_headers(service=self.service))
+
+    def test_balance_at(self):
+        at = timezone.now()
+
+        response = self.get("checking_accounts_balance_at", **self.account_params, at=at)
+
+        self.assertEqual(response.status_code, 200, response.data)  # type: ignore
+        self.assertEqual(response.data["balance"], "70.0000")  # type: ignore
+        self.assertEqual(response.data["currency_unit"], self.currency_unit.symbol)  # type: ignore
+
+        response = self.get("checking_accounts_balance_at", **self.account_params, at=at - timedelta(days=1))
+        self.assertEqual(response.data["balance"], "0.0000")  # type: ignore
+
+    def test_balance_at_unknown_account(self):
+        response = self.get(
+            "checking_accounts_balance_at",
+            holder_id="unknown",
+            unit_symbol=self.currency_unit.symbol,
+            at=timezone.now(),
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_statement(self):
+        response = self.get("checking_accounts_statement", **self.account_params)
+
+        self.assertEqual(response.status_code, 200, response.data)  # type: ignore
+        self.assertEqual(response.data["count"], 2)  # type: ignore
+        self.assertEqual(
+            [(entry["delta"], entry["balance_after"]) for entry in response.data["results"]],  # type: ignore
+            [("-30.0000", "70.0000"), ("100.0000", "100.0000")],
+        )
+
+    def test_statement_period(self):
+        response = self.get(
+            "checking_accounts_statement", **self.account_params, created_after=timezone.now() + timedelta(minutes=1)
+        )
+
+        self.assertEqual(response.data["count"], 0)  # type: ignore
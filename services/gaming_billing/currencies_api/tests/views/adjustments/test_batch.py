@@ -0,0 +1,300 @@
+import uuid
+from decimal import Decimal
+
+from common.utils import assemble_auth_headers
+from currencies.models import CurrencyService, CurrencyUnit, Holder
+from currencies.services import (
+    AccountsService,
+    AdjustmentsService,
+    CurrencyServicesService,
+)
+from currencies.test_factories import CurrencyUnitsTestFactory, HoldersTestFactory
+from currencies_api.test_factories import CurrencyServiceAuthTestFactory
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+
+@override_settings(ENABLE_HMAC_VALIDATION=False, LANGUAGE_CODE="en-us")
+class AdjustmentBatchCreateAPITest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.service = CurrencyServicesService.get_default()
+        cls.service.enabled = True
+        cls.service.permissions = {"root": True}
+        cls.service.save()
+
+        cls.service_auth = CurrencyServiceAuthTestFactory(service=cls.service)
+
+        cls.holder_1: Holder = HoldersTestFactory()
+        cls.holder_2: Holder = HoldersTestFactory()
+        cls.unit: CurrencyUnit = CurrencyUnitsTestFactory()
+
+        cls.account_1 = AccountsService.get_or_create(holder=cls.holder_1, currency_unit=cls.unit)[0]
+        cls.account_2 = AccountsService.get_or_create(holder=cls.holder_2, currency_unit=cls.unit)[0]
+
+        cls.batch_create_reverse_path = reverse("adjustments_batch_create")
+
+        cls.headers = assemble_auth_headers(service=cls.service)
+
+    def create_service_with_permissions(self, *, permissions: dict):
+        service = CurrencyService.objects.create(
+            name="test_name",
+            enabled=True,
+            permissions=permissions,
+        )
+
+        CurrencyServiceAuthTestFactory(service=service)
+
+        return service
+
+    def test_valid_batch_create(self):
+        response = self.client.post(
+            self.batch_create_reverse_path,
+            data=dict(
+                items=[
+                    dict(holder_id=self.holder_1.holder_id, unit_symbol=self.unit.symbol, amount=100, description="1"),
+                    dict(holder_id=self.holder_2.holder_id, unit_symbol=self.unit.symbol, amount=200, description="2"),
+                ]
+            ),
+            headers=self.headers,
+            content_type="application/json",
+        )
+
+        data: dict = response.data  # type: ignore
+
+        self.assertEqual(response.status_code, 200, data)
+        self.assertEqual(len(data["results"]), 2, data)
+
+        for result, amount in zip(data["results"], (100, 200)):
+            self.assertTrue(result["success"], result)
+            self.assertEqual(result["status"], "PENDING", result)
+            self.assertEqual(Decimal(result["amount"]), Decimal(amount), result)
+
+        self.assertEqual(AdjustmentsService.list().count(), 2)
+
+    def test_partial_failure(self):
+        response = self.client.post(
+            self.batch_create_reverse_path,
+            data=dict(
+                items=[
+                    dict(
+                        holder_id=self.holder_1.holder_id, unit_symbol=self.unit.symbol, amount=100, description="test"
+                    ),
+                    dict(holder_id="undefined", unit_symbol=self.unit.symbol, amount=100, description="test"),
+                    dict(
+                        holder_id=self.holder_2.holder_id, unit_symbol=self.unit.symbol, amount=-100, description="test"
+                    ),
+                ]
+            ),
+            headers=self.headers,
+            content_type="application/json",
+        )
+
+        data: dict = response.data  # type: ignore
+        results = data["results"]
+
+        self.assertEqual(response.status_code, 200, data)
+        self.assertTrue(results[0]["success"], results)
+        self.assertFalse(results[1]["success"], results)
+        self.assertEqual(results[1]["errors"], ["Account not found"], results)
+        self.assertFalse(results[2]["success"], results)
+        self.assertEqual(results[2]["errors"], ["Insufficient funds in the checking account"], results)
+
+        self.assertEqual(AdjustmentsService.list().count(), 1)
+
+    def test_empty_items(self):
+        response = self.client.post(
+            self.batch_create_reverse_path,
+            data=dict(items=[]),
+            headers=self.headers,
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_create_permission_not_pass(self):
+        permissions = dict(
+            adjustments=dict(
+                enabled=True,
+                create=dict(
+                    enabled=False,  # NOT PASS
+                    max_amount=1000,
+                    min_amount=0,
+                    max_auto_reject=200,
+                    min_auto_reject=100,
+                ),
+            ),
+        )
+
+        service = self.create_service_with_permissions(permissions=permissions)
+
+        response = self.client.post(
+            self.batch_create_reverse_path,
+            data=dict(
+                items=[
+                    dict(
+                        holder_id=self.holder_1.holder_id, unit_symbol=self.unit.symbol, amount=100, description="test"
+                    ),
+                ]
+            ),
+            headers=assemble_auth_headers(service=service),
+            content_type="application/json",
+        )
+
+        data: dict = response.data  # type: ignore
+
+        self.assertEqual(response.status_code, 403, data)
+        self.assertIn("Creating is disabled", data["message"], data)
+        self.assertEqual(AdjustmentsService.list().count(), 0)
+
+    def test_amount_permission_not_pass_per_item(self):
+        permissions = dict(
+            adjustments=dict(
+                enabled=True,
+                create=dict(
+                    enabled=True,
+                    max_amount=150,
+                    min_amount=0,
+                    max_auto_reject=200,
+                    min_auto_reject=100,
+                ),
+            ),
+        )
+
+        service = self.create_service_with_permissions(permissions=permissions)
+
+        response = self.client.post(
+            self.batch_create_reverse_path,
+            data=dict(
+                items=[
+                    dict(
+                        holder_id=self.holder_1.holder_id, unit_symbol=self.unit.symbol, amount=100, description="test"
+                    ),
+                    dict(
+                        holder_id=self.holder_1.holder_id, unit_symbol=self.unit.symbol, amount=200, description="test"
+                    ),
+                ]
+            ),
+            headers=assemble_auth_headers(service=service),
+            content_type="application/json",
+        )
+
+        data: dict = response.data  # type: ignore
+        results = data["results"]
+
+        self.assertEqual(response.status_code, 200, data)
+        self.assertTrue(results[0]["success"], results)
+        self.assertFalse(results[1]["success"], results)
+        self.assertIn("Amount is out of range", results[1]["errors"][0], results)
+        self.assertEqual(AdjustmentsService.list().count(), 1)
+
+
+@override_settings(ENABLE_HMAC_VALIDATION=False, LANGUAGE_CODE="en-us")
+class AdjustmentBatchConfirmRejectAPITest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.service = CurrencyServicesService.get_default()
+        cls.service.enabled = True
+        cls.service.permissions = {"root": True}
+        cls.service.save()
+
+        cls.service_auth = CurrencyServiceAuthTestFactory(service=cls.service)
+
+        cls.holder: Holder = HoldersTestFactory()
+        cls.unit: CurrencyUnit = CurrencyUnitsTestFactory()
+
+        cls.account = AccountsService.get_or_create(holder=cls.holder, currency_unit=cls.unit)[0]
+
+        cls.batch_confirm_reverse_path = reverse("adjustments_batch_confirm")
+        cls.batch_reject_reverse_path = reverse("adjustments_batch_reject")
+
+        cls.headers = assemble_auth_headers(service=cls.service)
+
+    def setUp(self):
+        self.pending_transactions = [
+            AdjustmentsService.create(
+                service=self.service, checking_account=self.account, amount=100, description="test"
+            )
+            for _ in range(2)
+        ]
+
+    def test_valid_batch_confirm(self):
+        not_found_uuid = uuid.uuid4()
+
+        response = self.client.post(
+            self.batch_confirm_reverse_path,
+            data=dict(
+                uuids=[*[str(adjustment.uuid) for adjustment in self.pending_transactions], str(not_found_uuid)],
+                status_description="test_status",
+            ),
+            headers=self.headers,
+            content_type="application/json",
+        )
+
+        data: dict = response.data  # type: ignore
+        results = data["results"]
+
+        self.assertEqual(response.status_code, 200, data)
+        self.assertTrue(results[0]["success"], results)
+        self.assertTrue(results[1]["success"], results)
+        self.assertEqual(results[0]["status"], "CONFIRMED", results)
+        self.assertFalse(results[2]["success"], results)
+        self.assertEqual(results[2]["errors"], ["Transaction not found"], results)
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.amount, 200)
+
+    def test_valid_batch_reject(self):
+        response = self.client.post(
+            self.batch_reject_reverse_path,
+            data=dict(
+                uuids=[str(adjustment.uuid) for adjustment in self.pending_transactions],
+                status_description="test_status",
+            ),
+            headers=self.headers,
+            content_type="application/json",
+        )
+
+        data: dict = response.data  # type: ignore
+        results = data["results"]
+
+        self.assertEqual(response.status_code, 200, data)
+        self.assertEqual([result["status"] for result in results], ["REJECTED", "REJECTED"], results)
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.amount, 0)
+
+    def test_confirm_permission_not_pass_per_service(self):
+        service = CurrencyService.objects.create(
+            name="test_name",
+            enabled=True,
+            permissions=dict(
+                adjustments=dict(
+                    enabled=True,
+                    confirm=dict(enabled=True, services=["another_service"]),  # NOT PASS
+                ),
+            ),
+        )
+        CurrencyServiceAuthTestFactory(service=service)
+
+        response = self.client.post(
+            self.batch_confirm_reverse_path,
+            data=dict(
+                uuids=[str(adjustment.uuid) for adjustment in self.pending_transactions],
+                status_description="test_status",
+            ),
+            headers=assemble_auth_headers(service=service),
+            content_type="application/json",
+        )
+
+        data: dict = response.data  # type: ignore
+        results = data["results"]
+
+        self.assertEqual(response.status_code, 200, data)
+
+        for result in results:
+            self.assertFalse(result["success"], results)
+            self.assertIn("No access to confirm the transaction from another service", result["errors"][0], results)
+
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.amount, 0)
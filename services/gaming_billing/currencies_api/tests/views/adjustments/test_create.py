@@ -9,7 +9,9 @@ from currencies.services import (
 )
 from currencies.test_factories import CurrencyUnitsTestFactory, HoldersTestFactory
 from currencies_api.test_factories import CurrencyServiceAuthTestFactory
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 
@@ -44,6 +46,20 @@ class AdjustmentCreateAPITest(TestCase):
 
         return service
 
+    def test_create_without_reference_queries(self):
+        data = dict(holder_id=self.holder.holder_id, unit_symbol=self.unit.symbol, amount=100, description="test")
+
+        self.client.post(self.create_reverse_path, data=data, headers=self.headers)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.create_reverse_path, data=data, headers=self.headers)
+
+        self.assertEqual(response.status_code, 201, response.data)  # type: ignore
+
+        tables = ("currencies_currencyunit", "currencies_currencyservice", "currencies_api_currencyserviceauth")
+        for query in context.captured_queries:
+            self.assertFalse(any(f'FROM "{table}"' in query["sql"] for table in tables), query["sql"])
+
     def test_valid_create(self):
         response = self.client.post(
             self.create_reverse_path,
@@ -84,3 +84,56 @@ class AdjustmentListAPITest(TestCase):
 
         self.assertEqual(response.status_code, 403)
         self.assertIn("Missing required permission", data["message"])
+
+    def test_cursor_pagination(self):
+        amounts = []
+        cursor = None
+
+        for _ in range(4):
+            query = dict(pagination="cursor", limit=3)
+            if cursor is not None:
+                query["cursor"] = cursor
+
+            response = self.client.get(
+                self.list_reverse_path,
+                data=query,
+                headers=assemble_auth_headers(service=self.service),
+            )
+
+            data = response.data  # type: ignore
+
+            self.assertEqual(response.status_code, 200, data)
+            self.assertNotIn("count", data)
+
+            amounts.extend(Decimal(adjustment["amount"]) for adjustment in data["results"])
+            cursor = data["next_cursor"]
+
+            if cursor is None:
+                break
+
+        self.assertIsNone(cursor)
+        self.assertIsNone(data["next"])
+        self.assertEqual(amounts, [Decimal(i) for i in range(10, 0, -1)])
+
+    def test_cursor_pagination_with_count(self):
+        response = self.client.get(
+            self.list_reverse_path,
+            data=dict(pagination="cursor", limit=3, with_count="true"),
+            headers=assemble_auth_headers(service=self.service),
+        )
+
+        data = response.data  # type: ignore
+
+        self.assertEqual(response.status_code, 200, data)
+        self.assertEqual(data["count"], 10)
+        self.assertEqual(len(data["results"]), 3)
+        self.assertIn("cursor=", data["next"])
+
+    def test_cursor_pagination_invalid_cursor(self):
+        response = self.client.get(
+            self.list_reverse_path,
+            data=dict(pagination="cursor", cursor="invalid"),
+            headers=assemble_auth_headers(service=self.service),
+        )
+
+        self.assertEqual(response.status_code, 404)
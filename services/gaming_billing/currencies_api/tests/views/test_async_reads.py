@@ -0,0 +1,141 @@
+from asgiref.sync import sync_to_async
+from common.utils import assemble_auth_headers
+from currencies.services import AccountsService, AdjustmentsService, HoldersTypeService
+from currencies.test_factories import (
+    CurrencyServicesTestFactory,
+    CurrencyUnitsTestFactory,
+    HoldersTestFactory,
+)
+from currencies_api.test_factories import CurrencyServiceAuthTestFactory
+from currencies_api.views.accounts import (
+    CheckingAccountsDetailAPI,
+    CheckingAccountsDetailAsyncAPI,
+    CheckingAccountsListAPI,
+    CheckingAccountsListAsyncAPI,
+)
+from currencies_api.views.adjustments import AdjustmentsListAPI, AdjustmentsListAsyncAPI
+from currencies_api.views.exchanges import ExchangesListAPI, ExchangesListAsyncAPI
+from currencies_api.views.holders import (
+    HoldersDetailAPI,
+    HoldersDetailAsyncAPI,
+    HoldersListAPI,
+    HoldersListAsyncAPI,
+)
+from currencies_api.views.transfers import TransfersListAPI, TransfersListAsyncAPI
+from currencies_api.views.units import CurrencyUnitsListAPI, CurrencyUnitsListAsyncAPI
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+
+
+@override_settings(ENABLE_HMAC_VALIDATION=False)
+class AsyncReadAPITests(TestCase):
+    """Async обработчики чтения должны отвечать так же, как синхронные"""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.service = CurrencyServicesTestFactory()
+        CurrencyServiceAuthTestFactory(service=cls.service)
+
+        cls.holder_type = HoldersTypeService.get_default()
+        cls.holders = [HoldersTestFactory(holder_type=cls.holder_type) for _ in range(3)]
+        cls.unit = CurrencyUnitsTestFactory()
+
+        cls.accounts = [
+            AccountsService.get_or_create(holder=holder, currency_unit=cls.unit)[0] for holder in cls.holders
+        ]
+
+        for account in cls.accounts:
+            AdjustmentsService.create(service=cls.service, checking_account=account, amount=10, description="")
+
+    async def get_responses(self, sync_view, async_view, *, data: dict, service=None):
+        headers = assemble_auth_headers(service=service or self.service)
+
+        sync_response = await sync_to_async(sync_view.as_view())(RequestFactory().get("/", data, headers=headers))
+        async_response = await async_view.as_view()(AsyncRequestFactory().get("/", data, headers=headers))
+
+        return sync_response, async_response
+
+    async def assert_same_response(self, sync_view, async_view, *, data: dict, status_code: int = 200, service=None):
+        sync_response, async_response = await self.get_responses(sync_view, async_view, data=data, service=service)
+
+        self.assertEqual(async_response.status_code, status_code)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.data, sync_response.data)
+
+    async def test_holders_detail(self):
+        await self.assert_same_response(
+            HoldersDetailAPI, HoldersDetailAsyncAPI, data=dict(holder_id=self.holders[0].holder_id)
+        )
+        await self.assert_same_response(
+            HoldersDetailAPI, HoldersDetailAsyncAPI, data=dict(holder_id="not found holder"), status_code=404
+        )
+
+    async def test_holders_list(self):
+        await self.assert_same_response(HoldersListAPI, HoldersListAsyncAPI, data=dict(limit=2, offset=1))
+
+    async def test_accounts_detail(self):
+        holder_id = self.holders[0].holder_id
+
+        await self.assert_same_response(
+            CheckingAccountsDetailAPI,
+            CheckingAccountsDetailAsyncAPI,
+            data=dict(holder_id=holder_id, unit_symbol=self.unit.symbol),
+        )
+        await self.assert_same_response(
+            CheckingAccountsDetailAPI,
+            CheckingAccountsDetailAsyncAPI,
+            data=dict(holder_id=holder_id, unit_symbol="not found unit"),
+            status_code=400,
+        )
+        await self.assert_same_response(
+            CheckingAccountsDetailAPI,
+            CheckingAccountsDetailAsyncAPI,
+            data=dict(holder_id=holder_id, holder_type="not found type", unit_symbol=self.unit.symbol),
+            status_code=400,
+        )
+        await self.assert_same_response(
+            CheckingAccountsDetailAPI,
+            CheckingAccountsDetailAsyncAPI,
+            data=dict(holder_id="not found holder", unit_symbol=self.unit.symbol),
+            status_code=404,
+        )
+
+    async def test_accounts_list(self):
+        await self.assert_same_response(CheckingAccountsListAPI, CheckingAccountsListAsyncAPI, data=dict(limit=10))
+
+    async def test_units_list(self):
+        await self.assert_same_response(CurrencyUnitsListAPI, CurrencyUnitsListAsyncAPI, data={})
+
+    async def test_transactions_list(self):
+        for sync_view, async_view in (
+            (AdjustmentsListAPI, AdjustmentsListAsyncAPI),
+            (TransfersListAPI, TransfersListAsyncAPI),
+            (ExchangesListAPI, ExchangesListAsyncAPI),
+        ):
+            with self.subTest(view=async_view.__name__):
+                await self.assert_same_response(sync_view, async_view, data=dict(limit=2))
+                await self.assert_same_response(sync_view, async_view, data=dict(pagination="cursor", limit=2))
+
+    async def test_cursor_next_page(self):
+        _, response = await self.get_responses(
+            AdjustmentsListAPI, AdjustmentsListAsyncAPI, data=dict(pagination="cursor", limit=2, with_count="true")
+        )
+
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(response.data["count"], 3)
+
+        await self.assert_same_response(
+            AdjustmentsListAPI,
+            AdjustmentsListAsyncAPI,
+            data=dict(pagination="cursor", limit=2, cursor=response.data["next_cursor"]),
+        )
+
+    async def test_service_not_found(self):
+        service = await sync_to_async(CurrencyServicesTestFactory)()
+
+        await self.assert_same_response(HoldersListAPI, HoldersListAsyncAPI, data={}, service=service, status_code=403)
+
+    async def test_access_denied(self):
+        service = await sync_to_async(CurrencyServicesTestFactory)(permissions={})
+        await sync_to_async(CurrencyServiceAuthTestFactory)(service=service)
+
+        await self.assert_same_response(HoldersListAPI, HoldersListAsyncAPI, data={}, service=service, status_code=403)
@@ -0,0 +1,141 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from common.utils import assemble_auth_headers
+from currencies.models import TransferRule
+from currencies.services import AccountsService, AdjustmentsService, TransfersService
+from currencies.test_factories import (
+    CurrencyServicesTestFactory,
+    CurrencyUnitsTestFactory,
+    HoldersTestFactory,
+)
+from currencies_api.idempotency import delete_expired_idempotency_keys
+from currencies_api.models import IdempotencyKey
+from currencies_api.test_factories import CurrencyServiceAuthTestFactory
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+
+@override_settings(ENABLE_HMAC_VALIDATION=False)
+class IdempotencyKeyAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.service = CurrencyServicesTestFactory()
+        CurrencyServiceAuthTestFactory(service=cls.service)
+
+        cls.holder_1 = HoldersTestFactory()
+        cls.holder_2 = HoldersTestFactory()
+        cls.unit = CurrencyUnitsTestFactory()
+
+        cls.account_1 = AccountsService.get_or_create(holder=cls.holder_1, currency_unit=cls.unit)[0]
+        cls.account_2 = AccountsService.get_or_create(holder=cls.holder_2, currency_unit=cls.unit)[0]
+
+        cls.transfer_rule = TransferRule.objects.create(
+            enabled=True,
+            name="idempotency_transfer_rule",
+            unit=cls.unit,
+            fee_percent=Decimal("0"),
+            min_from_amount=Decimal("0"),
+        )
+
+        AdjustmentsService.confirm(
+            adjustment_transaction=AdjustmentsService.create(
+                service=cls.service, checking_account=cls.account_1, amount=100, description=""
+            ),
+            status_description="",
+        )
+
+        cls.headers = assemble_auth_headers(service=cls.service)
+
+    def create_transfer(self, *, amount=10, headers=None, **data):
+        return self.client.post(
+            reverse("transfers_create"),
+            data=dict(
+                from_holder_id=self.holder_1.holder_id,
+                to_holder_id=self.holder_2.holder_id,
+                transfer_rule=self.transfer_rule.name,
+                amount=amount,
+                description="test",
+                **data,
+            ),
+            headers=headers or self.headers,
+        )
+
+    def test_replay_returns_original_response(self):
+        first = self.create_transfer(idempotency_key="transfer-1")
+        self.assertEqual(first.status_code, 201, first.data)  # type: ignore
+
+        # Только поиск сохраненного ответа, доступ сервиса уже в кэше
+        with self.assertNumQueries(1):
+            replay = self.create_transfer(idempotency_key="transfer-1")
+
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.data, first.data)  # type: ignore
+        self.assertEqual(TransfersService.list().count(), 1)
+
+        self.account_1.refresh_from_db()
+        self.assertEqual(self.account_1.amount, 90)
+        self.assertEqual(self.account_1.held_amount, 10)
+
+    def test_without_key(self):
+        self.create_transfer()
+        self.create_transfer()
+
+        self.assertEqual(TransfersService.list().count(), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_key_with_different_data(self):
+        self.create_transfer(idempotency_key="transfer-1")
+
+        response = self.create_transfer(amount=20, idempotency_key="transfer-1")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("idempotency_key", response.data["extra"]["fields"])  # type: ignore
+        self.assertEqual(TransfersService.list().count(), 1)
+
+    def test_invalid_key(self):
+        response = self.create_transfer(idempotency_key="k" * 256)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("idempotency_key", response.data["extra"]["fields"])  # type: ignore
+
+    def test_error_response_not_stored(self):
+        response = self.create_transfer(amount=1000, idempotency_key="transfer-1")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        response = self.create_transfer(amount=1000, idempotency_key="transfer-1")
+        self.assertEqual(response.status_code, 400)
+
+    def test_keys_separated_by_service_and_endpoint(self):
+        service = CurrencyServicesTestFactory()
+        CurrencyServiceAuthTestFactory(service=service)
+
+        self.create_transfer(idempotency_key="key")
+        self.create_transfer(idempotency_key="key", headers=assemble_auth_headers(service=service))
+
+        response = self.client.post(
+            reverse("adjustments_create"),
+            data=dict(
+                holder_id=self.holder_1.holder_id,
+                unit_symbol=self.unit.symbol,
+                amount=5,
+                description="test",
+                idempotency_key="key",
+            ),
+            headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, 201, response.data)  # type: ignore
+        self.assertEqual(TransfersService.list().count(), 2)
+        self.assertEqual(IdempotencyKey.objects.count(), 3)
+
+    def test_delete_expired_keys(self):
+        self.create_transfer(idempotency_key="old")
+        self.create_transfer(idempotency_key="new")
+
+        IdempotencyKey.objects.filter(key="old").update(created_at=timezone.now() - timedelta(days=30))
+
+        self.assertEqual(delete_expired_idempotency_keys(), 1)
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["new"])
@@ -66,6 +66,50 @@ class TransfersCreateAPITests(TestCase):
 
         self.assertEqual(TransfersService.list().count(), 1)
 
+    def test_instant(self):
+        permissions = {
+            "transfers": {
+                "enabled": True,
+                "create": {
+                    "enabled": True,
+                    "max_auto_reject": 1000,
+                    "min_auto_reject": 0,
+                    "min_amount": 0,
+                    "max_amount": 1000,
+                },
+            },
+        }
+        service = CurrencyServicesTestFactory(permissions=permissions)
+        CurrencyServiceAuthTestFactory(service=service)
+
+        data = dict(
+            from_holder_id=self.holder_1.holder_id,
+            to_holder_id=self.holder_2.holder_id,
+            transfer_rule=self.transfer_rule.name,
+            amount=10,
+            description="test",
+            instant=True,
+            uuid="7b4f0f4e-3a52-4a53-8b0c-5a4b86b1d7a1",
+        )
+
+        response = self.client.post(self.create_reverse_path, data=data, headers=assemble_auth_headers(service=service))
+
+        self.assertEqual(response.status_code, 403)
+        self.assertIn("Instant transactions are disabled", response.data.get("message"))  # type: ignore
+
+        permissions["transfers"]["create"]["instant"] = True
+        service.permissions = permissions
+        service.save()
+
+        response = self.client.post(self.create_reverse_path, data=data, headers=assemble_auth_headers(service=service))
+
+        self.assertEqual(response.status_code, 201, response.data)  # type: ignore
+        self.assertEqual(response.data["status"], "CONFIRMED")  # type: ignore
+        self.assertEqual(response.data["uuid"], data["uuid"])  # type: ignore
+
+        self.account_holder_2.refresh_from_db()
+        self.assertEqual(self.account_holder_2.amount, 10)
+
     def test_enforce_create_permissions(self):
         service = CurrencyServicesTestFactory(
             permissions={
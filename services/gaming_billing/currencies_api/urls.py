@@ -1,59 +1,100 @@
+from django.conf import settings
 from django.urls import path
 
 from .views.accounts import (
+    CheckingAccountsBalanceAtAPI,
+    CheckingAccountsBulkDetailAPI,
     CheckingAccountsCreateAPI,
     CheckingAccountsDetailAPI,
+    CheckingAccountsDetailAsyncAPI,
     CheckingAccountsListAPI,
+    CheckingAccountsListAsyncAPI,
+    CheckingAccountsStatementAPI,
 )
 from .views.adjustments import (
+    AdjustmentsBatchConfirmAPI,
+    AdjustmentsBatchCreateAPI,
+    AdjustmentsBatchRejectAPI,
     AdjustmentsConfirmAPI,
     AdjustmentsCreateAPI,
     AdjustmentsListAPI,
+    AdjustmentsListAsyncAPI,
     AdjustmentsRejectAPI,
 )
 from .views.exchanges import (
     ExchangesConfirmAPI,
     ExchangesCreateAPI,
     ExchangesListAPI,
+    ExchangesListAsyncAPI,
     ExchangesRejectAPI,
 )
 from .views.holders import (
     HoldersCreateAPI,
     HoldersDetailAPI,
+    HoldersDetailAsyncAPI,
     HoldersListAPI,
+    HoldersListAsyncAPI,
     HoldersUpdateAPI,
 )
 from .views.transfers import (
     TransfersConfirmAPI,
     TransfersCreateAPI,
     TransfersListAPI,
+    TransfersListAsyncAPI,
     TransfersRejectAPI,
 )
-from .views.units import CurrencyUnitsListAPI
+from .views.units import CurrencyUnitsListAPI, CurrencyUnitsListAsyncAPI
+
+# Под ASGI сервером запросы чтения обрабатываются async обработчиками
+async_reads = settings.API_ASYNC_READ_ENDPOINTS
 
 urlpatterns = [
-    path("holders/", HoldersListAPI.as_view(), name="holders_list"),
-    path("holders/detail/", HoldersDetailAPI.as_view(), name="holders_detail"),
+    path("holders/", (HoldersListAsyncAPI if async_reads else HoldersListAPI).as_view(), name="holders_list"),
+    path(
+        "holders/detail/", (HoldersDetailAsyncAPI if async_reads else HoldersDetailAPI).as_view(), name="holders_detail"
+    ),
     path("holders/create/", HoldersCreateAPI.as_view(), name="holders_create"),
     path("holders/update/", HoldersUpdateAPI.as_view(), name="holders_update"),
     #
-    path("accounts/", CheckingAccountsListAPI.as_view(), name="checking_accounts_list"),
-    path("accounts/detail/", CheckingAccountsDetailAPI.as_view(), name="checking_accounts_detail"),
+    path(
+        "accounts/",
+        (CheckingAccountsListAsyncAPI if async_reads else CheckingAccountsListAPI).as_view(),
+        name="checking_accounts_list",
+    ),
+    path(
+        "accounts/detail/",
+        (CheckingAccountsDetailAsyncAPI if async_reads else CheckingAccountsDetailAPI).as_view(),
+        name="checking_accounts_detail",
+    ),
+    path("accounts/bulk/", CheckingAccountsBulkDetailAPI.as_view(), name="checking_accounts_bulk_detail"),
     path("accounts/create/", CheckingAccountsCreateAPI.as_view(), name="checking_accounts_create"),
+    path("accounts/balance_at/", CheckingAccountsBalanceAtAPI.as_view(), name="checking_accounts_balance_at"),
+    path("accounts/statement/", CheckingAccountsStatementAPI.as_view(), name="checking_accounts_statement"),
     #
-    path("units/", CurrencyUnitsListAPI.as_view(), name="currency_units_list"),
+    path(
+        "units/",
+        (CurrencyUnitsListAsyncAPI if async_reads else CurrencyUnitsListAPI).as_view(),
+        name="currency_units_list",
+    ),
     #
-    path("adjustments/", AdjustmentsListAPI.as_view(), name="adjustments_list"),
+    path(
+        "adjustments/",
+        (AdjustmentsListAsyncAPI if async_reads else AdjustmentsListAPI).as_view(),
+        name="adjustments_list",
+    ),
     path("adjustments/create/", AdjustmentsCreateAPI.as_view(), name="adjustments_create"),
     path("adjustments/confirm/", AdjustmentsConfirmAPI.as_view(), name="adjustments_confirm"),
     path("adjustments/reject/", AdjustmentsRejectAPI.as_view(), name="adjustments_reject"),
+    path("adjustments/batch/create/", AdjustmentsBatchCreateAPI.as_view(), name="adjustments_batch_create"),
+    path("adjustments/batch/confirm/", AdjustmentsBatchConfirmAPI.as_view(), name="adjustments_batch_confirm"),
+    path("adjustments/batch/reject/", AdjustmentsBatchRejectAPI.as_view(), name="adjustments_batch_reject"),
     #
-    path("transfers/", TransfersListAPI.as_view(), name="transfers_list"),
+    path("transfers/", (TransfersListAsyncAPI if async_reads else TransfersListAPI).as_view(), name="transfers_list"),
     path("transfers/create/", TransfersCreateAPI.as_view(), name="transfers_create"),
     path("transfers/confirm/", TransfersConfirmAPI.as_view(), name="transfers_confirm"),
     path("transfers/reject/", TransfersRejectAPI.as_view(), name="transfers_reject"),
     #
-    path("exchanges/", ExchangesListAPI.as_view(), name="exchanges_list"),
+    path("exchanges/", (ExchangesListAsyncAPI if async_reads else ExchangesListAPI).as_view(), name="exchanges_list"),
     path("exchanges/create/", ExchangesCreateAPI.as_view(), name="exchanges_create"),
     path("exchanges/confirm/", ExchangesConfirmAPI.as_view(), name="exchanges_confirm"),
     path("exchanges/reject/", ExchangesRejectAPI.as_view(), name="exchanges_reject"),
@@ -1,77 +1,274 @@
-from currencies.models import CurrencyUnit, HolderType
+from currencies.models import CheckingAccount, CurrencyUnit, HolderType
 from currencies.permissions import AccountsPermissionsService
-from currencies.services import AccountsService, HoldersService, HoldersTypeService
-from currencies_api.auth import hmac_service_auth
+from currencies.services import (
+    AccountsService,
+    HoldersService,
+    HoldersTypeService,
+    LedgerService,
+    ReferencesService,
+)
+from currencies_api.auth import ahmac_service_auth, hmac_service_auth
+from currencies_api.fields import ReferenceSlugRelatedField
 from currencies_api.models import CurrencyServiceAuth
-from currencies_api.pagination import LimitOffsetPagination, get_paginated_response
+from currencies_api.pagination import (
+    LimitOffsetPagination,
+    aget_paginated_response,
+    get_paginated_response,
+)
+from django.conf import settings
 from django.http import Http404
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .base import AsyncAPIView
+
 
 class CheckingAccountsDetailAPI(APIView):
     class InputSerializer(serializers.Serializer):
         holder_id = serializers.CharField()
-        holder_type = serializers.SlugRelatedField(
-            queryset=HolderType.objects.all(), slug_field="name", default=HoldersTypeService.get_default
+        holder_type = ReferenceSlugRelatedField(
+            reference=ReferencesService.holder_types, default=HoldersTypeService.get_default
         )
-        unit_symbol = serializers.SlugRelatedField(queryset=CurrencyUnit.objects.all(), slug_field="symbol")
+        unit_symbol = ReferenceSlugRelatedField(reference=ReferencesService.currency_units)
 
     class OutputSerializer(serializers.Serializer):
         holder_enabled = serializers.BooleanField(source="holder.enabled")
         holder_id = serializers.CharField(source="holder.holder_id")
         holder_type = serializers.CharField(source="holder.holder_type.name")
         currency_unit = serializers.CharField(source="account.currency_unit.symbol")
-        amount = serializers.DecimalField(max_digits=13, decimal_places=4, source="account.amount")
+        amount = serializers.DecimalField(max_digits=13, decimal_places=4, source="account.balance")
+        held_amount = serializers.DecimalField(max_digits=13, decimal_places=4, source="account.held_amount")
         created_at = serializers.DateTimeField(source="account.created_at")
         updated_at = serializers.DateTimeField(source="account.updated_at")
 
-    @hmac_service_auth
-    def get(self, request, service_auth: CurrencyServiceAuth):
-        AccountsPermissionsService.enforce_access(permissions=service_auth.service.permissions)
+    def get_query_data(self, request, service_auth: CurrencyServiceAuth) -> dict:
+        AccountsPermissionsService.enforce_access(permissions=service_auth.service.permissions_policy)
 
         serializer = self.InputSerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
 
-        holder_id: str = serializer.validated_data["holder_id"]  # type: ignore
-        holder_type: HolderType = serializer.validated_data["holder_type"]  # type: ignore
-        currency_unit: CurrencyUnit = serializer.validated_data["unit_symbol"]  # type: ignore
-
-        holder = HoldersService.get(holder_id=holder_id, holder_type=holder_type)
+        return serializer.validated_data  # type: ignore
 
+    def get_response(self, *, holder, account) -> Response:
         if holder is None:
             raise Http404("Holder not found")
 
-        account = AccountsService.get(holder=holder, currency_unit=currency_unit)
-
         if account is None:
             raise Http404("Account not found")
 
         return Response(self.OutputSerializer(dict(account=account, holder=holder)).data)
 
+    @hmac_service_auth
+    def get(self, request, service_auth: CurrencyServiceAuth):
+        query_data = self.get_query_data(request, service_auth)
+
+        holder_id: str = query_data["holder_id"]
+        holder_type: HolderType = query_data["holder_type"]
+        currency_unit: CurrencyUnit = query_data["unit_symbol"]
+
+        holder = HoldersService.get(holder_id=holder_id, holder_type=holder_type)
+        account = None if holder is None else AccountsService.get(holder=holder, currency_unit=currency_unit)
+
+        return self.get_response(holder=holder, account=account)
+
+
+class CheckingAccountsDetailAsyncAPI(AsyncAPIView, CheckingAccountsDetailAPI):
+    class InputSerializer(serializers.Serializer):
+        # Справочники проверяются в обработчике через ato_internal_value, to_internal_value синхронный
+        holder_id = serializers.CharField()
+        holder_type = serializers.CharField(required=False)
+        unit_symbol = serializers.CharField()
+
+    holder_type_field = ReferenceSlugRelatedField(reference=ReferencesService.holder_types)
+    unit_symbol_field = ReferenceSlugRelatedField(reference=ReferencesService.currency_units)
+
+    @ahmac_service_auth
+    async def get(self, request, service_auth: CurrencyServiceAuth):
+        query_data = self.get_query_data(request, service_auth)
+
+        holder_id: str = query_data["holder_id"]
+
+        if "holder_type" in query_data:
+            holder_type = await self.aget_reference("holder_type", self.holder_type_field, query_data)
+        else:
+            holder_type = await HoldersTypeService.aget_default()
+
+        currency_unit = await self.aget_reference("unit_symbol", self.unit_symbol_field, query_data)
+
+        holder = await HoldersService.aget(holder_id=holder_id, holder_type=holder_type)
+        account = None if holder is None else await AccountsService.aget(holder=holder, currency_unit=currency_unit)
+
+        return self.get_response(holder=holder, account=account)
+
+    async def aget_reference(self, field_name: str, field: ReferenceSlugRelatedField, query_data: dict):
+        try:
+            return await field.ato_internal_value(query_data[field_name])
+        except ValidationError as e:
+            raise ValidationError({field_name: e.detail})
+
+
+class CheckingAccountsBalanceAtAPI(APIView):
+    class InputSerializer(serializers.Serializer):
+        holder_id = serializers.CharField()
+        holder_type = ReferenceSlugRelatedField(
+            reference=ReferencesService.holder_types, default=HoldersTypeService.get_default
+        )
+        unit_symbol = ReferenceSlugRelatedField(reference=ReferencesService.currency_units)
+        at = serializers.DateTimeField()
+
+    class OutputSerializer(serializers.Serializer):
+        holder_id = serializers.CharField()
+        currency_unit = serializers.CharField()
+        at = serializers.DateTimeField()
+        balance = serializers.DecimalField(max_digits=13, decimal_places=4)
+
+    @hmac_service_auth
+    def get(self, request, service_auth: CurrencyServiceAuth):
+        AccountsPermissionsService.enforce_access(permissions=service_auth.service.permissions_policy)
+
+        serializer = self.InputSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        account = _get_checking_account(serializer.validated_data)  # type: ignore
+        at = serializer.validated_data["at"]  # type: ignore
+
+        return Response(
+            self.OutputSerializer(
+                dict(
+                    holder_id=serializer.validated_data["holder_id"],  # type: ignore
+                    currency_unit=account.currency_unit.symbol,
+                    at=at,
+                    balance=LedgerService.balance_at(checking_account=account, at=at),
+                )
+            ).data
+        )
+
+
+class CheckingAccountsStatementAPI(APIView):
+    class InputSerializer(serializers.Serializer):
+        holder_id = serializers.CharField()
+        holder_type = ReferenceSlugRelatedField(
+            reference=ReferencesService.holder_types, default=HoldersTypeService.get_default
+        )
+        unit_symbol = ReferenceSlugRelatedField(reference=ReferencesService.currency_units)
+        created_after = serializers.DateTimeField(required=False)
+        created_before = serializers.DateTimeField(required=False)
+
+    class OutputSerializer(serializers.Serializer):
+        delta = serializers.DecimalField(max_digits=13, decimal_places=4)
+        balance_after = serializers.DecimalField(max_digits=13, decimal_places=4)
+        created_at = serializers.DateTimeField()
+
+    @hmac_service_auth
+    def get(self, request, service_auth: CurrencyServiceAuth):
+        AccountsPermissionsService.enforce_access(permissions=service_auth.service.permissions_policy)
+
+        serializer = self.InputSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        entries = LedgerService.statement(
+            checking_account=_get_checking_account(serializer.validated_data),  # type: ignore
+            created_after=serializer.validated_data.get("created_after"),  # type: ignore
+            created_before=serializer.validated_data.get("created_before"),  # type: ignore
+        )
+
+        return get_paginated_response(
+            pagination_class=LimitOffsetPagination,
+            serializer_class=self.OutputSerializer,
+            queryset=entries,
+            request=request,
+            view=self,
+        )
+
+
+def _get_checking_account(validated_data: dict) -> CheckingAccount:
+    holder = HoldersService.get(holder_id=validated_data["holder_id"], holder_type=validated_data["holder_type"])
+
+    if holder is None:
+        raise Http404("Holder not found")
+
+    account = AccountsService.get(holder=holder, currency_unit=validated_data["unit_symbol"])
+
+    if account is None:
+        raise Http404("Account not found")
+
+    return account
+
+
+class CheckingAccountsBulkDetailAPI(APIView):
+    class InputSerializer(serializers.Serializer):
+        holder_id = serializers.ListField(
+            child=serializers.CharField(), allow_empty=False, max_length=settings.CURRENCY_BATCH_MAX_ITEMS
+        )
+        holder_type = serializers.CharField(required=False)
+        unit_symbol = serializers.ListField(
+            child=serializers.CharField(), allow_empty=False, max_length=settings.CURRENCY_BATCH_MAX_ITEMS
+        )
+
+    class OutputSerializer(serializers.Serializer):
+        class MissingSerializer(serializers.Serializer):
+            holder_id = serializers.CharField()
+            unit_symbol = serializers.CharField()
+
+        accounts = serializers.DictField(
+            child=serializers.DictField(child=serializers.DecimalField(max_digits=13, decimal_places=4))
+        )
+        missing = MissingSerializer(many=True)
+
+    @hmac_service_auth
+    def get(self, request, service_auth: CurrencyServiceAuth):
+        AccountsPermissionsService.enforce_access(permissions=service_auth.service.permissions_policy)
+
+        serializer = self.InputSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        holder_ids: list[str] = serializer.validated_data["holder_id"]  # type: ignore
+        holder_type: str | None = serializer.validated_data.get("holder_type")  # type: ignore
+        unit_symbols: list[str] = serializer.validated_data["unit_symbol"]  # type: ignore
+
+        accounts = AccountsService.get_many(
+            holder_ids=holder_ids, unit_symbols=unit_symbols, holder_type_name=holder_type
+        )
+
+        amounts: dict[str, dict] = {}
+        missing = []
+
+        for holder_id in dict.fromkeys(holder_ids):
+            for unit_symbol in dict.fromkeys(unit_symbols):
+                account = accounts.get((holder_id, unit_symbol))
+
+                if account is None:
+                    missing.append(dict(holder_id=holder_id, unit_symbol=unit_symbol))
+                else:
+                    amounts.setdefault(holder_id, {})[unit_symbol] = account.balance
+
+        return Response(self.OutputSerializer(dict(accounts=amounts, missing=missing)).data)
+
 
 class CheckingAccountsCreateAPI(APIView):
     class InputSerializer(serializers.Serializer):
         holder_id = serializers.CharField()
-        holder_type = serializers.SlugRelatedField(
-            queryset=HolderType.objects.all(), slug_field="name", default=HoldersTypeService.get_default
+        holder_type = ReferenceSlugRelatedField(
+            reference=ReferencesService.holder_types, default=HoldersTypeService.get_default
         )
-        unit_symbol = serializers.SlugRelatedField(queryset=CurrencyUnit.objects.all(), slug_field="symbol")
+        unit_symbol = ReferenceSlugRelatedField(reference=ReferencesService.currency_units)
 
     class OutputSerializer(serializers.Serializer):
         holder_enabled = serializers.BooleanField(source="holder.enabled")
         holder_id = serializers.CharField(source="holder.holder_id")
         holder_type = serializers.CharField(source="holder.holder_type.name")
         currency_unit = serializers.CharField(source="account.currency_unit.symbol")
-        amount = serializers.DecimalField(max_digits=13, decimal_places=4, source="account.amount")
+        amount = serializers.DecimalField(max_digits=13, decimal_places=4, source="account.balance")
+        held_amount = serializers.DecimalField(max_digits=13, decimal_places=4, source="account.held_amount")
         created_at = serializers.DateTimeField(source="account.created_at")
         updated_at = serializers.DateTimeField(source="account.updated_at")
         created_now = serializers.BooleanField()
 
     @hmac_service_auth
     def post(self, request, service_auth: CurrencyServiceAuth):
-        AccountsPermissionsService.enforce_create(permissions=service_auth.service.permissions)
+        AccountsPermissionsService.enforce_create(permissions=service_auth.service.permissions_policy)
 
         serializer = self.InputSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -118,25 +315,39 @@ class CheckingAccountsListAPI(APIView):
         holder_id = serializers.CharField(source="holder.holder_id")
         holder_type = serializers.CharField(source="holder.holder_type.name")
         currency_unit = serializers.CharField(source="currency_unit.symbol")
-        amount = serializers.DecimalField(max_digits=13, decimal_places=4)
+        amount = serializers.DecimalField(max_digits=13, decimal_places=4, source="balance")
+        held_amount = serializers.DecimalField(max_digits=13, decimal_places=4)
         created_at = serializers.DateTimeField()
         updated_at = serializers.DateTimeField()
 
-    @hmac_service_auth
-    def get(self, request, service_auth: CurrencyServiceAuth):
-        AccountsPermissionsService.enforce_access(permissions=service_auth.service.permissions)
+    def get_queryset(self, request, service_auth: CurrencyServiceAuth):
+        AccountsPermissionsService.enforce_access(permissions=service_auth.service.permissions_policy)
 
         filter_serializer = self.FilterSerializer(data=request.query_params)
         filter_serializer.is_valid(raise_exception=True)
 
-        accounts = AccountsService.list(
+        return AccountsService.list(
             filters=filter_serializer.validated_data,  # type: ignore
         ).select_related("holder__holder_type", "currency_unit")
 
+    @hmac_service_auth
+    def get(self, request, service_auth: CurrencyServiceAuth):
         return get_paginated_response(
             pagination_class=self.Pagination,
             serializer_class=self.OutputSerializer,
-            queryset=accounts,
+            queryset=self.get_queryset(request, service_auth),
+            request=request,
+            view=self,
+        )
+
+
+class CheckingAccountsListAsyncAPI(AsyncAPIView, CheckingAccountsListAPI):
+    @ahmac_service_auth
+    async def get(self, request, service_auth: CurrencyServiceAuth):
+        return await aget_paginated_response(
+            pagination_class=self.Pagination,
+            serializer_class=self.OutputSerializer,
+            queryset=self.get_queryset(request, service_auth),
             request=request,
             view=self,
         )
@@ -1,26 +1,39 @@
 from datetime import timedelta
 from decimal import Decimal
+from uuid import UUID
 
 from currencies.models import AdjustmentTransaction, CurrencyUnit, Holder
 from currencies.permissions import AdjustmentsPermissionsService
-from currencies.services import AccountsService, AdjustmentsService
-from currencies_api.auth import hmac_service_auth
+from currencies.services import AccountsService, AdjustmentsService, ReferencesService
+from currencies_api.auth import ahmac_service_auth, hmac_service_auth
+from currencies_api.batch import get_batch_response_data
+from currencies_api.fields import ReferenceSlugRelatedField
+from currencies_api.idempotency import get_idempotent_response
 from currencies_api.models import CurrencyServiceAuth
-from currencies_api.pagination import LimitOffsetPagination, get_paginated_response
+from currencies_api.pagination import (
+    KeysetPagination,
+    LimitOffsetPagination,
+    aget_paginated_response,
+    get_paginated_response,
+)
 from django.conf import settings
 from rest_framework import serializers, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .base import AsyncAPIView
+
 
 class AdjustmentsCreateAPI(APIView):
     class InputSerializer(serializers.Serializer):
         holder_id = serializers.SlugRelatedField(queryset=Holder.objects.all(), slug_field="holder_id")
-        unit_symbol = serializers.SlugRelatedField(queryset=CurrencyUnit.objects.all(), slug_field="symbol")
+        unit_symbol = ReferenceSlugRelatedField(reference=ReferencesService.currency_units)
         amount = serializers.DecimalField(max_digits=13, decimal_places=4)
         description = serializers.CharField()
         auto_reject_timeout = serializers.IntegerField(min_value=1, default=settings.DEFAULT_AUTO_REJECT_SECONDS)
+        instant = serializers.BooleanField(default=False)
+        uuid = serializers.UUIDField(required=False)
 
     class OutputSerializer(serializers.Serializer):
         uuid = serializers.UUIDField()
@@ -29,7 +42,14 @@ class AdjustmentsCreateAPI(APIView):
 
     @hmac_service_auth
     def post(self, request, service_auth: CurrencyServiceAuth):
+        return get_idempotent_response(
+            request=request,
+            service=service_auth.service,
+            endpoint="adjustments.create",
+            get_response=lambda: self.create(request, service_auth),
+        )
 
+    def create(self, request, service_auth: CurrencyServiceAuth) -> Response:
         serializer = self.InputSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -38,12 +58,18 @@ class AdjustmentsCreateAPI(APIView):
         amount: Decimal = serializer.validated_data["amount"]  # type: ignore
         description: str = serializer.validated_data["description"]  # type: ignore
         auto_reject_timeout: int = serializer.validated_data["auto_reject_timeout"]  # type: ignore
+        instant: bool = serializer.validated_data["instant"]  # type: ignore
+        uuid: UUID | None = serializer.validated_data.get("uuid")  # type: ignore
+
+        AdjustmentsPermissionsService.enforce_create(permissions=service_auth.service.permissions_policy)
+
+        if instant:
+            AdjustmentsPermissionsService.enforce_instant(permissions=service_auth.service.permissions_policy)
 
-        AdjustmentsPermissionsService.enforce_create(permissions=service_auth.service.permissions)
         AdjustmentsPermissionsService.enforce_auto_reject_timeout(
-            permissions=service_auth.service.permissions, auto_reject=auto_reject_timeout
+            permissions=service_auth.service.permissions_policy, auto_reject=auto_reject_timeout
         )
-        AdjustmentsPermissionsService.enforce_amount(permissions=service_auth.service.permissions, amount=amount)
+        AdjustmentsPermissionsService.enforce_amount(permissions=service_auth.service.permissions_policy, amount=amount)
 
         account = AccountsService.get(holder=holder, currency_unit=unit)
         if account is None:
@@ -55,6 +81,8 @@ class AdjustmentsCreateAPI(APIView):
             amount=amount,
             description=description,
             auto_reject_timedelta=timedelta(seconds=auto_reject_timeout),
+            instant=instant,
+            uuid=uuid,
         )
 
         return Response(status=status.HTTP_201_CREATED, data=self.OutputSerializer(adjustment).data)
@@ -77,7 +105,7 @@ class AdjustmentsConfirmAPI(APIView):
         status_description: str = serializer.validated_data["status_description"]  # type: ignore
 
         AdjustmentsPermissionsService.enforce_confirm(
-            permissions=service_auth.service.permissions, service_name=adjustment.service.name
+            permissions=service_auth.service.permissions_policy, service_name=adjustment.service.name
         )
 
         AdjustmentsService.confirm(
@@ -105,7 +133,7 @@ class AdjustmentsRejectAPI(APIView):
         status_description: str = serializer.validated_data["status_description"]  # type: ignore
 
         AdjustmentsPermissionsService.enforce_reject(
-            permissions=service_auth.service.permissions, service_name=adjustment.service.name
+            permissions=service_auth.service.permissions_policy, service_name=adjustment.service.name
         )
 
         AdjustmentsService.reject(
@@ -116,10 +144,215 @@ class AdjustmentsRejectAPI(APIView):
         return Response(status=status.HTTP_200_OK)
 
 
+class AdjustmentsBatchCreateAPI(APIView):
+    class InputSerializer(serializers.Serializer):
+        class ItemSerializer(serializers.Serializer):
+            holder_id = serializers.CharField()
+            unit_symbol = serializers.CharField()
+            amount = serializers.DecimalField(max_digits=13, decimal_places=4)
+            description = serializers.CharField()
+            auto_reject_timeout = serializers.IntegerField(min_value=1, default=settings.DEFAULT_AUTO_REJECT_SECONDS)
+
+        items = ItemSerializer(many=True, allow_empty=False, max_length=settings.CURRENCY_BATCH_MAX_ITEMS)
+
+    class OutputSerializer(serializers.Serializer):
+        uuid = serializers.UUIDField()
+        status = serializers.CharField()
+        amount = serializers.DecimalField(max_digits=13, decimal_places=4)
+
+    @hmac_service_auth
+    def post(self, request, service_auth: CurrencyServiceAuth):
+
+        serializer = self.InputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        items: list[dict] = serializer.validated_data["items"]  # type: ignore
+        permissions = service_auth.service.permissions_policy
+
+        AdjustmentsPermissionsService.enforce_create(permissions=permissions)
+
+        accounts = AccountsService.get_many(
+            holder_ids=[item["holder_id"] for item in items],
+            unit_symbols=[item["unit_symbol"] for item in items],
+        )
+
+        results: list = [None] * len(items)
+        create_indexes = []
+        create_items = []
+
+        for index, item in enumerate(items):
+            try:
+                AdjustmentsPermissionsService.enforce_auto_reject_timeout(
+                    permissions=permissions, auto_reject=item["auto_reject_timeout"]
+                )
+                AdjustmentsPermissionsService.enforce_amount(permissions=permissions, amount=item["amount"])
+            except AdjustmentsPermissionsService.PermissionDenied as e:
+                results[index] = e
+                continue
+
+            account = accounts.get((item["holder_id"], item["unit_symbol"]))
+            if account is None:
+                results[index] = AdjustmentsService.ValidationError("Account not found")
+                continue
+
+            create_indexes.append(index)
+            create_items.append(
+                dict(
+                    checking_account=account,
+                    amount=item["amount"],
+                    description=item["description"],
+                    auto_reject_timedelta=timedelta(seconds=item["auto_reject_timeout"]),
+                )
+            )
+
+        created = AdjustmentsService.create_many(service=service_auth.service, items=create_items)
+
+        for index, result in zip(create_indexes, created):
+            results[index] = result
+
+        return Response(
+            status=status.HTTP_200_OK,
+            data={"results": get_batch_response_data(results=results, serializer_class=self.OutputSerializer)},
+        )
+
+
+class AdjustmentsBatchConfirmAPI(APIView):
+    class InputSerializer(serializers.Serializer):
+        uuids = serializers.ListField(
+            child=serializers.UUIDField(), allow_empty=False, max_length=settings.CURRENCY_BATCH_MAX_ITEMS
+        )
+        status_description = serializers.CharField()
+
+    class OutputSerializer(serializers.Serializer):
+        uuid = serializers.UUIDField()
+        status = serializers.CharField()
+
+    @hmac_service_auth
+    def post(self, request, service_auth: CurrencyServiceAuth):
+
+        serializer = self.InputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        uuids: list[UUID] = serializer.validated_data["uuids"]  # type: ignore
+        status_description: str = serializer.validated_data["status_description"]  # type: ignore
+
+        adjustments = AdjustmentTransaction.objects.select_related("service").in_bulk(uuids)
+
+        # Права проверяются один раз на каждый сервис, создавший транзакции
+        denied_by_service: dict[str, Exception | None] = {}
+
+        results: list = [None] * len(uuids)
+        confirm_indexes = []
+        confirm_adjustments = []
+
+        for index, uuid in enumerate(uuids):
+            adjustment = adjustments.get(uuid)
+            if adjustment is None:
+                results[index] = AdjustmentsService.ValidationError("Transaction not found")
+                continue
+
+            service_name = adjustment.service.name
+            if service_name not in denied_by_service:
+                try:
+                    AdjustmentsPermissionsService.enforce_confirm(
+                        permissions=service_auth.service.permissions_policy, service_name=service_name
+                    )
+                    denied_by_service[service_name] = None
+                except AdjustmentsPermissionsService.PermissionDenied as e:
+                    denied_by_service[service_name] = e
+
+            if denied_by_service[service_name] is not None:
+                results[index] = denied_by_service[service_name]
+                continue
+
+            confirm_indexes.append(index)
+            confirm_adjustments.append(adjustment)
+
+        confirmed = AdjustmentsService.confirm_many(
+            adjustment_transactions=confirm_adjustments, status_description=status_description
+        )
+
+        for index, result in zip(confirm_indexes, confirmed):
+            results[index] = result
+
+        return Response(
+            status=status.HTTP_200_OK,
+            data={"results": get_batch_response_data(results=results, serializer_class=self.OutputSerializer)},
+        )
+
+
+class AdjustmentsBatchRejectAPI(APIView):
+    class InputSerializer(serializers.Serializer):
+        uuids = serializers.ListField(
+            child=serializers.UUIDField(), allow_empty=False, max_length=settings.CURRENCY_BATCH_MAX_ITEMS
+        )
+        status_description = serializers.CharField()
+
+    class OutputSerializer(serializers.Serializer):
+        uuid = serializers.UUIDField()
+        status = serializers.CharField()
+
+    @hmac_service_auth
+    def post(self, request, service_auth: CurrencyServiceAuth):
+
+        serializer = self.InputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        uuids: list[UUID] = serializer.validated_data["uuids"]  # type: ignore
+        status_description: str = serializer.validated_data["status_description"]  # type: ignore
+
+        adjustments = AdjustmentTransaction.objects.select_related("service").in_bulk(uuids)
+
+        # Права проверяются один раз на каждый сервис, создавший транзакции
+        denied_by_service: dict[str, Exception | None] = {}
+
+        results: list = [None] * len(uuids)
+        reject_indexes = []
+        reject_adjustments = []
+
+        for index, uuid in enumerate(uuids):
+            adjustment = adjustments.get(uuid)
+            if adjustment is None:
+                results[index] = AdjustmentsService.ValidationError("Transaction not found")
+                continue
+
+            service_name = adjustment.service.name
+            if service_name not in denied_by_service:
+                try:
+                    AdjustmentsPermissionsService.enforce_reject(
+                        permissions=service_auth.service.permissions_policy, service_name=service_name
+                    )
+                    denied_by_service[service_name] = None
+                except AdjustmentsPermissionsService.PermissionDenied as e:
+                    denied_by_service[service_name] = e
+
+            if denied_by_service[service_name] is not None:
+                results[index] = denied_by_service[service_name]
+                continue
+
+            reject_indexes.append(index)
+            reject_adjustments.append(adjustment)
+
+        rejected = AdjustmentsService.reject_many(
+            adjustment_transactions=reject_adjustments, status_description=status_description
+        )
+
+        for index, result in zip(reject_indexes, rejected):
+            results[index] = result
+
+        return Response(
+            status=status.HTTP_200_OK,
+            data={"results": get_batch_response_data(results=results, serializer_class=self.OutputSerializer)},
+        )
+
+
 class AdjustmentsListAPI(APIView):
     class Pagination(LimitOffsetPagination):
         pass
 
+    class CursorPagination(KeysetPagination):
+        pass
+
     class FilterSerializer(serializers.Serializer):
         service = serializers.CharField(required=False)
         status = serializers.CharField(required=False)
@@ -144,21 +377,36 @@ class AdjustmentsListAPI(APIView):
         closed_at = serializers.DateTimeField()
         auto_reject_after = serializers.DateTimeField()
 
-    @hmac_service_auth
-    def get(self, request, service_auth: CurrencyServiceAuth):
-        AdjustmentsPermissionsService.enforce_access(permissions=service_auth.service.permissions)
+    def get_queryset(self, request, service_auth: CurrencyServiceAuth):
+        AdjustmentsPermissionsService.enforce_access(permissions=service_auth.service.permissions_policy)
 
         filter_serializer = self.FilterSerializer(data=request.query_params)
         filter_serializer.is_valid(raise_exception=True)
 
-        adjustments = AdjustmentsService.list(
+        return AdjustmentsService.list(
             filters=filter_serializer.validated_data,  # type: ignore
         ).select_related("service", "checking_account__holder", "checking_account__currency_unit")
 
+    @hmac_service_auth
+    def get(self, request, service_auth: CurrencyServiceAuth):
         return get_paginated_response(
             pagination_class=self.Pagination,
+            cursor_pagination_class=self.CursorPagination,
+            serializer_class=self.OutputSerializer,
+            queryset=self.get_queryset(request, service_auth),
+            request=request,
+            view=self,
+        )
+
+
+class AdjustmentsListAsyncAPI(AsyncAPIView, AdjustmentsListAPI):
+    @ahmac_service_auth
+    async def get(self, request, service_auth: CurrencyServiceAuth):
+        return await aget_paginated_response(
+            pagination_class=self.Pagination,
+            cursor_pagination_class=self.CursorPagination,
             serializer_class=self.OutputSerializer,
-            queryset=adjustments,
+            queryset=self.get_queryset(request, service_auth),
             request=request,
             view=self,
         )
@@ -0,0 +1,42 @@
+from inspect import isawaitable
+
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView с async обработчиками, для запуска под ASGI сервером
+
+    Сервисы проверяются декоратором ahmac_service_auth, поэтому стандартные аутентификация и права DRF
+    отключены - они обращаются к сессии и пользователю синхронно
+    """
+
+    authentication_classes = ()
+    permission_classes = ()
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            self.initial(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+
+            # options у DRF синхронный
+            if isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
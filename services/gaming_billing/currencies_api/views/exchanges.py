@@ -1,27 +1,39 @@
 from datetime import timedelta
 from decimal import Decimal
+from uuid import UUID
 
 from currencies.models import CurrencyUnit, ExchangeRule, ExchangeTransaction, Holder
 from currencies.permissions import ExchangesPermissionsService
-from currencies.services import ExchangesService
-from currencies_api.auth import hmac_service_auth
+from currencies.services import ExchangesService, ReferencesService
+from currencies_api.auth import ahmac_service_auth, hmac_service_auth
+from currencies_api.fields import ReferenceSlugRelatedField
+from currencies_api.idempotency import get_idempotent_response
 from currencies_api.models import CurrencyServiceAuth
-from currencies_api.pagination import LimitOffsetPagination, get_paginated_response
+from currencies_api.pagination import (
+    KeysetPagination,
+    LimitOffsetPagination,
+    aget_paginated_response,
+    get_paginated_response,
+)
 from django.conf import settings
 from rest_framework import serializers, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .base import AsyncAPIView
+
 
 class ExchangesCreateAPI(APIView):
     class InputSerializer(serializers.Serializer):
         holder_id = serializers.SlugRelatedField(queryset=Holder.objects.all(), slug_field="holder_id")
-        exchange_rule = serializers.SlugRelatedField(queryset=ExchangeRule.objects.all(), slug_field="name")
-        from_unit = serializers.SlugRelatedField(queryset=CurrencyUnit.objects.all(), slug_field="symbol")
-        to_unit = serializers.SlugRelatedField(queryset=CurrencyUnit.objects.all(), slug_field="symbol")
+        exchange_rule = ReferenceSlugRelatedField(reference=ReferencesService.exchange_rules)
+        from_unit = ReferenceSlugRelatedField(reference=ReferencesService.currency_units)
+        to_unit = ReferenceSlugRelatedField(reference=ReferencesService.currency_units)
         from_amount = serializers.DecimalField(max_digits=13, decimal_places=4)
         description = serializers.CharField()
         auto_reject_timeout = serializers.IntegerField(min_value=1, default=settings.DEFAULT_AUTO_REJECT_SECONDS)
+        instant = serializers.BooleanField(default=False)
+        uuid = serializers.UUIDField(required=False)
 
     class OutputSerializer(serializers.Serializer):
         uuid = serializers.UUIDField()
@@ -31,7 +43,14 @@ class ExchangesCreateAPI(APIView):
 
     @hmac_service_auth
     def post(self, request, service_auth: CurrencyServiceAuth):
+        return get_idempotent_response(
+            request=request,
+            service=service_auth.service,
+            endpoint="exchanges.create",
+            get_response=lambda: self.create(request, service_auth),
+        )
 
+    def create(self, request, service_auth: CurrencyServiceAuth) -> Response:
         serializer = self.InputSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -42,12 +61,20 @@ class ExchangesCreateAPI(APIView):
         from_amount: Decimal = serializer.validated_data["from_amount"]  # type: ignore
         description: str = serializer.validated_data["description"]  # type: ignore
         auto_reject_timeout: int = serializer.validated_data["auto_reject_timeout"]  # type: ignore
+        instant: bool = serializer.validated_data["instant"]  # type: ignore
+        uuid: UUID | None = serializer.validated_data.get("uuid")  # type: ignore
+
+        ExchangesPermissionsService.enforce_create(permissions=service_auth.service.permissions_policy)
+
+        if instant:
+            ExchangesPermissionsService.enforce_instant(permissions=service_auth.service.permissions_policy)
 
-        ExchangesPermissionsService.enforce_create(permissions=service_auth.service.permissions)
         ExchangesPermissionsService.enforce_auto_reject_timeout(
-            permissions=service_auth.service.permissions, auto_reject=auto_reject_timeout
+            permissions=service_auth.service.permissions_policy, auto_reject=auto_reject_timeout
+        )
+        ExchangesPermissionsService.enforce_amount(
+            permissions=service_auth.service.permissions_policy, amount=from_amount
         )
-        ExchangesPermissionsService.enforce_amount(permissions=service_auth.service.permissions, amount=from_amount)
 
         exchange = ExchangesService.create(
             service=service_auth.service,
@@ -58,6 +85,8 @@ class ExchangesCreateAPI(APIView):
             from_amount=from_amount,
             description=description,
             auto_reject_timedelta=timedelta(seconds=auto_reject_timeout),
+            instant=instant,
+            uuid=uuid,
         )
 
         return Response(status=status.HTTP_201_CREATED, data=self.OutputSerializer(exchange).data)
@@ -78,7 +107,7 @@ class ExchangesConfirmAPI(APIView):
         status_description: str = serializer.validated_data["status_description"]  # type: ignore
 
         ExchangesPermissionsService.enforce_confirm(
-            permissions=service_auth.service.permissions, service_name=exchange.service.name
+            permissions=service_auth.service.permissions_policy, service_name=exchange.service.name
         )
 
         ExchangesService.confirm(exchange_transaction=exchange, status_description=status_description)
@@ -101,7 +130,7 @@ class ExchangesRejectAPI(APIView):
         status_description: str = serializer.validated_data["status_description"]  # type: ignore
 
         ExchangesPermissionsService.enforce_reject(
-            permissions=service_auth.service.permissions, service_name=exchange.service.name
+            permissions=service_auth.service.permissions_policy, service_name=exchange.service.name
         )
 
         ExchangesService.reject(exchange_transaction=exchange, status_description=status_description)
@@ -113,6 +142,9 @@ class ExchangesListAPI(APIView):
     class Pagination(LimitOffsetPagination):
         pass
 
+    class CursorPagination(KeysetPagination):
+        pass
+
     class FilterSerializer(serializers.Serializer):
         service = serializers.CharField(required=False)
         status = serializers.CharField(required=False)
@@ -149,14 +181,13 @@ class ExchangesListAPI(APIView):
         from_amount = serializers.DecimalField(max_digits=13, decimal_places=4)
         to_amount = serializers.DecimalField(max_digits=13, decimal_places=4)
 
-    @hmac_service_auth
-    def get(self, request, service_auth: CurrencyServiceAuth):
-        ExchangesPermissionsService.enforce_access(permissions=service_auth.service.permissions)
+    def get_queryset(self, request, service_auth: CurrencyServiceAuth):
+        ExchangesPermissionsService.enforce_access(permissions=service_auth.service.permissions_policy)
 
         filter_serializer = self.FilterSerializer(data=request.query_params)
         filter_serializer.is_valid(raise_exception=True)
 
-        exchanges = ExchangesService.list(
+        return ExchangesService.list(
             filters=filter_serializer.validated_data,  # type: ignore
         ).select_related(
             "service",
@@ -166,10 +197,26 @@ class ExchangesListAPI(APIView):
             "to_checking_account__currency_unit",
         )
 
+    @hmac_service_auth
+    def get(self, request, service_auth: CurrencyServiceAuth):
         return get_paginated_response(
             pagination_class=self.Pagination,
+            cursor_pagination_class=self.CursorPagination,
+            serializer_class=self.OutputSerializer,
+            queryset=self.get_queryset(request, service_auth),
+            request=request,
+            view=self,
+        )
+
+
+class ExchangesListAsyncAPI(AsyncAPIView, ExchangesListAPI):
+    @ahmac_service_auth
+    async def get(self, request, service_auth: CurrencyServiceAuth):
+        return await aget_paginated_response(
+            pagination_class=self.Pagination,
+            cursor_pagination_class=self.CursorPagination,
             serializer_class=self.OutputSerializer,
-            queryset=exchanges,
+            queryset=self.get_queryset(request, service_auth),
             request=request,
             view=self,
         )
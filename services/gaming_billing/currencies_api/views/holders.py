@@ -1,13 +1,19 @@
-from currencies.models import HolderType
 from currencies.permissions import HoldersPermissionsService
-from currencies.services import HoldersService, HoldersTypeService
-from currencies_api.auth import hmac_service_auth
+from currencies.services import HoldersService, HoldersTypeService, ReferencesService
+from currencies_api.auth import ahmac_service_auth, hmac_service_auth
+from currencies_api.fields import ReferenceSlugRelatedField
 from currencies_api.models import CurrencyServiceAuth
-from currencies_api.pagination import LimitOffsetPagination, get_paginated_response
+from currencies_api.pagination import (
+    LimitOffsetPagination,
+    aget_paginated_response,
+    get_paginated_response,
+)
 from rest_framework import serializers, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .base import AsyncAPIView
+
 
 class HoldersDetailAPI(APIView):
     class InputSerializer(serializers.Serializer):
@@ -21,28 +27,40 @@ class HoldersDetailAPI(APIView):
         created_at = serializers.DateTimeField()
         updated_at = serializers.DateTimeField()
 
-    @hmac_service_auth
-    def get(self, request, service_auth: CurrencyServiceAuth):
-        HoldersPermissionsService.enforce_access(permissions=service_auth.service.permissions)
+    def get_holder_id(self, request, service_auth: CurrencyServiceAuth) -> str:
+        HoldersPermissionsService.enforce_access(permissions=service_auth.service.permissions_policy)
 
         serializer = self.InputSerializer(data=request.query_params)
         serializer.is_valid(raise_exception=True)
 
-        holder_id = serializer.validated_data["holder_id"]  # type: ignore
-
-        holder = HoldersService.get(holder_id=holder_id)
+        return serializer.validated_data["holder_id"]  # type: ignore
 
+    def get_response(self, holder) -> Response:
         if holder is None:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
         return Response(self.OutputSerializer(holder).data)
 
+    @hmac_service_auth
+    def get(self, request, service_auth: CurrencyServiceAuth):
+        holder = HoldersService.get(holder_id=self.get_holder_id(request, service_auth))
+
+        return self.get_response(holder)
+
+
+class HoldersDetailAsyncAPI(AsyncAPIView, HoldersDetailAPI):
+    @ahmac_service_auth
+    async def get(self, request, service_auth: CurrencyServiceAuth):
+        holder = await HoldersService.aget(holder_id=self.get_holder_id(request, service_auth))
+
+        return self.get_response(holder)
+
 
 class HoldersCreateAPI(APIView):
     class InputSerializer(serializers.Serializer):
         holder_id = serializers.CharField()
-        holder_type = serializers.SlugRelatedField(
-            queryset=HolderType.objects.all(), slug_field="name", default=HoldersTypeService.get_default
+        holder_type = ReferenceSlugRelatedField(
+            reference=ReferencesService.holder_types, default=HoldersTypeService.get_default
         )
         info = serializers.JSONField(default=dict)
 
@@ -57,7 +75,7 @@ class HoldersCreateAPI(APIView):
 
     @hmac_service_auth
     def post(self, request, service_auth: CurrencyServiceAuth):
-        HoldersPermissionsService.enforce_create(permissions=service_auth.service.permissions)
+        HoldersPermissionsService.enforce_create(permissions=service_auth.service.permissions_policy)
 
         serializer = self.InputSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -92,7 +110,7 @@ class HoldersUpdateAPI(APIView):
 
     @hmac_service_auth
     def post(self, request, service_auth: CurrencyServiceAuth):
-        HoldersPermissionsService.enforce_update(permissions=service_auth.service.permissions)
+        HoldersPermissionsService.enforce_update(permissions=service_auth.service.permissions_policy)
 
         input_serializer = self.InputSerializer(data=request.data)
         input_serializer.is_valid(raise_exception=True)
@@ -135,14 +153,13 @@ class HoldersListAPI(APIView):
         created_at = serializers.DateTimeField()
         updated_at = serializers.DateTimeField()
 
-    @hmac_service_auth
-    def get(self, request, service_auth: CurrencyServiceAuth):
-        HoldersPermissionsService.enforce_access(permissions=service_auth.service.permissions)
+    def get_queryset(self, request, service_auth: CurrencyServiceAuth):
+        HoldersPermissionsService.enforce_access(permissions=service_auth.service.permissions_policy)
 
         filter_serializer = self.FilterSerializer(data=request.query_params)
         filter_serializer.is_valid(raise_exception=True)
 
-        holders = (
+        return (
             HoldersService.list(
                 filters=filter_serializer.validated_data,  # type: ignore
             )
@@ -150,10 +167,24 @@ class HoldersListAPI(APIView):
             .order_by("-created_at")
         )
 
+    @hmac_service_auth
+    def get(self, request, service_auth: CurrencyServiceAuth):
         return get_paginated_response(
             pagination_class=self.Pagination,
             serializer_class=self.OutputSerializer,
-            queryset=holders,
+            queryset=self.get_queryset(request, service_auth),
+            request=request,
+            view=self,
+        )
+
+
+class HoldersListAsyncAPI(AsyncAPIView, HoldersListAPI):
+    @ahmac_service_auth
+    async def get(self, request, service_auth: CurrencyServiceAuth):
+        return await aget_paginated_response(
+            pagination_class=self.Pagination,
+            serializer_class=self.OutputSerializer,
+            queryset=self.get_queryset(request, service_auth),
             request=request,
             view=self,
         )
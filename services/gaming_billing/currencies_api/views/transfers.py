@@ -1,29 +1,39 @@
 from datetime import timedelta
 from decimal import Decimal
+from uuid import UUID
 
 from currencies.models import Holder, TransferRule, TransferTransaction
 from currencies.permissions import TransfersPermissionsService
-from currencies.services import AccountsService, TransfersService
-from currencies_api.auth import hmac_service_auth
+from currencies.services import AccountsService, ReferencesService, TransfersService
+from currencies_api.auth import ahmac_service_auth, hmac_service_auth
+from currencies_api.fields import ReferenceSlugRelatedField
+from currencies_api.idempotency import get_idempotent_response
 from currencies_api.models import CurrencyServiceAuth
-from currencies_api.pagination import LimitOffsetPagination, get_paginated_response
+from currencies_api.pagination import (
+    KeysetPagination,
+    LimitOffsetPagination,
+    aget_paginated_response,
+    get_paginated_response,
+)
 from django.conf import settings
 from rest_framework import serializers, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .base import AsyncAPIView
+
 
 class TransfersCreateAPI(APIView):
     class InputSerializer(serializers.Serializer):
         from_holder_id = serializers.SlugRelatedField(queryset=Holder.objects.all(), slug_field="holder_id")
         to_holder_id = serializers.SlugRelatedField(queryset=Holder.objects.all(), slug_field="holder_id")
-        transfer_rule = serializers.SlugRelatedField(
-            queryset=TransferRule.objects.select_related("unit").all(), slug_field="name"
-        )
+        transfer_rule = ReferenceSlugRelatedField(reference=ReferencesService.transfer_rules)
         amount = serializers.DecimalField(max_digits=13, decimal_places=4)
         description = serializers.CharField()
         auto_reject_timeout = serializers.IntegerField(min_value=1, default=settings.DEFAULT_AUTO_REJECT_SECONDS)
+        instant = serializers.BooleanField(default=False)
+        uuid = serializers.UUIDField(required=False)
 
     class OutputSerializer(serializers.Serializer):
         uuid = serializers.UUIDField()
@@ -33,7 +43,14 @@ class TransfersCreateAPI(APIView):
 
     @hmac_service_auth
     def post(self, request, service_auth: CurrencyServiceAuth):
+        return get_idempotent_response(
+            request=request,
+            service=service_auth.service,
+            endpoint="transfers.create",
+            get_response=lambda: self.create(request, service_auth),
+        )
 
+    def create(self, request, service_auth: CurrencyServiceAuth) -> Response:
         serializer = self.InputSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
@@ -43,12 +60,18 @@ class TransfersCreateAPI(APIView):
         amount: Decimal = serializer.validated_data["amount"]  # type: ignore
         description: str = serializer.validated_data["description"]  # type: ignore
         auto_reject_timeout: int = serializer.validated_data["auto_reject_timeout"]  # type: ignore
+        instant: bool = serializer.validated_data["instant"]  # type: ignore
+        uuid: UUID | None = serializer.validated_data.get("uuid")  # type: ignore
+
+        TransfersPermissionsService.enforce_create(permissions=service_auth.service.permissions_policy)
+
+        if instant:
+            TransfersPermissionsService.enforce_instant(permissions=service_auth.service.permissions_policy)
 
-        TransfersPermissionsService.enforce_create(permissions=service_auth.service.permissions)
         TransfersPermissionsService.enforce_auto_reject_timeout(
-            permissions=service_auth.service.permissions, auto_reject=auto_reject_timeout
+            permissions=service_auth.service.permissions_policy, auto_reject=auto_reject_timeout
         )
-        TransfersPermissionsService.enforce_amount(permissions=service_auth.service.permissions, amount=amount)
+        TransfersPermissionsService.enforce_amount(permissions=service_auth.service.permissions_policy, amount=amount)
 
         from_account = AccountsService.get(holder=from_holder, currency_unit=transfer_rule.unit)
         if from_account is None:
@@ -73,6 +96,8 @@ class TransfersCreateAPI(APIView):
             from_amount=amount,
             description=description,
             auto_reject_timedelta=timedelta(seconds=auto_reject_timeout),
+            instant=instant,
+            uuid=uuid,
         )
 
         return Response(status=status.HTTP_201_CREATED, data=self.OutputSerializer(transaction).data)
@@ -93,7 +118,7 @@ class TransfersConfirmAPI(APIView):
         status_description: str = serializer.validated_data["status_description"]  # type: ignore
 
         TransfersPermissionsService.enforce_confirm(
-            permissions=service_auth.service.permissions, service_name=transfer.service.name
+            permissions=service_auth.service.permissions_policy, service_name=transfer.service.name
         )
 
         TransfersService.confirm(
@@ -119,7 +144,7 @@ class TransfersRejectAPI(APIView):
         status_description: str = serializer.validated_data["status_description"]  # type: ignore
 
         TransfersPermissionsService.enforce_reject(
-            permissions=service_auth.service.permissions, service_name=transfer.service.name
+            permissions=service_auth.service.permissions_policy, service_name=transfer.service.name
         )
 
         TransfersService.reject(
@@ -134,6 +159,9 @@ class TransfersListAPI(APIView):
     class Pagination(LimitOffsetPagination):
         pass
 
+    class CursorPagination(KeysetPagination):
+        pass
+
     class FilterSerializer(serializers.Serializer):
         service = serializers.CharField(required=False)
         status = serializers.CharField(required=False)
@@ -172,14 +200,13 @@ class TransfersListAPI(APIView):
 
         unit = serializers.CharField(source="from_checking_account.currency_unit.symbol")
 
-    @hmac_service_auth
-    def get(self, request, service_auth: CurrencyServiceAuth):
-        TransfersPermissionsService.enforce_access(permissions=service_auth.service.permissions)
+    def get_queryset(self, request, service_auth: CurrencyServiceAuth):
+        TransfersPermissionsService.enforce_access(permissions=service_auth.service.permissions_policy)
 
         filter_serializer = self.FilterSerializer(data=request.query_params)
         filter_serializer.is_valid(raise_exception=True)
 
-        transfers = TransfersService.list(
+        return TransfersService.list(
             filters=filter_serializer.validated_data,  # type: ignore
         ).select_related(
             "service",
@@ -189,10 +216,26 @@ class TransfersListAPI(APIView):
             "from_checking_account__currency_unit",
         )
 
+    @hmac_service_auth
+    def get(self, request, service_auth: CurrencyServiceAuth):
         return get_paginated_response(
             pagination_class=self.Pagination,
+            cursor_pagination_class=self.CursorPagination,
+            serializer_class=self.OutputSerializer,
+            queryset=self.get_queryset(request, service_auth),
+            request=request,
+            view=self,
+        )
+
+
+class TransfersListAsyncAPI(AsyncAPIView, TransfersListAPI):
+    @ahmac_service_auth
+    async def get(self, request, service_auth: CurrencyServiceAuth):
+        return await aget_paginated_response(
+            pagination_class=self.Pagination,
+            cursor_pagination_class=self.CursorPagination,
             serializer_class=self.OutputSerializer,
-            queryset=transfers,
+            queryset=self.get_queryset(request, service_auth),
             request=request,
             view=self,
         )
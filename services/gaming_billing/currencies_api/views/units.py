@@ -1,11 +1,17 @@
 from currencies.models import CurrencyUnit
 from currencies.permissions import CurrencyUnitsPermissionsService
-from currencies_api.auth import hmac_service_auth
+from currencies_api.auth import ahmac_service_auth, hmac_service_auth
 from currencies_api.models import CurrencyServiceAuth
-from currencies_api.pagination import LimitOffsetPagination, get_paginated_response
+from currencies_api.pagination import (
+    LimitOffsetPagination,
+    aget_paginated_response,
+    get_paginated_response,
+)
 from rest_framework import serializers
 from rest_framework.views import APIView
 
+from .base import AsyncAPIView
+
 
 class CurrencyUnitsListAPI(APIView):
     class Pagination(LimitOffsetPagination):
@@ -17,17 +23,29 @@ class CurrencyUnitsListAPI(APIView):
         created_at = serializers.DateTimeField()
         updated_at = serializers.DateTimeField()
 
+    def get_queryset(self, request, service_auth: CurrencyServiceAuth):
+        CurrencyUnitsPermissionsService.enforce_access(permissions=service_auth.service.permissions_policy)
+
+        return CurrencyUnit.objects.all()
+
     @hmac_service_auth
     def get(self, request, service_auth: CurrencyServiceAuth):
+        return get_paginated_response(
+            pagination_class=self.Pagination,
+            serializer_class=self.OutputSerializer,
+            queryset=self.get_queryset(request, service_auth),
+            request=request,
+            view=self,
+        )
 
-        CurrencyUnitsPermissionsService.enforce_access(permissions=service_auth.service.permissions)
-
-        units = CurrencyUnit.objects.all()
 
-        return get_paginated_response(
+class CurrencyUnitsListAsyncAPI(AsyncAPIView, CurrencyUnitsListAPI):
+    @ahmac_service_auth
+    async def get(self, request, service_auth: CurrencyServiceAuth):
+        return await aget_paginated_response(
             pagination_class=self.Pagination,
             serializer_class=self.OutputSerializer,
-            queryset=units,
+            queryset=self.get_queryset(request, service_auth),
             request=request,
             view=self,
         )
@@ -1,4 +1,5 @@
 #!/bin/sh
 set -e
 
-python3 manage.py migrate --noinput
\ No newline at end of file
+python3 manage.py migrate --noinput
+python3 manage.py createcachetable
@@ -100,6 +100,13 @@ WSGI_APPLICATION = "settings.wsgi.application"
 
 # DJANGO DATABASE
 
+DATABASE_ISOLATION = config["DATABASE"]["ISOLATION"]
+
+DATABASE_ISOLATION_LEVELS = {
+    "serializable": IsolationLevel.SERIALIZABLE,
+    "read_committed": IsolationLevel.READ_COMMITTED,
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -109,11 +116,31 @@ DATABASES = {
         "HOST": config["DJANGO"]["POSTGRES_HOST"],
         "PORT": config["DJANGO"]["POSTGRES_PORT"],
         "OPTIONS": {
-            "isolation_level": IsolationLevel.SERIALIZABLE,
+            "isolation_level": DATABASE_ISOLATION_LEVELS[DATABASE_ISOLATION],
         },
+        "CONN_MAX_AGE": config["DATABASE"]["CONN_MAX_AGE"],
+        "CONN_HEALTH_CHECKS": config["DATABASE"]["CONN_HEALTH_CHECKS"],
     }
 }
 
+if config["DATABASE_POOL"]["ENABLE"]:
+    # Пул не совместим с постоянными соединениями Django, соединения держит сам пул,
+    # CONN_HEALTH_CHECKS включает проверку соединения перед выдачей из пула
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": config["DATABASE_POOL"]["MIN_SIZE"],
+        "max_size": config["DATABASE_POOL"]["MAX_SIZE"],
+        "timeout": config["DATABASE_POOL"]["TIMEOUT"],
+        "max_lifetime": config["DATABASE_POOL"]["MAX_LIFETIME"],
+        "max_idle": config["DATABASE_POOL"]["MAX_IDLE"],
+    }
+
+# Повторы транзакций после ошибок сериализации и взаимных блокировок, common.utils.retry_on_serialization_error
+DATABASE_RETRY_MAX_ATTEMPTS = config["DATABASE_RETRY"]["MAX_ATTEMPTS"]
+DATABASE_RETRY_BASE_DELAY = config["DATABASE_RETRY"]["BASE_DELAY_MS"] / 1000
+DATABASE_RETRY_MAX_DELAY = config["DATABASE_RETRY"]["MAX_DELAY_MS"] / 1000
+DATABASE_RETRY_TIME_BUDGET = config["DATABASE_RETRY"]["TIME_BUDGET_MS"] / 1000
+
 if IS_LOCAL_RUN:
     print("[ ! ] Redefining the standard database to sqlite for local run, check settings/settings.py")
 
@@ -230,14 +257,51 @@ HMAC_HASH_TYPE = "sha256"
 
 HMAC_TIMESTAMP_DEVIATION = timedelta(seconds=config["HMAC"]["TIMESTAMP_DEVIATION"])
 
+# Время жизни доступов сервисов в кэше процесса, 0 - без кэша
+SERVICE_AUTH_CACHE_TTL = timedelta(seconds=config["HMAC"]["SERVICE_AUTH_CACHE_SECONDS"])
+
 
 # Currency transactions
 
 DEFAULT_AUTO_REJECT_TIMEDELTA = timedelta(seconds=config["CURRENCY_TRANSACTIONS"]["DEFAULT_AUTO_REJECT_SECONDS"])
 DEFAULT_AUTO_REJECT_SECONDS = DEFAULT_AUTO_REJECT_TIMEDELTA.total_seconds()
+CURRENCY_BATCH_MAX_ITEMS = 500
+CURRENCY_REJECT_OUTDATED_CHUNK_SIZE = 1000
+# Сколько reject_all_outdated берет новые пачки за один запуск
+CURRENCY_REJECT_OUTDATED_TIME_BUDGET = timedelta(seconds=60)
+CURRENCY_COLLAPSE_CHUNK_SIZE = 1000
+CURRENCY_LEDGER_SNAPSHOT_CHUNK_SIZE = 1000
 CURRENCY_DEFAULT_HOLDER_TYPE_SLUG = "player"
 ADMIN_SITE_SERVICE_NAME = "admin-site"
 
+# API
+
+# Маршруты чтения указывают на async обработчики, для запуска под ASGI
+API_ASYNC_READ_ENDPOINTS = config["API"]["ASYNC_READ_ENDPOINTS"]
+# Сколько хранятся ключи идемпотентности запросов создания, удаляются задачей delete_expired_idempotency_keys
+API_IDEMPOTENCY_KEY_TTL = timedelta(hours=config["API"]["IDEMPOTENCY_KEY_TTL_HOURS"])
+
+# CACHE
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Общий для всех процессов кэш в базе, таблица создается миграцией currencies 0010
+    "versions": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "cache_versions",
+    },
+}
+
+# Алиас кэша Django, общего для всех процессов, в котором хранятся версии кэшей процессов,
+# None - изменения видны другим процессам только по истечении времени жизни записей
+CACHE_VERSION_ALIAS = config["CACHE"].get("VERSION_ALIAS")
+# Как часто процесс читает версии кэшей, столько изменения доступов и справочников не видны другим процессам
+CACHE_VERSION_CHECK_INTERVAL = timedelta(seconds=config["CACHE"].get("VERSION_CHECK_SECONDS", 1))
+# Время жизни справочных данных (валюты, правила, типы держателей) в кэше процесса, 0 - без кэша
+REFERENCE_CACHE_TTL = timedelta(seconds=config["CURRENCY_TRANSACTIONS"]["REFERENCE_CACHE_SECONDS"])
+
 # CELERY
 
 CELERY_RESULT_EXPIRES = timedelta(days=config["CELERY"]["RESULT_EXPIRES_DAYS"])